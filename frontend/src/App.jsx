@@ -8,6 +8,12 @@ import HourlyPerformanceChart from './components/HourlyPerformanceChart';
 import NetworkMap from './components/NetworkMap';
 import ScenarioDistribution from './components/ScenarioDistribution';
 import GradioEmbed from './components/GradioEmbed';
+import { loadDashboardData } from './utils/columnar';
+
+// Binary columnar files written by scripts/prepare_frontend_data.py
+function loadData(name) {
+  return loadDashboardData(`/${name}.tnmc`);
+}
 
 function App() {
   const [darkMode, setDarkMode] = useState(true);
@@ -28,14 +34,12 @@ function App() {
 
   useEffect(() => {
     // Load 5G time-series data
-    fetch('/5g_timeseries.json')
-      .then(res => res.json())
+    loadData('5g_timeseries')
       .then(data => setData5g(data))
       .catch(err => console.error('Error loading 5G data:', err));
 
     // Load Ookla data
-    fetch('/ookla_data.json')
-      .then(res => res.json())
+    loadData('ookla_data')
       .then(data => setOoklaData(data))
       .catch(err => console.error('Error loading Ookla data:', err));
   }, []);
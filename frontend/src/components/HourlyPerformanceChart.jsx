@@ -6,12 +6,14 @@ ChartJS.register(CategoryScale, LinearScale, BarElement, Title, Tooltip, Legend)
 export default function HourlyPerformanceChart({ data }) {
   if (!data) return <div>Loading...</div>;
 
+  const { hour, throughput_mbps_mean } = data.hourly.columns;
+
   const chartData = {
-    labels: data.hourly.map(d => `${d.hour}:00`),
+    labels: Array.from(hour, h => `${h}:00`),
     datasets: [
       {
         label: 'Avg Throughput (Mbps)',
-        data: data.hourly.map(d => d.throughput_mbps_mean),
+        data: Array.from(throughput_mbps_mean),
         backgroundColor: 'rgba(0, 180, 216, 0.7)',
       },
     ],
@@ -1,33 +1,100 @@
+import { useEffect, useRef, useState } from 'react';
 import { Line } from 'react-chartjs-2';
 import { Chart as ChartJS, CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend } from 'chart.js';
+import { Box, Slider, Typography } from '@mui/material';
+import { loadManifest, loadRange, pickLevel, pyramidExtent } from '../utils/timeseriesPyramid';
 
 ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend);
 
+// Min/max pyramid levels keep ~2 points per bucket, so allow about 2 points per pixel
+const POINTS_PER_PIXEL = 2;
+
+const formatTime = t => new Date(t * 1000).toISOString().slice(0, 16).replace('T', ' ');
+
 export default function TimeSeriesChart({ data }) {
+  const containerRef = useRef(null);
+  const [width, setWidth] = useState(800);
+  const [manifest, setManifest] = useState(null);
+  const [extent, setExtent] = useState(null);
+  const [range, setRange] = useState(null);
+  const [sliderValue, setSliderValue] = useState(null);
+  const [view, setView] = useState(null);
+
+  // Track the chart's pixel width
+  useEffect(() => {
+    if (!containerRef.current) return;
+    const observer = new ResizeObserver(([entry]) => setWidth(Math.max(1, Math.round(entry.contentRect.width))));
+    observer.observe(containerRef.current);
+    return () => observer.disconnect();
+  }, [data]);
+
+  // Load the pyramid manifest (falls back to the embedded overview points without one)
+  useEffect(() => {
+    if (!data?.timeseries_pyramid) return;
+    loadManifest(`/${data.timeseries_pyramid}`)
+      .then(m => {
+        const full = pyramidExtent(m);
+        setManifest(m);
+        setExtent(full);
+        setRange(full);
+        setSliderValue(full);
+      })
+      .catch(err => console.error('Error loading time-series pyramid:', err));
+  }, [data]);
+
+  // Fetch the level and tiles that fit the visible range at the current width
+  useEffect(() => {
+    if (!manifest || !range) return;
+    let cancelled = false;
+    const level = pickLevel(manifest, range[0], range[1], width * POINTS_PER_PIXEL);
+    const baseUrl = `/${data.timeseries_pyramid.replace(/[^/]*$/, '')}`;
+
+    loadRange(baseUrl, level, range[0], range[1])
+      .then(points => { if (!cancelled) setView({ points, level }); })
+      .catch(err => console.error('Error loading time-series tiles:', err));
+    return () => { cancelled = true; };
+  }, [manifest, range, width, data]);
+
   if (!data) return <div>Loading...</div>;
 
+  // Columnar points: typed arrays per column (see ../utils/columnar.js)
+  const { t = [], throughput_mbps = [], latency_ms = [], is_anomaly } = (view ? view.points : data.timeseries).columns;
+
   const chartData = {
-    labels: data.timeseries.map(d => new Date(d.timestamp).toLocaleTimeString()),
+    labels: Array.from(t, s => new Date(s * 1000).toLocaleTimeString()),
     datasets: [
       {
         label: 'Throughput (Mbps)',
-        data: data.timeseries.map(d => d.throughput_mbps),
+        data: Array.from(throughput_mbps),
         borderColor: 'rgb(0, 180, 216)',
         backgroundColor: 'rgba(0, 180, 216, 0.1)',
+        pointRadius: 0,
         yAxisID: 'y',
       },
       {
         label: 'Latency (ms)',
-        data: data.timeseries.map(d => d.latency_ms),
+        data: Array.from(latency_ms),
         borderColor: 'rgb(247, 37, 133)',
         backgroundColor: 'rgba(247, 37, 133, 0.1)',
+        pointRadius: 0,
         yAxisID: 'y1',
       },
+      {
+        label: 'Anomalies',
+        data: is_anomaly ? Array.from(throughput_mbps, (v, i) => (is_anomaly[i] ? v : null)) : [],
+        borderColor: 'rgb(230, 57, 70)',
+        backgroundColor: 'rgb(230, 57, 70)',
+        pointStyle: 'crossRot',
+        pointRadius: 5,
+        showLine: false,
+        yAxisID: 'y',
+      },
     ],
   };
 
   const options = {
     responsive: true,
+    animation: false,
     interaction: {
       mode: 'index',
       intersect: false,
@@ -54,5 +121,27 @@ export default function TimeSeriesChart({ data }) {
     },
   };
 
-  return <Line data={chartData} options={options} height={80} />;
+  return (
+    <Box ref={containerRef}>
+      <Line data={chartData} options={options} height={80} />
+      {extent && sliderValue && (
+        <Box sx={{ px: 2, mt: 1 }}>
+          <Slider
+            value={sliderValue}
+            min={extent[0]}
+            max={extent[1]}
+            onChange={(_, value) => setSliderValue(value)}
+            onChangeCommitted={(_, value) => setRange(value)}
+            valueLabelDisplay="auto"
+            valueLabelFormat={formatTime}
+            disableSwap
+          />
+          <Typography variant="caption" color="text.secondary">
+            {formatTime(range[0])} – {formatTime(range[1])}
+            {view && ` · ${view.points.nRows} points at ${view.level.bucket_seconds}s resolution`}
+          </Typography>
+        </Box>
+      )}
+    </Box>
+  );
 }
@@ -0,0 +1,84 @@
+// Decoder for the binary columnar data files written by ml/columnar.py:
+// gzip( "TNMC" | u32 version | u32 header length | header JSON | 8-byte aligned little-endian columns )
+// Columns are returned as typed-array views over the decompressed buffer (no per-value parsing)
+
+const MAGIC = 'TNMC';
+const FORMAT_VERSION = 1;
+const PREAMBLE_BYTES = 12;
+
+const TYPED_ARRAYS = {
+  '|u1': Uint8Array,
+  '|i1': Int8Array,
+  '<u2': Uint16Array,
+  '<i2': Int16Array,
+  '<u4': Uint32Array,
+  '<i4': Int32Array,
+  '<f4': Float32Array,
+  '<f8': Float64Array,
+};
+
+async function gunzip(bytes) {
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+  return new Response(stream).arrayBuffer();
+}
+
+// Parse a (decompressed) columnar buffer into { tables, meta }.
+// Each table is { nRows, columns: { name: TypedArray }, dictionaries: { name: [values] } };
+// dictionary-encoded columns hold integer codes into their dictionary.
+export function decodeColumnar(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== MAGIC) throw new Error('Not a columnar data file');
+  const version = view.getUint32(4, true);
+  if (version > FORMAT_VERSION) throw new Error(`Unsupported columnar format version ${version}`);
+
+  const headerLength = view.getUint32(8, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, PREAMBLE_BYTES, headerLength)));
+
+  const tables = {};
+  for (const [name, table] of Object.entries(header.tables)) {
+    const columns = {};
+    const dictionaries = {};
+    for (const [col, spec] of Object.entries(table.columns)) {
+      const TypedArray = TYPED_ARRAYS[spec.dtype];
+      if (!TypedArray) throw new Error(`Unsupported column type ${spec.dtype} (${name}.${col})`);
+      columns[col] = new TypedArray(buffer, spec.offset, spec.count);
+      if (spec.dictionary) dictionaries[col] = spec.dictionary;
+    }
+    tables[name] = { nRows: table.n_rows, columns, dictionaries };
+  }
+  return { tables, meta: header.meta };
+}
+
+// Fetch and decode a columnar file; handles servers that already removed the gzip layer
+export async function loadColumnar(url) {
+  const res = await fetch(url);
+  if (!res.ok) throw new Error(`Failed to load ${url}: ${res.status}`);
+  let buffer = await res.arrayBuffer();
+  const head = new Uint8Array(buffer, 0, 2);
+  if (head[0] === 0x1f && head[1] === 0x8b) buffer = await gunzip(buffer);
+  return decodeColumnar(buffer);
+}
+
+// Load a dashboard file: its tables and header metadata merged into one object
+export async function loadDashboardData(url) {
+  const { tables, meta } = await loadColumnar(url);
+  return { ...meta, ...tables };
+}
+
+// Column values as a plain array, with dictionary codes resolved (e.g. for chart labels)
+export function columnValues(table, name) {
+  const column = table.columns[name];
+  const dictionary = table.dictionaries[name];
+  return dictionary ? Array.from(column, code => dictionary[code]) : Array.from(column);
+}
+
+// Row i as an object (for the handful of rows rendered individually, e.g. map markers)
+export function tableRow(table, i) {
+  const row = {};
+  for (const [name, column] of Object.entries(table.columns)) {
+    const dictionary = table.dictionaries[name];
+    row[name] = dictionary ? dictionary[column[i]] : column[i];
+  }
+  return row;
+}
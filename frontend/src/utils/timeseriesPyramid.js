@@ -0,0 +1,99 @@
+// Client for the downsampled time-series pyramid written by scripts/prepare_frontend_data.py
+// (see ml/downsample.py): pick the level that fits the chart width, fetch only the tiles in view.
+// Tiles are binary columnar files (see ./columnar.js) holding one 'points' table each
+
+import { loadColumnar } from './columnar';
+
+const tileCache = new Map();
+
+export async function loadManifest(url) {
+  const res = await fetch(url);
+  if (!res.ok) throw new Error(`Failed to load ${url}: ${res.status}`);
+  return res.json();
+}
+
+// Full time range covered by the pyramid, in epoch seconds
+export function pyramidExtent(manifest) {
+  const levels = manifest.levels.filter(level => level.start != null);
+  if (!levels.length) return null;
+  return [Math.min(...levels.map(l => l.start)), Math.max(...levels.map(l => l.end))];
+}
+
+// Finest level whose expected number of points in [start, end] fits maxPoints
+export function pickLevel(manifest, start, end, maxPoints) {
+  for (const level of manifest.levels) {
+    if (level.start == null) continue;
+    const span = Math.max(level.end - level.start, 1);
+    const expected = level.n_points * Math.min(1, (end - start) / span);
+    if (expected <= maxPoints) return level;
+  }
+  return manifest.levels[manifest.levels.length - 1];
+}
+
+function fetchTile(url) {
+  if (!tileCache.has(url)) {
+    const request = loadColumnar(url).then(tile => tile.tables.points);
+    request.catch(() => tileCache.delete(url));
+    tileCache.set(url, request);
+  }
+  return tileCache.get(url);
+}
+
+// First index in the sorted array t with t[i] >= value
+function lowerBound(t, value) {
+  let lo = 0;
+  let hi = t.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (t[mid] < value) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+// Concatenate tiles column by column; dictionary-encoded columns are re-coded into one dictionary
+function concatTables(tables) {
+  const first = tables[0];
+  const nRows = tables.reduce((sum, table) => sum + table.nRows, 0);
+  const columns = {};
+  const dictionaries = {};
+
+  for (const [name, column] of Object.entries(first.columns)) {
+    const merged = new column.constructor(nRows);
+    if (first.dictionaries[name]) {
+      const dictionary = [...new Set(tables.flatMap(table => table.dictionaries[name]))];
+      const codes = new Map(dictionary.map((v, i) => [v, i]));
+      let offset = 0;
+      for (const table of tables) {
+        const remap = table.dictionaries[name].map(v => codes.get(v));
+        table.columns[name].forEach((code, i) => { merged[offset + i] = remap[code]; });
+        offset += table.nRows;
+      }
+      dictionaries[name] = dictionary;
+    } else {
+      let offset = 0;
+      for (const table of tables) {
+        merged.set(table.columns[name], offset);
+        offset += table.nRows;
+      }
+    }
+    columns[name] = merged;
+  }
+  return { nRows, columns, dictionaries };
+}
+
+// Points of one level between start and end (inclusive), in time order, as a columnar table
+export async function loadRange(baseUrl, level, start, end) {
+  const tiles = Object.values(level.tiles)
+    .filter(tile => tile.end >= start && tile.start <= end)
+    .sort((a, b) => a.start - b.start);
+
+  const loaded = await Promise.all(tiles.map(tile => fetchTile(baseUrl + tile.file)));
+  if (!loaded.length) return { nRows: 0, columns: {}, dictionaries: {} };
+
+  const table = concatTables(loaded);
+  const from = lowerBound(table.columns.t, start);
+  const to = lowerBound(table.columns.t, end + 1);
+  const columns = Object.fromEntries(Object.entries(table.columns).map(([name, column]) => [name, column.subarray(from, to)]));
+  return { nRows: to - from, columns, dictionaries: table.dictionaries };
+}
@@ -6,16 +6,53 @@ Interactive ML demos for network anomaly detection, KPI prediction, and coverage
 import gradio as gr
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from pathlib import Path
+import functools
+import gzip
+import os
 import sys
+import threading
+import time
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from ml.anomaly_detector import NetworkAnomalyDetector
-from ml.coverage_classifier import CoverageClassifier
+from ml.batching import MicroBatcher
+from ml.bundle import ModelBundle, load_serving_models
+from ml.columnar import encode_columnar
+from ml.dataset_cache import DatasetCache
+from ml.drift import BackgroundRetrainer, DriftMonitor
+from ml.features import FEATURE_COLUMNS, extract_features
+from ml.lazy import LazyResource, warm_up
+from ml.metrics import BATCH_SIZE_BUCKETS, PROMETHEUS_CONTENT_TYPE, REGISTRY
+from ml.spatial_index import SpatialIndex
+from ml.timeseries_store import open_store
+
+# Request coalescing: concurrent requests within this window share one model call
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "3"))
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "64"))
+CONCURRENCY_LIMIT = int(os.environ.get("CONCURRENCY_LIMIT", "64"))
+SERVER_PORT = int(os.environ.get("PORT", "7860"))
+
+# Raw rows a /timeseries query may return; larger windows must be bucketed
+MAX_QUERY_ROWS = int(os.environ.get("MAX_QUERY_ROWS", "200000"))
+
+# Aggregated map tiles a /tiles query may return; the zoom is lowered to fit when not given
+MAX_QUERY_TILES = int(os.environ.get("MAX_QUERY_TILES", "5000"))
+
+# Load models in the background after the server starts (set WARMUP=0 to load on first request)
+WARMUP = os.environ.get("WARMUP", "1") != "0"
+
+# Drift monitoring of live anomaly requests; on drift, retrain on the recent window and swap models
+# (set RETRAIN=0 to only report drift)
+DRIFT_WINDOW = int(os.environ.get("DRIFT_WINDOW", "5000"))
+DRIFT_MIN_SAMPLES = int(os.environ.get("DRIFT_MIN_SAMPLES", "1000"))
+DRIFT_CHECK_SECONDS = float(os.environ.get("DRIFT_CHECK_SECONDS", "30"))
+DRIFT_REFERENCE_ROWS = 20000
+RETRAIN = os.environ.get("RETRAIN", "1") != "0"
+RETRAIN_MIN_INTERVAL_S = float(os.environ.get("RETRAIN_MIN_INTERVAL_S", "600"))
 
 # Load models
 # Check if running in Docker (models are in /app/ml/models)
@@ -25,36 +62,178 @@ if Path("/app/ml/models").exists():
 else:
     MODEL_DIR = Path(__file__).parent.parent / "ml" / "models"  # Local path
 
-try:
-    anomaly_detector = NetworkAnomalyDetector.load(MODEL_DIR)
-    coverage_classifier = CoverageClassifier.load(MODEL_DIR)
-    MODELS_LOADED = True
-except Exception as e:
-    print(f"⚠️  Could not load models: {e}")
-    MODELS_LOADED = False
+# Metrics served at /metrics (Prometheus text format)
+REQUESTS = REGISTRY.counter('tnm_requests_total', "Handler calls by outcome", ['handler', 'outcome'])
+REQUEST_SECONDS = REGISTRY.histogram('tnm_request_seconds', "End-to-end handler latency", ['handler'])
+STAGE_SECONDS = REGISTRY.histogram('tnm_stage_seconds', "Latency of one stage inside a handler or loader",
+                                   ['handler', 'stage'])
+MODEL_SECONDS = REGISTRY.histogram('tnm_model_call_seconds', "Latency of one batched model call", ['model'])
+MODEL_BATCH_ROWS = REGISTRY.histogram('tnm_model_batch_rows', "Rows per batched model call", ['model'],
+                                      buckets=BATCH_SIZE_BUCKETS)
+LOAD_SECONDS = REGISTRY.gauge('tnm_resource_load_seconds', "Time taken to load a lazy resource", ['resource'])
+DRIFT_PSI = REGISTRY.gauge('tnm_drift_psi', "PSI of the recent window against the training reference", ['column'])
+MODEL_SWAPS = REGISTRY.counter('tnm_model_swaps_total', "Live model swaps after background retraining").labels()
+
+
+def instrumented(handler):
+    """Count calls (ok/error) and record end-to-end latency of a handler"""
+    def decorate(fn):
+        seconds = REQUEST_SECONDS.labels(handler)
+        ok, error = REQUESTS.labels(handler, 'ok'), REQUESTS.labels(handler, 'error')
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                error.inc()
+                raise
+            finally:
+                seconds.observe(time.perf_counter() - start)
+            ok.inc()
+            return result
+
+        return wrapper
+    return decorate
+
+
+def stage(handler, name):
+    """Timer for one stage: with stage('detect_anomalies', 'figure'): ..."""
+    return STAGE_SECONDS.labels(handler, name).time()
+
+
+def timed_model(name, predict_fn):
+    """Wrap a batched predict function to record its latency and batch size"""
+    seconds, rows = MODEL_SECONDS.labels(name), MODEL_BATCH_ROWS.labels(name)
+
+    def predict(X):
+        rows.observe(len(X))
+        with seconds.time():
+            return predict_fn(X)
+
+    return predict
+
+
+def load_models():
+    """Load the serving models and start their request batchers"""
+    with stage('load_models', 'load_serving_models'):
+        anomaly_scorer, coverage_scorer = load_serving_models(MODEL_DIR)
+
+    return {
+        'anomaly_scorer': anomaly_scorer,
+        'coverage_scorer': coverage_scorer,
+        'anomaly_batcher': MicroBatcher(timed_model('anomaly_detector', anomaly_scorer.predict),
+                                        BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name='anomaly-batcher'),
+        'coverage_batcher': MicroBatcher(timed_model('coverage_classifier', coverage_scorer.predict),
+                                         BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name='coverage-batcher'),
+    }
+
+
+def import_plotly():
+    """Import plotly (about a second of startup) only when a chart is first drawn"""
+    import plotly.graph_objects as go
+    import plotly.express as px
+    return go, px
+
+
+models = LazyResource(load_models, name='models')
+plotly_modules = LazyResource(import_plotly, name='plotly')
+
+for _resource in (models, plotly_modules):
+    LOAD_SECONDS.labels(_resource.name).set_function(lambda resource=_resource: resource.load_seconds)
+
+
+def get_models():
+    """Return the loaded models, or None if they are not available"""
+    try:
+        return models.get()
+    except Exception as e:
+        print(f"⚠️  Could not load models: {e}")
+        return None
+
+
+def install_models(anomaly_scorer, coverage_scorer):
+    """
+    Switch the live models atomically
+
+    The batchers pick up the new models from their next batch; requests
+    already holding the old models finish on them, so none are dropped.
+    """
+    current = models.get()
+    models.replace({**current, 'anomaly_scorer': anomaly_scorer, 'coverage_scorer': coverage_scorer})
+    current['anomaly_batcher'].replace_predict_fn(timed_model('anomaly_detector', anomaly_scorer.predict))
+    current['coverage_batcher'].replace_predict_fn(timed_model('coverage_classifier', coverage_scorer.predict))
+    analysis_cache.invalidate()
+    MODEL_SWAPS.inc()
+
+
+def load_drift_monitor():
+    """Reference distributions: rows spread evenly over the training data, scored by the live detector"""
+    store = timeseries_store.get()
+    rows = np.linspace(0, store.n_rows - 1, min(DRIFT_REFERENCE_ROWS, store.n_rows)).astype(np.int64)
+    reference = pd.DataFrame({col: store.columns[col][rows] for col in FEATURE_COLUMNS})
+    _, scores = models.get()['anomaly_scorer'].predict(reference)
+    return DriftMonitor(reference, scores, window=DRIFT_WINDOW, min_samples=DRIFT_MIN_SAMPLES)
+
+
+def install_retrained(bundle_path, features):
+    """Load a bundle written by the retrainer, swap it in and make its training rows the new reference"""
+    bundle = ModelBundle(bundle_path, verify=True)
+    bundle.check_schema()
+    anomaly_scorer, coverage_scorer = bundle.model('anomaly_detector'), bundle.model('coverage_classifier')
+
+    install_models(anomaly_scorer, coverage_scorer)
+    drift_monitor.get().set_reference(features, anomaly_scorer.predict(features)[1])
+    print(f"🔁 Swapped in retrained models {bundle.version}")
+
 
+def observe_drift(row, anomaly_score):
+    """Add one scored request to the drift window (skipped until the monitor is loaded)"""
+    if drift_monitor.ready:
+        drift_monitor.get().observe([row], [anomaly_score])
 
+
+def watch_drift():
+    """Check for drift periodically and start a retraining run when it is found"""
+    while True:
+        time.sleep(DRIFT_CHECK_SECONDS)
+        if not models.ready:
+            continue
+        try:
+            monitor = drift_monitor.get()
+        except Exception:
+            continue  # No reference data yet (see /ready); retried on the next check
+
+        report = monitor.check()
+        for column, stats in report['columns'].items():
+            DRIFT_PSI.labels(column).set(stats['psi'])
+
+        if report['drifted'] and RETRAIN and retrainer.submit(monitor.recent()[0]):
+            print(f"📉 Drift in {', '.join(report['drifted_columns'])}: retraining on {report['n_window']} recent rows")
+
+
+drift_monitor = LazyResource(load_drift_monitor, name='drift_monitor')
+retrainer = BackgroundRetrainer(MODEL_DIR / "retrained", install_retrained, min_interval_s=RETRAIN_MIN_INTERVAL_S)
+LOAD_SECONDS.labels(drift_monitor.name).set_function(lambda: drift_monitor.load_seconds)
+
+
+@instrumented('detect_anomalies')
 def detect_anomalies(rsrp, rsrq, sinr, cqi, throughput, latency, packet_loss):
     """Detect if network metrics indicate an anomaly"""
-    if not MODELS_LOADED:
+    loaded = get_models()
+    if loaded is None:
         return "❌ Models not loaded. Please train models first.", None
 
-    # Create dataframe
-    df = pd.DataFrame({
-        'rsrp_dbm': [rsrp],
-        'rsrq_db': [rsrq],
-        'sinr_db': [sinr],
-        'cqi': [cqi],
-        'throughput_mbps': [throughput],
-        'latency_ms': [latency],
-        'packet_loss_pct': [packet_loss]
-    })
+    # Create feature row (same column order as the training features)
+    row = [rsrp, rsrq, sinr, cqi, throughput, latency, packet_loss]
 
-    # Predict
-    predictions, scores = anomaly_detector.predict(df)
+    # Predict (batched with concurrent requests; includes the batching wait)
+    with stage('detect_anomalies', 'predict'):
+        prediction, anomaly_score = loaded['anomaly_batcher'].predict(row)
+    observe_drift(row, anomaly_score)
 
-    is_anomaly = predictions[0] == 1
-    anomaly_score = scores[0]
+    is_anomaly = prediction == 1
 
     # Result
     if is_anomaly:
@@ -71,7 +250,16 @@ def detect_anomalies(rsrp, rsrq, sinr, cqi, throughput, latency, packet_loss):
         color = "green"
 
     # Create gauge chart
-    fig = go.Figure(go.Indicator(
+    with stage('detect_anomalies', 'figure'):
+        fig = _anomaly_gauge(anomaly_score, color)
+
+    return result, fig
+
+
+def _anomaly_gauge(anomaly_score, color):
+    """Gauge chart of the anomaly score"""
+    go, _ = plotly_modules.get()
+    return go.Figure(go.Indicator(
         mode="gauge+number",
         value=abs(anomaly_score),
         domain={'x': [0, 1], 'y': [0, 1]},
@@ -87,30 +275,20 @@ def detect_anomalies(rsrp, rsrq, sinr, cqi, throughput, latency, packet_loss):
         }
     ))
 
-    return result, fig
-
 
+@instrumented('classify_coverage')
 def classify_coverage(rsrp, rsrq, sinr, cqi, throughput, latency, packet_loss):
     """Classify network coverage quality"""
-    if not MODELS_LOADED:
+    loaded = get_models()
+    if loaded is None:
         return "❌ Models not loaded. Please train models first.", None
 
-    # Create dataframe
-    df = pd.DataFrame({
-        'rsrp_dbm': [rsrp],
-        'rsrq_db': [rsrq],
-        'sinr_db': [sinr],
-        'cqi': [cqi],
-        'throughput_mbps': [throughput],
-        'latency_ms': [latency],
-        'packet_loss_pct': [packet_loss]
-    })
+    # Create feature row (same column order as the training features)
+    row = [rsrp, rsrq, sinr, cqi, throughput, latency, packet_loss]
 
-    # Predict
-    predictions, probabilities = coverage_classifier.predict(df)
-
-    quality = predictions[0]
-    probs = probabilities[0]
+    # Predict (batched with concurrent requests; includes the batching wait)
+    with stage('classify_coverage', 'predict'):
+        quality, probs = loaded['coverage_batcher'].predict(row)
 
     # Quality icons
     quality_icons = {
@@ -133,45 +311,92 @@ def classify_coverage(rsrp, rsrq, sinr, cqi, throughput, latency, packet_loss):
     result += "**Confidence:**\n"
 
     # Create probability bar chart
-    classes = coverage_classifier.model.classes_
-    prob_df = pd.DataFrame({
-        'Quality': classes,
-        'Probability': probs
-    })
-
-    fig = px.bar(prob_df, x='Quality', y='Probability',
-                 title='Coverage Quality Probabilities',
-                 color='Probability',
-                 color_continuous_scale='RdYlGn')
+    with stage('classify_coverage', 'dataframe'):
+        classes = loaded['coverage_scorer'].classes_
+        prob_df = pd.DataFrame({
+            'Quality': classes,
+            'Probability': probs
+        })
+
+    with stage('classify_coverage', 'figure'):
+        _, px = plotly_modules.get()
+        fig = px.bar(prob_df, x='Quality', y='Probability',
+                     title='Coverage Quality Probabilities',
+                     color='Probability',
+                     color_continuous_scale='RdYlGn')
 
     return result, fig
 
 
-def analyze_network_sample():
-    """Load and analyze sample network data"""
-    if not MODELS_LOADED:
-        return "❌ Models not loaded.", None
+def load_scored_sample(data_path):
+    """Read the analysis sample and precompute anomaly and coverage columns"""
+    with stage('load_scored_sample', 'read_csv'):
+        df = pd.read_csv(data_path, nrows=ANALYSIS_SAMPLE_ROWS, parse_dates=['timestamp'])
 
-    # Load sample data
-    # Check if running in Docker or locally
-    if Path("/app/data/raw/synthetic_5g_timeseries.csv").exists():
-        data_path = Path("/app/data/raw/synthetic_5g_timeseries.csv")  # Docker path
-    else:
-        data_path = Path(__file__).parent.parent / "data" / "raw" / "synthetic_5g_timeseries.csv"  # Local path
-    df = pd.read_csv(data_path)
+    # Extract the feature matrix once and share it between both models
+    with stage('load_scored_sample', 'features'):
+        X = extract_features(df)
+    loaded = models.get()
 
     # Get anomalies
-    df = df.head(1000)  # Sample for demo
-    anomalies, scores = anomaly_detector.predict(df)
+    with stage('load_scored_sample', 'anomaly_model'):
+        anomalies, scores = loaded['anomaly_scorer'].predict(X)
     df['is_anomaly'] = anomalies
+    df['anomaly_score'] = scores
 
     # Coverage classification
-    coverage, _ = coverage_classifier.predict(df)
+    with stage('load_scored_sample', 'coverage_model'):
+        coverage, _ = loaded['coverage_scorer'].predict(X)
     df['coverage_quality'] = coverage
 
+    return df
+
+
+# Sample data for the Network Analysis tab
+# Check if running in Docker or locally
+if Path("/app/data/raw/synthetic_5g_timeseries.csv").exists():
+    DATA_PATH = Path("/app/data/raw/synthetic_5g_timeseries.csv")  # Docker path
+else:
+    DATA_PATH = Path(__file__).parent.parent / "data" / "raw" / "synthetic_5g_timeseries.csv"  # Local path
+ANALYSIS_SAMPLE_ROWS = 1000  # Sample for demo
+
+analysis_cache = DatasetCache(DATA_PATH, load_scored_sample)
+
+# Sorted, memory-mapped copy of the full dataset for time-range queries (rebuilt when the CSV changes)
+STORE_DIR = DATA_PATH.parent.parent / "processed" / "5g_timeseries_store"
+timeseries_store = DatasetCache(DATA_PATH, lambda path: open_store(path, STORE_DIR))
+
+# Quadkey-prefix index of the Ookla tiles, written by scripts/prepare_frontend_data.py (reopened when rebuilt)
+SPATIAL_INDEX_DIR = DATA_PATH.parent.parent / "processed" / "ookla_spatial_index"
+spatial_index = DatasetCache(SPATIAL_INDEX_DIR / "meta.json", lambda path: SpatialIndex(path.parent))
+
+
+@instrumented('analyze_network_sample')
+def analyze_network_sample():
+    """Load and analyze sample network data"""
+    if get_models() is None:
+        return "❌ Models not loaded.", None
+
+    # Parsed, pre-scored sample (in-memory; refreshed in the background on file change)
+    with stage('analyze_network_sample', 'dataset'):
+        df = analysis_cache.get()
+    anomalies = df['is_anomaly'].to_numpy()
+    coverage = df['coverage_quality'].to_numpy()
+
     # Create time-series plot
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    with stage('analyze_network_sample', 'figure'):
+        fig = _throughput_figure(df)
+
+    # Statistics
+    with stage('analyze_network_sample', 'stats'):
+        stats = _sample_stats(anomalies, coverage, len(df))
 
+    return stats, fig
+
+
+def _throughput_figure(df):
+    """Throughput over time with the detected anomalies marked"""
+    go, _ = plotly_modules.get()
     fig = go.Figure()
 
     # Throughput over time
@@ -199,9 +424,11 @@ def analyze_network_sample():
         yaxis_title='Throughput (Mbps)',
         hovermode='x unified'
     )
+    return fig
 
-    # Statistics
-    total_samples = len(df)
+
+def _sample_stats(anomalies, coverage, total_samples):
+    """Markdown summary of the anomaly rate and coverage distribution"""
     anomaly_count = anomalies.sum()
     anomaly_rate = anomaly_count / total_samples * 100
 
@@ -214,7 +441,7 @@ def analyze_network_sample():
     for quality, count in coverage_dist.items():
         stats += f"- {quality}: {count} ({count/total_samples*100:.1f}%)\n"
 
-    return stats, fig
+    return stats
 
 
 # Gradio Interface
@@ -332,5 +559,157 @@ with gr.Blocks(title="5G Network ML Analytics", theme=gr.themes.Soft()) as app:
     """)
 
 
+# Let concurrent requests reach the batchers instead of serializing them
+app.queue(default_concurrency_limit=CONCURRENCY_LIMIT)
+
+# Serve Gradio under FastAPI so orchestrators can probe liveness and readiness
+server = FastAPI()
+
+
+@server.get("/health")
+def health():
+    """Liveness: the process is up and serving HTTP"""
+    return {"status": "ok"}
+
+
+@server.get("/ready")
+def ready():
+    """Readiness: models are loaded, so requests will not wait on a cold start"""
+    status = {
+        resource.name: {
+            'ready': resource.ready,
+            'load_seconds': resource.load_seconds,
+            'error': str(resource.error) if resource.error else None,
+        }
+        for resource in (models, plotly_modules, drift_monitor)
+    }
+    return JSONResponse(status, status_code=200 if models.ready else 503)
+
+
+def _json_columns(df):
+    """DataFrame columns as JSON-safe lists (NaN -> null; strict JSON has no NaN)"""
+    return {col: df[col].astype(object).where(df[col].notna(), None).tolist() for col in df.columns}
+
+
+def _parse_time(value):
+    """Query parameter -> epoch seconds (numeric) or timestamp string"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+@server.get("/metrics")
+def metrics():
+    """Request counts, per-stage latency histograms and load timings in Prometheus text format"""
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@server.get("/drift")
+def drift():
+    """Latest drift report (PSI/KS per column against the training reference) and retraining status"""
+    if not drift_monitor.ready:
+        return JSONResponse({"error": "Drift monitor not loaded"}, status_code=503)
+    return {"report": drift_monitor.get().check(), "retraining": retrainer.status()}
+
+
+@server.get("/timeseries")
+@instrumented('timeseries')
+def query_timeseries(start: str = None, end: str = None, columns: str = None, bucket: float = None,
+                     format: str = "json"):
+    """
+    Rows (or per-bucket mean/min/max) of the KPI time series in [start, end)
+
+    start/end are ISO timestamps or epoch seconds, columns a comma-separated
+    projection and bucket a bucket width in seconds. format=tnmc returns the
+    binary columnar encoding read by frontend/src/utils/columnar.js.
+    """
+    try:
+        store = timeseries_store.get()
+    except FileNotFoundError:
+        return JSONResponse({"error": "Time-series data not available"}, status_code=503)
+
+    columns = columns.split(",") if columns else None
+    start, end = _parse_time(start), _parse_time(end)
+
+    try:
+        if bucket:
+            n_buckets = store.bucket_count(start, end, bucket_seconds=bucket)
+            if n_buckets > MAX_QUERY_ROWS:
+                return JSONResponse(
+                    {"error": f"Up to {n_buckets} buckets in window (limit {MAX_QUERY_ROWS}); widen bucket"},
+                    status_code=413,
+                )
+            df = store.aggregate(start, end, bucket_seconds=bucket, columns=columns)
+        else:
+            rows = store.window(start, end)
+            if rows.stop - rows.start > MAX_QUERY_ROWS:
+                return JSONResponse(
+                    {"error": f"{rows.stop - rows.start} rows in window (limit {MAX_QUERY_ROWS}); pass bucket"},
+                    status_code=413,
+                )
+            df = store.query(start, end, columns=columns)
+    except (KeyError, ValueError) as e:
+        return JSONResponse({"error": str(e).strip("'\"")}, status_code=400)
+
+    # Timestamps as epoch seconds ('t'), as in the dashboard data files
+    t = df.pop(store.time_column).to_numpy().astype('datetime64[us]').astype(np.int64) / 1e6
+    df.insert(0, 't', t)
+
+    if format == "tnmc":
+        data = gzip.compress(encode_columnar({'rows': df}), compresslevel=1)
+        return Response(data, media_type="application/octet-stream")
+    return {"n_rows": len(df), "columns": _json_columns(df)}
+
+
+@server.get("/tiles")
+@instrumented('tiles')
+def query_tiles(bbox: str = None, zoom: int = None, max_tiles: int = 2000, format: str = "json"):
+    """
+    Ookla tiles aggregated to a zoom level (test-weighted speeds and latency) inside a bounding box
+
+    bbox is west,south,east,north in degrees (default: everywhere). Without
+    zoom, the finest zoom with at most max_tiles tiles in the box is used.
+    """
+    try:
+        index = spatial_index.get()
+    except FileNotFoundError:
+        return JSONResponse({"error": "Spatial index not available"}, status_code=503)
+
+    try:
+        box = [float(v) for v in bbox.split(",")] if bbox else None
+        if box is not None and len(box) != 4:
+            raise ValueError("bbox must be west,south,east,north")
+        if zoom is None:
+            zoom = index.best_zoom(box, max_tiles=min(max_tiles, MAX_QUERY_TILES))
+        positions = index.select(box, zoom)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if len(positions) > MAX_QUERY_TILES:
+        return JSONResponse(
+            {"error": f"{len(positions)} tiles at zoom {zoom} (limit {MAX_QUERY_TILES}); zoom out or shrink bbox"},
+            status_code=413,
+        )
+    df = index.rows(positions, zoom)
+
+    if format == "tnmc":
+        data = gzip.compress(encode_columnar({'tiles': df}, meta={'zoom': zoom}), compresslevel=1)
+        return Response(data, media_type="application/octet-stream")
+    return {"zoom": zoom, "n_tiles": len(df), "columns": _json_columns(df)}
+
+
+server = gr.mount_gradio_app(server, app, path="/")
+
+if WARMUP:
+    warm_up(models.get, plotly_modules.get, analysis_cache.get, timeseries_store.get, drift_monitor.get)
+
+threading.Thread(target=watch_drift, name='drift-watch', daemon=True).start()
+
+
 if __name__ == "__main__":
-    app.launch(server_name="0.0.0.0", server_port=7860)
+    import uvicorn
+
+    uvicorn.run(server, host="0.0.0.0", port=SERVER_PORT)
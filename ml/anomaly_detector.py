@@ -9,50 +9,69 @@ from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import joblib
 from pathlib import Path
+import sys
+
+if __name__ == "__main__":
+    # Run as a script: make the ml package importable
+    sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.batches import iter_batches, ReservoirSampler
+from ml.compact_forest import CompactIsolationForest
+from ml.features import FEATURE_COLUMNS, extract_features, standardize
 
 class NetworkAnomalyDetector:
-    def __init__(self, contamination=0.05):
+    def __init__(self, contamination=0.05, n_jobs=None):
         """
         Initialize anomaly detector
 
         Args:
             contamination: Expected proportion of outliers (default 5%)
+            n_jobs: Parallel jobs for fitting/scoring (None = 1, -1 = all cores)
         """
         self.model = IsolationForest(
             contamination=contamination,
             random_state=42,
-            n_estimators=100
+            n_estimators=100,
+            n_jobs=n_jobs
         )
         self.scaler = StandardScaler()
         self.feature_names = None
 
     def prepare_features(self, df):
-        """Extract features for anomaly detection"""
-        features = df[[
-            'rsrp_dbm',
-            'rsrq_db',
-            'sinr_db',
-            'cqi',
-            'throughput_mbps',
-            'latency_ms',
-            'packet_loss_pct'
-        ]].copy()
-
-        return features
+        """
+        Extract features for anomaly detection
 
-    def train(self, df):
-        """Train anomaly detection model"""
-        print("🔧 Training Anomaly Detection Model...")
+        Accepts a DataFrame or a feature matrix already built by
+        extract_features (reused without copying).
+        """
+        return extract_features(df)
+
+    def fit(self, features):
+        """
+        Fit the scaler and forest without the training report
+
+        Args:
+            features: DataFrame or feature matrix from extract_features
 
-        # Prepare features
-        features = self.prepare_features(df)
-        self.feature_names = features.columns.tolist()
+        Returns:
+            The scaled training matrix
+        """
+        features = self.prepare_features(features)
+        self.feature_names = list(FEATURE_COLUMNS)
 
         # Scale features
-        X = self.scaler.fit_transform(features)
+        self.scaler.fit(features)
+        X = standardize(features, self.scaler)
 
         # Train model
         self.model.fit(X)
+        return X
+
+    def train(self, df):
+        """Train anomaly detection model"""
+        print("🔧 Training Anomaly Detection Model...")
+
+        X = self.fit(df)
 
         # Get predictions on training data
         predictions = self.model.predict(X)
@@ -76,10 +95,68 @@ class NetworkAnomalyDetector:
 
         return predictions, anomaly_scores
 
+    def train_streaming(self, source, sample_size=200_000, batch_size=100_000, seed=42):
+        """
+        Train on a dataset larger than memory in a single streaming pass
+
+        The scaler is fitted incrementally with partial_fit while a reservoir
+        keeps a uniform sample of raw feature rows. The Isolation Forest is
+        then fitted on the scaled reservoir (each tree draws its own
+        max_samples subset from it), so peak memory is set by sample_size
+        rather than by the dataset size.
+
+        Args:
+            source: CSV/Parquet path, DataFrame, or iterable of record batches
+            sample_size: Rows kept in the reservoir for fitting the forest
+            batch_size: Rows per batch for file and DataFrame sources
+            seed: Random seed for the reservoir
+
+        Returns:
+            Dict with the number of rows seen and the anomaly rate on the sample
+        """
+        print("🔧 Training Anomaly Detection Model (streaming)...")
+
+        reservoir = None
+        n_labeled_anomalies = 0
+
+        for batch in iter_batches(source, batch_size=batch_size):
+            features = self.prepare_features(batch)
+            if reservoir is None:
+                self.feature_names = list(FEATURE_COLUMNS)
+                reservoir = ReservoirSampler(sample_size, features.shape[1], seed=seed, dtype=features.dtype)
+
+            self.scaler.partial_fit(features)
+            reservoir.add(features)
+
+            if 'is_anomaly' in batch.columns:
+                n_labeled_anomalies += int(batch['is_anomaly'].sum())
+
+        if reservoir is None:
+            raise ValueError("No rows to train on")
+
+        # Fit the forest on the scaled sample
+        sample = reservoir.get()
+        X = standardize(sample, self.scaler)
+        self.model.fit(X)
+
+        predictions = (self.model.predict(X) == -1).astype(int)
+        anomaly_rate = float(predictions.mean() * 100)
+
+        print(f"✅ Model trained successfully!")
+        print(f"   Total samples: {reservoir.n_seen} (fitted on {len(sample)})")
+        print(f"   Detected anomalies in sample: {predictions.sum()} ({anomaly_rate:.1f}%)")
+        if n_labeled_anomalies:
+            print(f"   Actual anomalies: {n_labeled_anomalies} ({n_labeled_anomalies/reservoir.n_seen*100:.1f}%)")
+
+        return {
+            'n_samples': reservoir.n_seen,
+            'n_fitted': len(sample),
+            'anomaly_rate': anomaly_rate
+        }
+
     def predict(self, df):
         """Detect anomalies in new data"""
-        features = self.prepare_features(df)
-        X = self.scaler.transform(features)
+        X = standardize(self.prepare_features(df), self.scaler)
 
         # Get predictions and scores
         predictions = self.model.predict(X)
@@ -90,6 +167,32 @@ class NetworkAnomalyDetector:
 
         return anomalies, anomaly_scores
 
+    def score_stream(self, source, batch_size=100_000):
+        """
+        Score a dataset batch by batch with constant memory
+
+        Args:
+            source: CSV/Parquet path, DataFrame, or iterable of record batches
+            batch_size: Rows per batch for file and DataFrame sources
+
+        Yields:
+            Each input batch with 'predicted_anomaly' and 'anomaly_score' columns added
+        """
+        for batch in iter_batches(source, batch_size=batch_size):
+            anomalies, anomaly_scores = self.predict(batch)
+
+            batch = batch.assign(predicted_anomaly=anomalies, anomaly_score=anomaly_scores)
+            yield batch
+
+    def compile(self):
+        """
+        Export to an array-backed ensemble for low-latency scoring
+
+        The scaler is folded into the split thresholds, so the result takes
+        raw feature rows and returns exactly what predict() returns.
+        """
+        return CompactIsolationForest.from_sklearn(self.model, self.scaler, feature_names=self.feature_names)
+
     def save(self, model_dir):
         """Save model and scaler"""
         model_dir = Path(model_dir)
@@ -124,20 +227,20 @@ if __name__ == "__main__":
     detector = NetworkAnomalyDetector(contamination=0.05)
     predictions, scores = detector.train(df)
 
-    # Add predictions to dataframe
-    df['predicted_anomaly'] = predictions
-    df['anomaly_score'] = scores
-
     # Save model
     model_dir = Path(__file__).parent / "models"
     detector.save(model_dir)
 
-    # Save results
+    # Save results (scored and written batch by batch)
     output_path = Path(__file__).parent.parent / "data" / "processed" / "5g_with_anomalies.csv"
-    df.to_csv(output_path, index=False)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    sample_anomalies = []
+    for i, batch in enumerate(detector.score_stream(data_path)):
+        batch.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        sample_anomalies.append(batch[batch['predicted_anomaly'] == 1].head(10))
     print(f"📊 Results saved to {output_path}")
 
     # Show some anomalies
-    anomalies = df[df['predicted_anomaly'] == 1].head(10)
+    anomalies = pd.concat(sample_anomalies).head(10)
     print("\n🚨 Sample Detected Anomalies:")
     print(anomalies[['timestamp', 'throughput_mbps', 'latency_ms', 'rsrp_dbm', 'scenario']])
@@ -0,0 +1,82 @@
+"""
+Record batch iteration for out-of-core processing
+Streams CSV, Parquet, DataFrames or generators as bounded-size DataFrame batches
+and keeps fixed-size reservoir samples of the rows seen
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+
+def iter_batches(source, batch_size=100_000, columns=None):
+    """
+    Yield DataFrame batches from a dataset without loading it whole
+
+    Args:
+        source: CSV/Parquet file path, Parquet dataset directory, DataFrame,
+            or an iterable of DataFrames / pyarrow RecordBatches
+        batch_size: Maximum rows per batch for file and DataFrame sources
+        columns: Optional list of columns to read (projection)
+    """
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+
+        if path.is_dir() or path.suffix == '.parquet':
+            yield from _iter_parquet(path, batch_size, columns)
+        else:
+            yield from pd.read_csv(path, chunksize=batch_size, usecols=columns)
+
+    elif isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), batch_size):
+            batch = source.iloc[start:start + batch_size]
+            yield batch[columns] if columns else batch
+
+    else:
+        for batch in source:
+            if not isinstance(batch, pd.DataFrame):
+                batch = batch.to_pandas()  # pyarrow RecordBatch / Table
+            yield batch[columns] if columns else batch
+
+
+def _iter_parquet(path, batch_size, columns):
+    """Stream a Parquet file or hive-partitioned directory batch by batch"""
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    for record_batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if record_batch.num_rows:
+            yield record_batch.to_pandas()
+
+
+class ReservoirSampler:
+    """Uniform fixed-size sample of rows from a stream (Algorithm R, vectorized per batch)"""
+
+    def __init__(self, size, n_features, seed=42, dtype=np.float64):
+        self.size = size
+        self.sample = np.empty((size, n_features), dtype=dtype)
+        self.n_seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, rows):
+        """Offer a 2D array of rows to the reservoir"""
+        rows = np.asarray(rows, dtype=self.sample.dtype)
+
+        # Fill the reservoir until it is full
+        n_fill = min(max(self.size - self.n_seen, 0), len(rows))
+        if n_fill:
+            self.sample[self.n_seen:self.n_seen + n_fill] = rows[:n_fill]
+
+        # Row with stream index t replaces a random slot with probability size / (t + 1)
+        rest = rows[n_fill:]
+        if len(rest):
+            stream_index = self.n_seen + n_fill + np.arange(len(rest))
+            slots = self.rng.integers(0, stream_index + 1)
+            keep = slots < self.size
+            self.sample[slots[keep]] = rest[keep]
+
+        self.n_seen += len(rows)
+
+    def get(self):
+        """Return the current sample (fewer rows than size if the stream was short)"""
+        return self.sample[:min(self.size, self.n_seen)]
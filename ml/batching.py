@@ -0,0 +1,122 @@
+"""
+Micro-batching request coalescer
+Gathers single-row requests arriving within a short window into one batched model call
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Default seconds predict() waits for its result (a batch normally takes milliseconds)
+DEFAULT_TIMEOUT_S = 30.0
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-row predictions into batched calls
+
+    A background thread collects rows until max_batch_size rows are queued
+    or max_wait_ms has passed since the first one, runs predict_fn once on
+    the stacked rows and hands each caller its own slice of the result.
+    Under load the number of model calls scales with batches, not requests.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=3.0, name='batcher'):
+        """
+        Args:
+            predict_fn: Callable taking a 2D array of rows and returning an
+                array or a tuple of arrays with one entry per row
+            max_batch_size: Maximum rows per model call
+            max_wait_ms: Maximum time the first row of a batch waits for company
+            name: Thread name (useful in stack dumps)
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.n_requests = 0
+        self.n_batches = 0
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Queue one feature row; returns a Future resolving to that row's result"""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64), future))
+        return future
+
+    def predict(self, row, timeout=DEFAULT_TIMEOUT_S):
+        """Blocking single-row prediction through the batcher (raises TimeoutError after timeout seconds)"""
+        return self.submit(row).result(timeout=timeout)
+
+    def replace_predict_fn(self, predict_fn):
+        """Use predict_fn from the next batch on (a batch already running finishes on the old one)"""
+        self.predict_fn = predict_fn
+
+    def close(self):
+        """Stop the worker thread after the queued requests are served"""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    @property
+    def mean_batch_size(self):
+        return self.n_requests / self.n_batches if self.n_batches else 0.0
+
+    def _collect(self):
+        """Block for the first request, then gather more until full or the window closes"""
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Serve this batch, then stop
+                break
+            batch.append(item)
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            rows, futures = zip(*batch)
+            try:
+                outputs = self.predict_fn(np.vstack(rows))
+
+                # Split before resolving anything, so a malformed result fails the whole batch
+                if isinstance(outputs, tuple):
+                    results = [tuple(output[i] for output in outputs) for i in range(len(futures))]
+                else:
+                    results = [outputs[i] for i in range(len(futures))]
+            except Exception as e:
+                # Fail this batch only; the thread keeps serving later requests
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            self.n_requests += len(futures)
+            self.n_batches += 1
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
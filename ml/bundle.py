@@ -0,0 +1,245 @@
+"""
+Versioned single-file model bundle
+Stores the compiled serving models with a manifest, feature schema and
+checksums; arrays are memory-mapped on load so processes share one copy
+"""
+
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+
+import numpy as np
+
+if __name__ == "__main__":
+    # Run as a script: make the ml package importable
+    sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.compact_forest import CompactIsolationForest, CompactRandomForest
+from ml.features import FEATURE_COLUMNS
+
+# File layout: MAGIC | manifest length (u64) | manifest sha256 | manifest JSON | 64-byte aligned arrays
+MAGIC = b"TNMBNDL\x00"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sQ32s")
+ALIGNMENT = 64
+
+BUNDLE_NAME = "models.bundle"
+# Pickles build_bundle compiles from; their digests are recorded so a retrained model outdates the bundle
+SOURCE_FILES = (
+    "anomaly_detector.pkl", "anomaly_scaler.pkl", "anomaly_features.pkl",
+    "coverage_classifier.pkl", "coverage_scaler.pkl", "coverage_features.pkl",
+)
+MODEL_TYPES = {cls.__name__: cls for cls in (CompactIsolationForest, CompactRandomForest)}
+
+
+class BundleError(Exception):
+    """Raised when a bundle is malformed, corrupted or incompatible"""
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _file_digests(model_dir, names=SOURCE_FILES):
+    """sha256 of each existing file in model_dir"""
+    model_dir = Path(model_dir)
+    return {
+        name: hashlib.sha256((model_dir / name).read_bytes()).hexdigest()
+        for name in names if (model_dir / name).exists()
+    }
+
+
+def write_bundle(path, models, version=None, feature_names=FEATURE_COLUMNS, sources=None, verbose=True):
+    """
+    Write compiled models to one bundle file (atomically)
+
+    Args:
+        path: Output file
+        models: Dict of model name -> compiled model (CompactIsolationForest / CompactRandomForest)
+        version: Bundle version string (defaults to a UTC timestamp)
+        feature_names: Feature schema the models expect, in column order
+        sources: Dict of source file name -> sha256 the models were compiled from
+        verbose: Print the saved path
+    """
+    path = Path(path)
+    arrays, entries = [], {}
+
+    for name, model in models.items():
+        model_arrays, params = model.get_state()
+        entries[name] = {'type': type(model).__name__, 'params': params, 'arrays': {}}
+        for key, array in model_arrays.items():
+            array_id = f"{name}/{key}"
+            entries[name]['arrays'][key] = array_id
+            arrays.append((array_id, np.ascontiguousarray(array)))
+
+    # Lay out arrays after the manifest; offsets depend on the manifest size, so iterate to a fixed point
+    array_table = {
+        array_id: {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'nbytes': array.nbytes,
+            'sha256': hashlib.sha256(array.tobytes()).hexdigest(),
+        }
+        for array_id, array in arrays
+    }
+    manifest = {
+        'format': 'telecom-network-monitor/model-bundle',
+        'format_version': FORMAT_VERSION,
+        'version': version or datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S'),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'feature_schema': [{'name': name, 'dtype': 'float64'} for name in feature_names],
+        'models': entries,
+        'sources': sources or {},
+        'arrays': array_table,
+    }
+
+    data_start = 0
+    while True:
+        offset = data_start
+        for array_id, array in arrays:
+            offset = _align(offset)
+            array_table[array_id]['offset'] = offset
+            offset += array.nbytes
+        manifest_bytes = json.dumps(manifest, sort_keys=True).encode('utf-8')
+        needed = _align(HEADER.size + len(manifest_bytes))
+        if needed == data_start:
+            break
+        data_start = needed
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(manifest_bytes), hashlib.sha256(manifest_bytes).digest()))
+        f.write(manifest_bytes)
+        for array_id, array in arrays:
+            f.seek(array_table[array_id]['offset'])
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    if verbose:
+        print(f"💾 Bundle {manifest['version']} saved to {path}")
+    return path
+
+
+class ModelBundle:
+    """Read-only view of a bundle file; model arrays are memory-mapped, not read"""
+
+    def __init__(self, path, verify=False):
+        """
+        Args:
+            path: Bundle file
+            verify: Also check every array's sha256 (reads all pages)
+        """
+        self.path = Path(path)
+        self._buffer = np.memmap(self.path, dtype=np.uint8, mode='r')
+
+        if len(self._buffer) < HEADER.size:
+            raise BundleError(f"{self.path} is too small to be a model bundle")
+        magic, manifest_len, manifest_sha = HEADER.unpack(bytes(self._buffer[:HEADER.size]))
+        if magic != MAGIC:
+            raise BundleError(f"{self.path} is not a model bundle")
+
+        manifest_bytes = bytes(self._buffer[HEADER.size:HEADER.size + manifest_len])
+        if hashlib.sha256(manifest_bytes).digest() != manifest_sha:
+            raise BundleError(f"{self.path}: manifest checksum mismatch")
+
+        self.manifest = json.loads(manifest_bytes)
+        if self.manifest['format_version'] > FORMAT_VERSION:
+            raise BundleError(f"{self.path}: unsupported bundle format {self.manifest['format_version']}")
+
+        self._models = {}
+        if verify:
+            self.verify()
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def feature_names(self):
+        return [feature['name'] for feature in self.manifest['feature_schema']]
+
+    def array(self, array_id):
+        """Memory-mapped, read-only view of one stored array"""
+        spec = self.manifest['arrays'][array_id]
+        return np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']),
+                          buffer=self._buffer, offset=spec['offset'])
+
+    def verify(self):
+        """Check every array against its stored sha256"""
+        for array_id, spec in self.manifest['arrays'].items():
+            if hashlib.sha256(self.array(array_id).tobytes()).hexdigest() != spec['sha256']:
+                raise BundleError(f"{self.path}: checksum mismatch for {array_id}")
+
+    def model(self, name):
+        """Return a compiled model backed by the mapped arrays (built once per bundle)"""
+        if name not in self._models:
+            entry = self.manifest['models'][name]
+            arrays = {key: self.array(array_id) for key, array_id in entry['arrays'].items()}
+            self._models[name] = MODEL_TYPES[entry['type']].from_state(arrays, entry['params'])
+        return self._models[name]
+
+    def check_schema(self, feature_names=FEATURE_COLUMNS):
+        """Raise if the bundle expects different features than the serving code provides"""
+        if self.feature_names != list(feature_names):
+            raise BundleError(f"{self.path}: feature schema {self.feature_names} != {list(feature_names)}")
+
+    def stale_sources(self, model_dir):
+        """Source files in model_dir that changed since the bundle was built (e.g. a model was retrained)"""
+        sources = self.manifest.get('sources', {})
+        current = _file_digests(model_dir, sources)
+        return sorted(name for name, digest in current.items() if digest != sources[name])
+
+
+def build_bundle(model_dir, path=None, version=None):
+    """Compile the saved anomaly detector and coverage classifier into one bundle"""
+    from ml.anomaly_detector import NetworkAnomalyDetector
+    from ml.coverage_classifier import CoverageClassifier
+
+    model_dir = Path(model_dir)
+    models = {
+        'anomaly_detector': NetworkAnomalyDetector.load(model_dir).compile(),
+        'coverage_classifier': CoverageClassifier.load(model_dir).compile(),
+    }
+    return write_bundle(path or model_dir / BUNDLE_NAME, models, version=version, sources=_file_digests(model_dir))
+
+
+def load_serving_models(model_dir):
+    """
+    Return (anomaly detector, coverage classifier) ready for scoring
+
+    Uses the memory-mapped bundle in model_dir when present and built from
+    the current pickles; otherwise loads the loose pickles (imports sklearn)
+    and compiles them. Both paths give the same compiled models and
+    identical outputs.
+    """
+    model_dir = Path(model_dir)
+
+    if (model_dir / BUNDLE_NAME).exists():
+        # Memory-mapped bundle: pages are shared by every server process on the host
+        bundle = ModelBundle(model_dir / BUNDLE_NAME)
+        bundle.check_schema()
+        stale = bundle.stale_sources(model_dir)
+        if not stale:
+            print(f"✅ Loaded model bundle {bundle.version}")
+            return bundle.model('anomaly_detector'), bundle.model('coverage_classifier')
+        print(f"⚠️  Model bundle {bundle.version} is older than {', '.join(stale)}; "
+              f"loading the pickles (run python ml/bundle.py to rebuild it)")
+
+    from ml.anomaly_detector import NetworkAnomalyDetector
+    from ml.coverage_classifier import CoverageClassifier
+
+    return NetworkAnomalyDetector.load(model_dir).compile(), CoverageClassifier.load(model_dir).compile()
+
+
+if __name__ == "__main__":
+    model_dir = Path(__file__).parent / "models"
+    bundle_path = build_bundle(model_dir)
+
+    bundle = ModelBundle(bundle_path, verify=True)
+    print(f"✅ Bundle {bundle.version} verified: {', '.join(bundle.manifest['models'])}")
@@ -0,0 +1,156 @@
+"""
+Compact binary columnar format for dashboard data files
+Stores tables as typed little-endian column buffers (strings dictionary-encoded)
+behind a small JSON header, gzip-compressed; decoded in the browser straight
+into typed arrays by frontend/src/utils/columnar.js
+"""
+
+import gzip
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Layout (before gzip): MAGIC | u32 format version | u32 header length | header JSON | 8-byte aligned columns
+MAGIC = b"TNMC"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<4sII")
+ALIGNMENT = 8
+
+# Integer dtypes tried in order; columns outside int32 range fall back to float64
+INT_DTYPES = [np.dtype(t) for t in ('u1', 'i1', 'u2', 'i2', 'u4', 'i4')]
+
+
+def _smallest_int_dtype(values):
+    if len(values) == 0:
+        return np.dtype('u1')
+    low, high = values.min(), values.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.dtype('<f8')
+
+
+def _encode_column(series, float64_columns):
+    """Return (array, spec) for one column"""
+    spec = {}
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        array = series.to_numpy().astype('datetime64[ms]').astype(np.int64) / 1000.0  # Epoch seconds
+        spec['kind'] = 'datetime'
+    elif pd.api.types.is_bool_dtype(series):
+        array = series.to_numpy().astype(np.uint8)
+        spec['kind'] = 'bool'
+    elif pd.api.types.is_integer_dtype(series):
+        values = series.to_numpy()
+        array = values.astype(_smallest_int_dtype(values))
+    elif pd.api.types.is_float_dtype(series):
+        array = series.to_numpy().astype(np.float64 if series.name in float64_columns else np.float32)
+    else:
+        # Dictionary-encode strings / categories; missing values get their own (null) entry
+        codes, uniques = pd.factorize(series, sort=True)
+        dictionary = uniques.tolist()
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(dictionary), codes)
+            dictionary.append(None)
+        array = codes.astype(_smallest_int_dtype(np.array([0, len(dictionary) - 1])))
+        spec['dictionary'] = dictionary
+
+    array = np.ascontiguousarray(array)
+    spec['dtype'] = array.dtype.newbyteorder('<').str if array.dtype.byteorder != '|' else array.dtype.str
+    return array.astype(spec['dtype'], copy=False), spec
+
+
+def encode_columnar(tables, meta=None, float64_columns=('t',)):
+    """
+    Serialize tables to the (uncompressed) columnar layout
+
+    Args:
+        tables: Dict of table name -> DataFrame
+        meta: JSON-serializable extras stored in the header (e.g. summary stats)
+        float64_columns: Float columns kept at float64 (others are stored as float32)
+    """
+    header = {'tables': {}, 'meta': meta or {}}
+    buffers = []
+
+    for name, df in tables.items():
+        columns = {}
+        for col in df.columns:
+            array, spec = _encode_column(df[col], float64_columns)
+            spec['count'] = len(array)
+            columns[str(col)] = spec
+            buffers.append((spec, array))
+        header['tables'][name] = {'n_rows': len(df), 'columns': columns}
+
+    # Offsets depend on the header length, which depends on the offsets: iterate to a fixed point
+    data_start = 0
+    while True:
+        offset = data_start
+        for spec, array in buffers:
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            spec['offset'] = offset
+            offset += array.nbytes
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        needed = -(-(PREAMBLE.size + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+        if needed == data_start:
+            break
+        data_start = needed
+
+    out = bytearray(offset)
+    out[:PREAMBLE.size] = PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes))
+    out[PREAMBLE.size:PREAMBLE.size + len(header_bytes)] = header_bytes
+    for spec, array in buffers:
+        out[spec['offset']:spec['offset'] + array.nbytes] = array.tobytes()
+
+    return bytes(out)
+
+
+def write_columnar(path, tables, meta=None, float64_columns=('t',), compresslevel=6):
+    """Write tables (and meta) to a gzip-compressed columnar file, atomically"""
+    path = Path(path)
+    data = gzip.compress(encode_columnar(tables, meta, float64_columns), compresslevel=compresslevel, mtime=0)
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def decode_columnar(data):
+    """Parse the columnar layout (gzip-compressed or not) into (tables, meta)"""
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+
+    magic, version, header_length = PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a columnar data file")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version {version}")
+    header = json.loads(data[PREAMBLE.size:PREAMBLE.size + header_length])
+
+    tables = {}
+    for name, table in header['tables'].items():
+        columns = {}
+        for col, spec in table['columns'].items():
+            array = np.frombuffer(data, dtype=spec['dtype'], count=spec['count'], offset=spec['offset'])
+            if 'dictionary' in spec:
+                array = np.asarray(spec['dictionary'], dtype=object)[array]
+            elif spec.get('kind') == 'datetime':
+                array = pd.to_datetime(array * 1000.0, unit='ms')
+            elif spec.get('kind') == 'bool':
+                array = array.astype(bool)
+            columns[col] = array
+        tables[name] = pd.DataFrame(columns, index=pd.RangeIndex(table['n_rows']))
+
+    return tables, header['meta']
+
+
+def read_columnar(path):
+    """Read a columnar file into (dict of DataFrames, meta)"""
+    with open(path, 'rb') as f:
+        return decode_columnar(f.read())
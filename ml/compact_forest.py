@@ -0,0 +1,292 @@
+"""
+Compact array-backed tree ensembles for low-latency inference
+Flattens fitted RandomForestClassifier / IsolationForest models into contiguous
+NumPy node arrays with the StandardScaler folded into the split thresholds
+"""
+
+import numpy as np
+
+from ml.features import extract_features
+
+# Rows traversed at once; bounds the (rows x trees) node-index matrix
+CHUNK_ROWS = 8192
+
+# Up to this many rows, per-tree outputs are summed in one vectorized call
+SMALL_BATCH_ROWS = 256
+
+
+def _float_to_key(values):
+    """Map float64 values to uint64 keys with the same total order"""
+    bits = np.ascontiguousarray(values, dtype=np.float64).view(np.uint64)
+    sign = np.uint64(1 << 63)
+    return np.where(bits & sign, ~bits, bits | sign)
+
+
+def _key_to_float(keys):
+    """Inverse of _float_to_key"""
+    sign = np.uint64(1 << 63)
+    bits = np.where(keys & sign, keys & ~sign, ~keys)
+    return bits.view(np.float64)
+
+
+def fold_scaler_thresholds(threshold, feature, mean, scale):
+    """
+    Fold a StandardScaler into split thresholds, bit-exactly
+
+    sklearn routes a raw value v left when
+        float64(float32((v - mean) / scale)) <= threshold
+    (scaled features are cast to float32 before reaching the trees). That
+    predicate is monotone in v, so it is equivalent to v <= v_max for the
+    largest float64 v_max satisfying it, which is found by bisection over
+    the ordered float64 bit patterns.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    mean = np.asarray(mean, dtype=np.float64)[feature]
+    scale = np.asarray(scale, dtype=np.float64)[feature]
+
+    def goes_left(v):
+        with np.errstate(over='ignore', invalid='ignore'):
+            return ((v - mean) / scale).astype(np.float32).astype(np.float64) <= threshold
+
+    finfo = np.finfo(np.float64)
+    lo = _float_to_key(np.full(threshold.shape, finfo.min))
+    hi = _float_to_key(np.full(threshold.shape, finfo.max))
+
+    all_left = goes_left(np.full(threshold.shape, finfo.max))
+    none_left = ~goes_left(np.full(threshold.shape, finfo.min))
+
+    # Invariant: goes_left(lo) is True and goes_left(hi) is False
+    for _ in range(64):
+        mid = lo + (hi - lo) // np.uint64(2)
+        left = goes_left(_key_to_float(mid))
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+
+    folded = _key_to_float(lo)
+    folded[all_left] = np.inf
+    folded[none_left] = -np.inf
+    return folded
+
+
+class CompactForest:
+    """
+    Tree ensemble stored as flat node arrays
+
+    All trees share one set of arrays; roots holds each tree's root index.
+    Leaves point to themselves, so a fixed number of traversal steps
+    (max_depth) lands every row on its leaf without branching.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth, feature_names=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.children = np.ascontiguousarray(children, dtype=np.intp)  # (n_nodes, 2): left, right
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+
+    def get_state(self):
+        """Return (arrays, params) describing the ensemble, e.g. for a model bundle"""
+        arrays = {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'children': self.children,
+            'value': self.value,
+            'roots': self.roots,
+        }
+        params = {'max_depth': self.max_depth, 'feature_names': self.feature_names}
+        return arrays, params
+
+    @classmethod
+    def from_state(cls, arrays, params):
+        """Rebuild from get_state() output; arrays are used without copying when possible"""
+        return cls(**arrays, **params)
+
+    @staticmethod
+    def _flatten_trees(trees, mean, scale, tree_features=None):
+        """Concatenate sklearn tree_ structures into global node arrays"""
+        features, thresholds, children, roots, depths, trees_out = [], [], [], [], [], []
+        offset = 0
+
+        for i, tree in enumerate(trees):
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            local = np.arange(n_nodes)
+
+            feature = np.where(is_leaf, 0, tree.feature)
+            if tree_features is not None:
+                feature = np.asarray(tree_features[i])[feature]
+
+            left = np.where(is_leaf, local, tree.children_left) + offset
+            right = np.where(is_leaf, local, tree.children_right) + offset
+
+            features.append(feature)
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            children.append(np.column_stack([left, right]))
+            roots.append(offset)
+            depths.append(tree.max_depth)
+            trees_out.append((offset, n_nodes, is_leaf))
+            offset += n_nodes
+
+        feature = np.concatenate(features)
+        threshold = np.concatenate(thresholds)
+
+        # Fold the scaler into internal-node thresholds
+        internal = np.isfinite(threshold)
+        threshold[internal] = fold_scaler_thresholds(threshold[internal], feature[internal], mean, scale)
+
+        return feature, threshold, np.concatenate(children), np.asarray(roots), max(depths), trees_out
+
+    def _as_array(self, X):
+        """
+        Build the float64 feature matrix through the shared feature stage
+
+        Using extract_features (as the sklearn wrappers do) keeps outputs
+        identical for DataFrames and arrays alike; raw float64 values
+        compare exactly against the folded thresholds.
+        """
+        return extract_features(X)
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (n_rows, n_trees)"""
+        X = self._as_array(X)
+        leaves = np.empty((len(X), len(self.roots)), dtype=np.intp)
+
+        n_features = X.shape[1]
+        children = self.children.ravel()  # left at 2 * node, right at 2 * node + 1
+
+        for start in range(0, len(X), CHUNK_ROWS):
+            X_chunk = np.ascontiguousarray(X[start:start + CHUNK_ROWS]).ravel()
+            row_offsets = (np.arange(len(X_chunk) // n_features) * n_features)[:, np.newaxis]
+            node = np.repeat(self.roots[np.newaxis], len(row_offsets), axis=0)
+
+            for _ in range(self.max_depth):
+                go_right = X_chunk.take(row_offsets + self.feature.take(node)) > self.threshold.take(node)
+                node = children.take(2 * node + go_right)
+
+            leaves[start:start + len(node)] = node
+
+        return leaves
+
+    def _sum_leaf_values(self, leaves):
+        """
+        Sum leaf values over trees in tree order, shape (n_rows, n_outputs)
+
+        sklearn accumulates tree outputs one tree at a time, so the sum is
+        kept strictly sequential (a plain sum may use pairwise summation) to
+        match bit for bit: add.accumulate for a few rows, a loop over trees
+        for large batches.
+        """
+        if len(leaves) <= SMALL_BATCH_ROWS:
+            return np.add.accumulate(self.value[leaves.T], axis=0)[-1]
+
+        leaves = np.ascontiguousarray(leaves.T)
+        total = np.zeros((leaves.shape[1], self.value.shape[1]), dtype=np.float64)
+        for tree_leaves in leaves:
+            total += self.value[tree_leaves]
+
+        return total
+
+
+class CompactRandomForest(CompactForest):
+    """Array-backed RandomForestClassifier with predict_proba identical to sklearn"""
+
+    def __init__(self, *args, classes=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.classes_ = np.asarray(classes)
+
+    def get_state(self):
+        arrays, params = super().get_state()
+        params['classes'] = self.classes_.tolist()
+        return arrays, params
+
+    @classmethod
+    def from_sklearn(cls, model, scaler, feature_names=None):
+        """Build from a fitted RandomForestClassifier and the StandardScaler feeding it"""
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        feature, threshold, children, roots, max_depth, layout = cls._flatten_trees(
+            trees, scaler.mean_, scaler.scale_
+        )
+
+        # Per-leaf class probabilities (tree_.value holds class fractions since sklearn 1.4)
+        values = [tree.value[:, 0, :model.n_classes_] for tree in trees]
+
+        return cls(feature, threshold, children, np.concatenate(values), roots, max_depth,
+                   feature_names=feature_names, classes=model.classes_)
+
+    def predict_proba(self, X):
+        """Class probabilities averaged over trees (same summation order as sklearn)"""
+        leaves = self.apply(X)
+
+        proba = self._sum_leaf_values(leaves)
+        proba /= leaves.shape[1]
+
+        return proba
+
+    def predict(self, X):
+        """Predict coverage quality; returns (predictions, probabilities) like CoverageClassifier"""
+        probabilities = self.predict_proba(X)
+        predictions = self.classes_.take(np.argmax(probabilities, axis=1), axis=0)
+
+        return predictions, probabilities
+
+
+
+class CompactIsolationForest(CompactForest):
+    """Array-backed IsolationForest with score_samples identical to sklearn"""
+
+    def __init__(self, *args, offset=0.0, denominator=1.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.offset_ = float(offset)
+        self.denominator = float(denominator)
+
+    def get_state(self):
+        arrays, params = super().get_state()
+        params.update(offset=self.offset_, denominator=self.denominator)
+        return arrays, params
+
+    @classmethod
+    def from_sklearn(cls, model, scaler, feature_names=None):
+        """Build from a fitted IsolationForest and the StandardScaler feeding it"""
+        # Imported here so loading a compiled model (e.g. from a bundle) does not pull in sklearn
+        from sklearn.ensemble._iforest import _average_path_length
+
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        subsample_features = model._max_features != model.n_features_in_
+
+        feature, threshold, children, roots, max_depth, layout = cls._flatten_trees(
+            trees, scaler.mean_, scaler.scale_,
+            tree_features=model.estimators_features_ if subsample_features else None
+        )
+
+        # Per-leaf path length: nodes on the root-to-leaf path + expected depth below the leaf - 1
+        values = []
+        for tree, (offset, n_nodes, is_leaf) in zip(trees, layout):
+            path_length = np.ones(n_nodes)
+            for node in range(n_nodes):  # Children always have larger ids than parents
+                if not is_leaf[node]:
+                    path_length[tree.children_left[node]] = path_length[node] + 1
+                    path_length[tree.children_right[node]] = path_length[node] + 1
+            values.append(path_length + _average_path_length(tree.n_node_samples) - 1.0)
+
+        max_samples = getattr(model, '_max_samples', model.max_samples_)
+        denominator = len(trees) * _average_path_length([max_samples])[0]
+
+        return cls(feature, threshold, children, np.concatenate(values)[:, np.newaxis], roots, max_depth,
+                   feature_names=feature_names, offset=model.offset_, denominator=denominator)
+
+    def score_samples(self, X):
+        """Opposite of the anomaly score, as IsolationForest.score_samples"""
+        depths = self._sum_leaf_values(self.apply(X))[:, 0]
+
+        if self.denominator == 0:
+            return -np.ones_like(depths)
+        return -(2 ** (-(depths / self.denominator)))
+
+    def predict(self, X):
+        """Detect anomalies; returns (anomalies, scores) like NetworkAnomalyDetector"""
+        anomaly_scores = self.score_samples(X)
+        anomalies = (anomaly_scores - self.offset_ < 0).astype(int)
+
+        return anomalies, anomaly_scores
@@ -10,15 +10,24 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, accuracy_score, f1_score
 import joblib
 from pathlib import Path
+import sys
+
+if __name__ == "__main__":
+    # Run as a script: make the ml package importable
+    sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.compact_forest import CompactRandomForest
+from ml.features import FEATURE_COLUMNS, extract_features, standardize
 
 
 class CoverageClassifier:
-    def __init__(self, n_estimators=100):
+    def __init__(self, n_estimators=100, n_jobs=None):
         """Initialize coverage classifier"""
         self.model = RandomForestClassifier(
             n_estimators=n_estimators,
             random_state=42,
-            max_depth=10
+            max_depth=10,
+            n_jobs=n_jobs
         )
         self.scaler = StandardScaler()
         self.feature_names = None
@@ -44,18 +53,13 @@ class CoverageClassifier:
         return labels
 
     def prepare_features(self, df):
-        """Extract features for classification"""
-        features = df[[
-            'rsrp_dbm',
-            'rsrq_db',
-            'sinr_db',
-            'cqi',
-            'throughput_mbps',
-            'latency_ms',
-            'packet_loss_pct'
-        ]].copy()
-
-        return features
+        """
+        Extract features for classification
+
+        Accepts a DataFrame or a feature matrix already built by
+        extract_features (reused without copying).
+        """
+        return extract_features(df)
 
     def train(self, df):
         """Train coverage classifier"""
@@ -67,7 +71,7 @@ class CoverageClassifier:
 
         # Prepare features and labels
         features = self.prepare_features(df)
-        self.feature_names = features.columns.tolist()
+        self.feature_names = list(FEATURE_COLUMNS)
         labels = df['coverage_quality']
 
         # Split train/test
@@ -79,8 +83,9 @@ class CoverageClassifier:
         print(f"   Test samples: {len(X_test)}")
 
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        self.scaler.fit(X_train)
+        X_train_scaled = standardize(X_train, self.scaler)
+        X_test_scaled = standardize(X_test, self.scaler)
 
         # Train model
         self.model.fit(X_train_scaled, y_train)
@@ -117,14 +122,22 @@ class CoverageClassifier:
 
     def predict(self, df):
         """Predict coverage quality for new data"""
-        features = self.prepare_features(df)
-        X = self.scaler.transform(features)
+        X = standardize(self.prepare_features(df), self.scaler)
 
         predictions = self.model.predict(X)
         probabilities = self.model.predict_proba(X)
 
         return predictions, probabilities
 
+    def compile(self):
+        """
+        Export to an array-backed ensemble for low-latency scoring
+
+        The scaler is folded into the split thresholds, so the result takes
+        raw feature rows and returns exactly what predict() returns.
+        """
+        return CompactRandomForest.from_sklearn(self.model, self.scaler, feature_names=self.feature_names)
+
     def save(self, model_dir):
         """Save model and scaler"""
         model_dir = Path(model_dir)
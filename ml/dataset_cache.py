@@ -0,0 +1,74 @@
+"""
+File-backed dataset cache
+Keeps a parsed (and pre-scored) dataset in memory, keyed on the file's mtime and size
+"""
+
+import os
+import threading
+
+
+class DatasetCache:
+    """
+    Cache the result of loading a file until the file changes
+
+    The first get() loads synchronously. Afterwards, when the file's
+    (mtime, size) changes, get() keeps returning the cached value while a
+    background thread reloads it, then swaps the new value in atomically.
+    """
+
+    def __init__(self, path, loader):
+        """
+        Args:
+            path: File to watch
+            loader: Callable taking the path and returning the value to cache
+                (e.g. a parsed frame with precomputed model outputs)
+        """
+        self.path = path
+        self.loader = loader
+
+        self._value = None
+        self._key = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _file_key(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self):
+        """Return the cached value, loading or scheduling a refresh as needed"""
+        key = self._file_key()
+
+        with self._lock:
+            if self._key is None:
+                self.misses += 1
+                self._value, self._key = self.loader(self.path), key
+                return self._value
+
+            if key != self._key and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh, args=(key,), name='dataset-refresh', daemon=True).start()
+
+            self.hits += 1
+            return self._value
+
+    def _refresh(self, key):
+        try:
+            value = self.loader(self.path)
+            with self._lock:
+                self._value, self._key = value, key
+                self.refreshes += 1
+        except Exception as e:
+            print(f"⚠️  Could not refresh {self.path}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def invalidate(self):
+        """Drop the cached value; the next get() reloads synchronously"""
+        with self._lock:
+            self._value, self._key = None, None
@@ -0,0 +1,204 @@
+"""
+Spike-preserving time-series downsampling
+Min/max bucketing that keeps each bucket's extremes and flagged anomalies,
+stored as a pyramid of resolutions split into time tiles so a chart can
+fetch only the level and range it needs
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ml.columnar import read_columnar, write_columnar
+
+# Bucket widths of the pyramid levels, finest first (seconds)
+LEVEL_BUCKET_SECONDS = (10, 60, 600, 3600)
+
+# Buckets per tile file; a tile spans bucket_seconds * TILE_BUCKETS seconds
+TILE_BUCKETS = 512
+
+MANIFEST_NAME = "manifest.json"
+
+
+def select_extremes(t, values, flags=None, bucket_seconds=60):
+    """
+    Indices of the rows to keep when bucketing a series by time
+
+    For every bucket and value column the minimum and maximum rows are kept,
+    plus the earliest flagged row (e.g. an anomaly), so spikes survive at
+    any resolution. Ties are broken by time, which makes the selection
+    associative: selecting from (kept rows of part A + rows of part B)
+    equals selecting from all rows, so buckets can be updated incrementally.
+
+    Args:
+        t: Integer timestamps (e.g. epoch seconds), one per row
+        values: (n, k) array of the plotted series
+        flags: Optional boolean mask of rows that must stay visible
+        bucket_seconds: Bucket width in the units of t
+
+    Returns:
+        Sorted unique row indices
+    """
+    t = np.asarray(t, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64).reshape(len(t), -1)
+    if len(t) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    bucket = t // bucket_seconds
+    keep = []
+
+    for j in range(values.shape[1]):
+        order = np.lexsort((t, values[:, j], bucket))
+        sorted_bucket = bucket[order]
+        starts = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+        ends = np.r_[starts[1:], len(order)] - 1
+        keep.extend((order[starts], order[ends]))  # Min and max of each bucket
+
+    if flags is not None:
+        flagged = np.flatnonzero(flags)
+        if len(flagged):
+            order = flagged[np.lexsort((t[flagged], bucket[flagged]))]
+            sorted_bucket = bucket[order]
+            keep.append(order[np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]]])
+
+    return np.unique(np.concatenate(keep))
+
+
+class TimeSeriesPyramid:
+    """
+    Multi-resolution, tiled store of downsampled chart points
+
+    Each level buckets the series at a fixed width (LEVEL_BUCKET_SECONDS)
+    and keeps the rows chosen by select_extremes. Levels are split into
+    columnar tiles (see ml/columnar.py) of TILE_BUCKETS buckets, listed in manifest.json with their
+    time range and point count, so a client picks the level whose density
+    fits its pixel width and loads only the tiles in view. update() rewrites
+    only the tiles that new rows fall into.
+    """
+
+    def __init__(self, out_dir, value_columns, columns, flag_column='is_anomaly', time_column='timestamp',
+                 level_bucket_seconds=LEVEL_BUCKET_SECONDS, tile_buckets=TILE_BUCKETS):
+        """
+        Args:
+            out_dir: Directory for manifest.json and the level tiles
+            value_columns: Series whose extremes are preserved
+            columns: Columns written for each point (the time column is stored as 't')
+            flag_column: Boolean/int column of rows that must stay visible
+            time_column: Datetime column the series is bucketed on
+            level_bucket_seconds: Bucket width of each level, finest first
+            tile_buckets: Buckets per tile file
+        """
+        self.out_dir = Path(out_dir)
+        self.value_columns = list(value_columns)
+        self.columns = list(columns)
+        self.flag_column = flag_column
+        self.time_column = time_column
+        self.level_bucket_seconds = list(level_bucket_seconds)
+        self.tile_buckets = tile_buckets
+
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        path = self.out_dir / MANIFEST_NAME
+        if path.exists():
+            with open(path) as f:
+                manifest = json.load(f)
+            if [level['bucket_seconds'] for level in manifest['levels']] == self.level_bucket_seconds:
+                return manifest
+
+        return {
+            'time_column': self.time_column,
+            'value_columns': self.value_columns,
+            'levels': [
+                {'level': i, 'bucket_seconds': s, 'tile_seconds': s * self.tile_buckets, 'n_points': 0, 'tiles': {}}
+                for i, s in enumerate(self.level_bucket_seconds)
+            ],
+        }
+
+    def clear(self):
+        """Remove all tiles (e.g. before rebuilding from a rewritten source)"""
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+        self.manifest = self._read_manifest()
+
+    def _points_frame(self, df):
+        """Chart columns plus integer epoch seconds ('t') used for bucketing"""
+        points = df[[col for col in self.columns if col != self.time_column]].copy()
+        if self.flag_column in df.columns and self.flag_column not in points.columns:
+            points[self.flag_column] = df[self.flag_column].astype(int)
+
+        # Tiles store floats as float32; round now so new and stored points compare alike
+        for col in points.columns[[pd.api.types.is_float_dtype(dtype) for dtype in points.dtypes]]:
+            points[col] = points[col].astype(np.float32)
+
+        points['t'] = df[self.time_column].to_numpy().astype('datetime64[s]').astype(np.int64)
+        return points
+
+    def _select(self, points, bucket_seconds):
+        flags = points[self.flag_column].to_numpy() > 0 if self.flag_column in points.columns else None
+        keep = select_extremes(points['t'].to_numpy(), points[self.value_columns].to_numpy(), flags, bucket_seconds)
+        return points.iloc[keep].sort_values('t', kind='stable')
+
+    def update(self, df):
+        """Merge new rows (any order) into every level, rewriting only the touched tiles"""
+        if len(df) == 0:
+            return
+
+        points = self._points_frame(df)
+
+        for level in self.manifest['levels']:
+            # Reduce the new rows first; merging with stored points gives the same result
+            reduced = self._select(points, level['bucket_seconds'])
+            tile_index = reduced['t'].to_numpy() // level['tile_seconds']
+
+            for index in np.unique(tile_index).tolist():
+                tile = self._merge_tile(level, index, reduced[tile_index == index])
+                key = str(index)
+                level['n_points'] += len(tile) - level['tiles'].get(key, {}).get('n_points', 0)
+                level['tiles'][key] = {
+                    'file': f"level{level['level']}/tile_{index}.tnmc",
+                    'start': int(tile['t'].iloc[0]),
+                    'end': int(tile['t'].iloc[-1]),
+                    'n_points': len(tile),
+                }
+
+        self._write_manifest()
+
+    def _merge_tile(self, level, index, new_points):
+        path = self.out_dir / f"level{level['level']}" / f"tile_{index}.tnmc"
+        if path.exists():
+            stored = read_columnar(path)[0]['points'].astype(new_points.dtypes.to_dict())
+            new_points = self._select(pd.concat([stored, new_points], ignore_index=True), level['bucket_seconds'])
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_columnar(path, {'points': new_points}, meta={'level': level['level'], 'tile': index})
+        return new_points
+
+    def _write_manifest(self):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        for level in self.manifest['levels']:
+            tiles = level['tiles'].values()
+            level['start'] = min((tile['start'] for tile in tiles), default=None)
+            level['end'] = max((tile['end'] for tile in tiles), default=None)
+
+        path = self.out_dir / MANIFEST_NAME
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def level_points(self, max_points):
+        """
+        DataFrame of all points of the finest level with at most max_points points
+
+        Falls back to the coarsest level if none is small enough.
+        """
+        levels = self.manifest['levels']
+        level = next((lvl for lvl in levels if lvl['n_points'] <= max_points), levels[-1])
+
+        tiles = sorted(level['tiles'].values(), key=lambda tile: tile['start'])
+        frames = [read_columnar(self.out_dir / tile['file'])[0]['points'] for tile in tiles]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['t'])
@@ -0,0 +1,307 @@
+"""
+Drift monitoring and background retraining
+Compares the distributions of recent inputs and anomaly scores with the
+training reference (PSI and KS over a sliding window) and retrains the
+serving models in a separate process when they drift apart
+"""
+
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+
+import numpy as np
+
+if __name__ == "__main__":
+    # Run as a script: make the ml package importable
+    sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.features import FEATURE_COLUMNS, extract_features
+
+SCORE_COLUMN = 'anomaly_score'
+
+# Rules of thumb: PSI above 0.2 is a significant population shift
+PSI_THRESHOLD = 0.2
+KS_THRESHOLD = 0.15
+
+# Bin shares are floored at this value so empty bins keep PSI finite
+MIN_SHARE = 1e-4
+
+
+def population_stability_index(expected, actual):
+    """PSI between two histograms over the same bins (counts or shares)"""
+    p = np.maximum(np.asarray(expected, dtype=np.float64) / max(np.sum(expected), 1), MIN_SHARE)
+    q = np.maximum(np.asarray(actual, dtype=np.float64) / max(np.sum(actual), 1), MIN_SHARE)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_statistic(expected, actual):
+    """Kolmogorov-Smirnov distance between two histograms over the same bins"""
+    p = np.cumsum(expected) / max(np.sum(expected), 1)
+    q = np.cumsum(actual) / max(np.sum(actual), 1)
+    return float(np.max(np.abs(p - q)))
+
+
+class DriftMonitor:
+    """
+    Sliding-window drift detector for the model inputs and anomaly scores
+
+    Bin edges are the reference quantiles of each column (features plus the
+    anomaly score). Recent rows are kept in a ring buffer of window rows
+    along with their bin indices, and per-column bin counts are updated as
+    rows enter and leave, so observe() costs O(columns) per row and check()
+    O(columns * bins), however long the monitor runs.
+    """
+
+    def __init__(self, reference, reference_scores, bins=20, window=5000, min_samples=1000,
+                 psi_threshold=PSI_THRESHOLD, ks_threshold=KS_THRESHOLD):
+        """
+        Args:
+            reference: Feature rows the live models were trained on (DataFrame or matrix)
+            reference_scores: Anomaly scores of those rows from the live detector
+            bins: Quantile bins per column (fewer for discrete columns)
+            window: Recent rows compared with the reference
+            min_samples: Rows needed in the window before drift is reported
+            psi_threshold: PSI above which a column has drifted
+            ks_threshold: KS distance above which a column has drifted
+        """
+        self.bins = bins
+        self.window = window
+        self.min_samples = min_samples
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.columns = [*FEATURE_COLUMNS, SCORE_COLUMN]
+
+        self._lock = threading.Lock()
+        self.set_reference(reference, reference_scores)
+
+    def _values(self, X, scores):
+        return np.column_stack([extract_features(X), np.asarray(scores, dtype=np.float64)])
+
+    @staticmethod
+    def _bin(values, edges):
+        return np.stack([np.searchsorted(e, values[:, j], side='right') for j, e in enumerate(edges)], axis=1)
+
+    def set_reference(self, reference, reference_scores):
+        """Replace the reference (e.g. after retraining) and empty the window"""
+        values = self._values(reference, reference_scores)
+        quantiles = np.linspace(0, 1, self.bins + 1)[1:-1]
+
+        with self._lock:
+            self._edges = [np.unique(np.quantile(values[:, j], quantiles)) for j in range(values.shape[1])]
+            self._reference_counts = np.zeros((len(self.columns), self.bins), dtype=np.int64)
+            for j, idx in enumerate(self._bin(values, self._edges).T):
+                self._reference_counts[j] = np.bincount(idx, minlength=self.bins)
+
+            self._rows = np.zeros((self.window, values.shape[1]), dtype=np.float64)
+            self._row_bins = np.zeros((self.window, values.shape[1]), dtype=np.int16)
+            self._counts = np.zeros_like(self._reference_counts)
+            self._next = 0
+            self.n_seen = 0
+
+    def observe(self, X, scores):
+        """Add scored rows to the window (the oldest rows leave it)"""
+        values = self._values(X, scores)[-self.window:]
+        edges = self._edges
+        row_bins = self._bin(values, edges)
+        column = np.broadcast_to(np.arange(values.shape[1]), row_bins.shape)
+
+        with self._lock:
+            if self._edges is not edges:  # set_reference() ran while binning
+                row_bins = self._bin(values, self._edges)
+            slots = (self._next + np.arange(len(values))) % self.window
+            filled = min(self.n_seen, self.window)
+            leaving = slots[slots < filled] if filled < self.window else slots
+            np.subtract.at(self._counts, (column[:len(leaving)], self._row_bins[leaving]), 1)
+
+            self._rows[slots] = values
+            self._row_bins[slots] = row_bins
+            np.add.at(self._counts, (column, row_bins), 1)
+
+            self._next = (self._next + len(values)) % self.window
+            self.n_seen += len(values)
+
+    def recent(self):
+        """(features, scores) of the rows in the window, oldest first"""
+        with self._lock:
+            if self.n_seen < self.window:
+                rows = self._rows[:self.n_seen].copy()
+            else:
+                rows = np.roll(self._rows, -self._next, axis=0)
+        return np.ascontiguousarray(rows[:, :-1]), rows[:, -1]
+
+    def check(self):
+        """
+        Compare the window with the reference
+
+        Returns:
+            Dict with the window size, per-column PSI and KS (None while the
+            window is empty), the drifted columns and whether drift is
+            reported (needs min_samples rows)
+        """
+        with self._lock:
+            reference_counts = self._reference_counts
+            counts = self._counts.copy()
+            n_window = min(self.n_seen, self.window)
+
+        report = {'n_window': n_window, 'columns': {}, 'drifted_columns': []}
+        for j, name in enumerate(self.columns):
+            if not n_window:
+                report['columns'][name] = {'psi': None, 'ks': None}
+                continue
+            psi = population_stability_index(reference_counts[j], counts[j])
+            ks = ks_statistic(reference_counts[j], counts[j])
+            report['columns'][name] = {'psi': psi, 'ks': ks}
+            if psi > self.psi_threshold or ks > self.ks_threshold:
+                report['drifted_columns'].append(name)
+
+        report['drifted'] = n_window >= self.min_samples and bool(report['drifted_columns'])
+        return report
+
+
+def retrain_models(features, bundle_path, contamination=0.05, n_estimators=100):
+    """
+    Train and compile a new anomaly detector and coverage classifier
+
+    Coverage labels come from the 3GPP threshold rules, so unlabeled
+    recent traffic is enough to retrain both models.
+
+    Returns:
+        Path of the written bundle
+    """
+    import pandas as pd
+    from ml.anomaly_detector import NetworkAnomalyDetector
+    from ml.bundle import write_bundle
+    from ml.coverage_classifier import CoverageClassifier
+
+    df = pd.DataFrame(extract_features(features), columns=FEATURE_COLUMNS)
+
+    detector = NetworkAnomalyDetector(contamination=contamination)
+    detector.fit(df)
+    classifier = CoverageClassifier(n_estimators=n_estimators)
+    classifier.train(df)
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + "-retrained"
+    models = {'anomaly_detector': detector.compile(), 'coverage_classifier': classifier.compile()}
+    return write_bundle(bundle_path, models, version=version)
+
+
+class BackgroundRetrainer:
+    """
+    Retrain the serving models in a separate process, one run at a time
+
+    The recent rows are written to disk and `python ml/drift.py --retrain`
+    trains and writes a bundle in a child process, so training never holds
+    the server's GIL or memory. A watcher thread waits for the child and
+    hands the new bundle path to on_complete.
+    """
+
+    def __init__(self, output_dir, on_complete, min_interval_s=600.0, timeout_s=1800.0, keep=3):
+        """
+        Args:
+            output_dir: Directory for the retrained bundles
+            on_complete: Called with (bundle path, training features) after a successful run
+            min_interval_s: Minimum time between the starts of two runs
+            timeout_s: A run taking longer than this is killed
+            keep: Retrained bundles kept on disk (older ones are deleted)
+        """
+        self.output_dir = Path(output_dir)
+        self.on_complete = on_complete
+        self.min_interval_s = min_interval_s
+        self.timeout_s = timeout_s
+        self.keep = keep
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self.last_started = None
+        self.runs = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_bundle = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, features):
+        """Start a run on the given feature rows; returns False if one is running or too recent"""
+        with self._lock:
+            now = time.monotonic()
+            if self.running or (self.last_started is not None and now - self.last_started < self.min_interval_s):
+                return False
+            self.last_started = now
+            self._thread = threading.Thread(target=self._run, args=(np.asarray(features),),
+                                            name='model-retrain', daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, features):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        features_path = self.output_dir / f"features-{stamp}.npy"
+        bundle_path = self.output_dir / f"models-{stamp}.bundle"
+        np.save(features_path, features)
+
+        try:
+            subprocess.run([sys.executable, str(Path(__file__).resolve()), '--retrain', str(features_path),
+                            '--output', str(bundle_path)],
+                           check=True, timeout=self.timeout_s, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            self.on_complete(bundle_path, features)
+            self.runs += 1
+            self.last_bundle = bundle_path
+            self.last_error = None
+
+            # Bundles are memory-mapped, so deleting an old one is safe even while it is still in use
+            for old in sorted(self.output_dir.glob("models-*.bundle"))[:-self.keep]:
+                old.unlink(missing_ok=True)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = e.stderr.decode(errors='replace')[-2000:] if getattr(e, 'stderr', None) else str(e)
+            print(f"⚠️  Retraining failed: {self.last_error}")
+        finally:
+            features_path.unlink(missing_ok=True)
+
+    def status(self):
+        return {
+            'running': self.running,
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_bundle': str(self.last_bundle) if self.last_bundle else None,
+            'last_error': self.last_error,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drift check demo, or retrain the serving models from a feature file")
+    parser.add_argument('--retrain', type=Path, help="Feature rows (.npy) to train on")
+    parser.add_argument('--output', type=Path, help="Bundle to write (with --retrain)")
+    args = parser.parse_args()
+
+    if args.retrain:
+        retrain_models(np.load(args.retrain), args.output)
+        sys.exit(0)
+
+    import pandas as pd
+    from ml.bundle import load_serving_models
+
+    data_path = Path(__file__).parent.parent / "data" / "raw" / "synthetic_5g_timeseries.csv"
+    df = pd.read_csv(data_path, nrows=40000)
+    anomaly_model, _ = load_serving_models(Path(__file__).parent / "models")
+
+    reference, recent = df.iloc[:20000], df.iloc[20000:].copy()
+    monitor = DriftMonitor(reference, anomaly_model.predict(reference)[1])
+
+    # Simulate a degraded network: weaker signal and higher latency
+    recent['rsrp_dbm'] -= 8
+    recent['latency_ms'] *= 1.5
+    monitor.observe(recent, anomaly_model.predict(recent)[1])
+
+    report = monitor.check()
+    print(f"📊 Window of {report['n_window']} rows, drift: {report['drifted']}")
+    for name, stats in report['columns'].items():
+        flag = "🚨" if name in report['drifted_columns'] else "  "
+        print(f"   {flag} {name:<16} PSI {stats['psi']:.3f}  KS {stats['ks']:.3f}")
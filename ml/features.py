@@ -0,0 +1,71 @@
+"""
+Shared KPI feature stage for all models
+Builds the contiguous float64 feature matrix once per batch and applies each
+model's scaler without extra DataFrame copies
+"""
+
+import numpy as np
+import pandas as pd
+
+# KPI columns every model consumes, in matrix column order
+FEATURE_COLUMNS = [
+    'rsrp_dbm',
+    'rsrq_db',
+    'sinr_db',
+    'cqi',
+    'throughput_mbps',
+    'latency_ms',
+    'packet_loss_pct'
+]
+
+# Rows scaled per block; bounds the float64 temporary used by standardize
+SCALE_BLOCK_ROWS = 65536
+
+
+def extract_features(data, dtype=np.float64):
+    """
+    Return the KPI feature matrix as a C-contiguous (n, 7) array
+
+    Raw KPIs stay float64 (the dtype the scalers were fitted on); rounding
+    to float32 happens once, after scaling (see standardize). DataFrames
+    are copied column by column into one preallocated array.
+    Arrays of the right dtype and layout (e.g. a matrix already extracted
+    for another model) are returned as-is, so a batch is extracted once and
+    shared by every model.
+    """
+    if isinstance(data, pd.DataFrame):
+        X = np.empty((len(data), len(FEATURE_COLUMNS)), dtype=dtype)
+        for j, col in enumerate(FEATURE_COLUMNS):
+            X[:, j] = data[col].to_numpy()
+        return X
+
+    return np.ascontiguousarray(data, dtype=dtype)
+
+
+def standardize(X, scaler, out=None):
+    """
+    Apply a fitted StandardScaler to X without DataFrame round-trips
+
+    Each block is computed in float64 and rounded once into out (float32 by
+    default, the dtype sklearn trees use). For float64 X (as returned by
+    extract_features) this matches scaler.transform(X).astype(np.float32)
+    exactly; float32 X would already have lost precision before scaling.
+    """
+    if out is None:
+        out = np.empty(X.shape, dtype=np.float32)
+
+    for start in range(0, len(X), SCALE_BLOCK_ROWS):
+        stop = start + SCALE_BLOCK_ROWS
+        np.divide(X[start:stop] - scaler.mean_, scaler.scale_, out=out[start:stop], casting='same_kind')
+
+    return out
+
+
+def minmax_scale(X, scaler, out=None):
+    """Apply a fitted MinMaxScaler to X in float32 (in place when out is X)"""
+    if out is None:
+        out = np.empty(X.shape, dtype=np.float32)
+
+    np.multiply(X, scaler.scale_.astype(out.dtype), out=out)
+    out += scaler.min_.astype(out.dtype)
+    return out
@@ -0,0 +1,180 @@
+"""
+Incremental grouped statistics
+Keeps per-group count / mean / M2 (sum of squared deviations) that can be
+updated with new rows only, plus helpers to read just the rows appended to a
+CSV since the last run
+"""
+
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bytes of the file head hashed to detect a rewritten (not appended) CSV
+FINGERPRINT_BYTES = 65536
+
+# New CSV data is parsed in blocks of about this size
+READ_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+class GroupedMoments:
+    """
+    Per-group count, mean and M2 for several value columns
+
+    update() computes each batch's group moments in two passes over the
+    batch, then merges them into the running state with Chan et al.'s
+    parallel form of Welford's update. The result matches a full
+    groupby().mean() / .std() recompute up to float rounding, without
+    revisiting old rows.
+    """
+
+    def __init__(self, columns):
+        """
+        Args:
+            columns: Names of the value columns, in the order rows are passed
+        """
+        self.columns = list(columns)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.count = np.empty(0, dtype=np.int64)
+        self.mean = np.empty((0, len(self.columns)), dtype=np.float64)
+        self.m2 = np.empty((0, len(self.columns)), dtype=np.float64)
+
+    def update(self, keys, values):
+        """
+        Merge a batch of rows
+
+        Args:
+            keys: Integer group key per row
+            values: (n, len(columns)) array of values
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(keys), len(self.columns))
+        if len(keys) == 0:
+            return
+
+        # Batch moments per group (two-pass: mean first, then squared deviations)
+        batch_keys, inverse = np.unique(keys, return_inverse=True)
+        n_b = np.bincount(inverse).astype(np.int64)
+        mean_b = np.stack([np.bincount(inverse, weights=values[:, j]) for j in range(values.shape[1])], axis=1)
+        mean_b /= n_b[:, None]
+        deviations = values - mean_b[inverse]
+        m2_b = np.stack([np.bincount(inverse, weights=deviations[:, j] ** 2) for j in range(values.shape[1])], axis=1)
+
+        # Make room for groups seen for the first time
+        new_keys = np.setdiff1d(batch_keys, self.keys, assume_unique=True)
+        if len(new_keys):
+            all_keys = np.union1d(self.keys, new_keys)
+            old = np.searchsorted(all_keys, self.keys)
+            count = np.zeros(len(all_keys), dtype=np.int64)
+            mean = np.zeros((len(all_keys), len(self.columns)))
+            m2 = np.zeros((len(all_keys), len(self.columns)))
+            count[old], mean[old], m2[old] = self.count, self.mean, self.m2
+            self.keys, self.count, self.mean, self.m2 = all_keys, count, mean, m2
+
+        # Chan et al. merge of (n_a, mean_a, M2_a) with (n_b, mean_b, M2_b)
+        idx = np.searchsorted(self.keys, batch_keys)
+        n_a = self.count[idx]
+        n = n_a + n_b
+        delta = mean_b - self.mean[idx]
+        self.mean[idx] += delta * (n_b / n)[:, None]
+        self.m2[idx] += m2_b + delta ** 2 * (n_a * n_b / n)[:, None]
+        self.count[idx] = n
+
+    def std(self, ddof=1):
+        """Per-group standard deviation (NaN where count <= ddof, like pandas)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dof = (self.count - ddof).astype(np.float64)
+            return np.sqrt(np.where(dof[:, None] > 0, self.m2 / dof[:, None], np.nan))
+
+    def get_state(self):
+        """JSON-serializable state (floats round-trip exactly)"""
+        return {
+            'columns': self.columns,
+            'keys': self.keys.tolist(),
+            'count': self.count.tolist(),
+            'mean': self.mean.tolist(),
+            'm2': self.m2.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        moments = cls(state['columns'])
+        moments.keys = np.asarray(state['keys'], dtype=np.int64)
+        moments.count = np.asarray(state['count'], dtype=np.int64)
+        moments.mean = np.asarray(state['mean'], dtype=np.float64).reshape(-1, len(moments.columns))
+        moments.m2 = np.asarray(state['m2'], dtype=np.float64).reshape(-1, len(moments.columns))
+        return moments
+
+
+def file_fingerprint(path, n_bytes=FINGERPRINT_BYTES):
+    """Hash of the first n_bytes; changes when the file is rewritten rather than appended to"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(n_bytes)).hexdigest()
+
+
+def watermark_valid(path, watermark):
+    """
+    True if the file still starts with the bytes the watermark was taken over
+
+    False means the file was rewritten, truncated or replaced since the
+    watermark was recorded, so state built from it must be discarded.
+    """
+    if watermark is None or os.path.getsize(path) < watermark['offset']:
+        return False
+    return file_fingerprint(path, watermark['fingerprint_bytes']) == watermark['fingerprint']
+
+
+def iter_appended_rows(path, watermark=None, block_bytes=READ_BLOCK_BYTES, **read_csv_kwargs):
+    """
+    Yield (DataFrame, watermark) for the CSV rows after a byte watermark
+
+    Only complete lines are consumed; a partially written last line is left
+    for the next run. Each yielded watermark records the byte offset reached
+    and a fingerprint of the file head (see watermark_valid). An invalid or
+    missing watermark reads from the first data row.
+
+    Args:
+        path: CSV file (appended to between runs)
+        watermark: Watermark from a previous run, or None to read everything
+        block_bytes: Approximate bytes parsed per yielded frame
+        **read_csv_kwargs: Passed to pd.read_csv (e.g. parse_dates)
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        names = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+        offset = watermark['offset'] if watermark_valid(path, watermark) else f.tell()
+
+        f.seek(offset)
+        while block := f.read(block_bytes):
+            block += f.readline()  # Extend the block to the end of its last line
+            end = block.rfind(b'\n') + 1
+            if end:
+                offset += end
+                fingerprint_bytes = min(offset, FINGERPRINT_BYTES)
+                df = pd.read_csv(io.BytesIO(block[:end]), header=None, names=names, **read_csv_kwargs)
+                yield df, {
+                    'offset': offset,
+                    'fingerprint_bytes': fingerprint_bytes,
+                    'fingerprint': file_fingerprint(path, fingerprint_bytes),
+                }
+            if end < len(block):
+                break  # Trailing partial line: left for the next run, once the writer finishes it
+
+
+def load_state(path):
+    """Read a JSON state file, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    """Write a JSON state file atomically"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
@@ -5,22 +5,32 @@ Predicts throughput and latency based on historical patterns
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
+import importlib.util
 from pathlib import Path
+import sys
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    from tensorflow.keras.models import Sequential
-    from tensorflow.keras.layers import LSTM, Dense, Dropout
-    TENSORFLOW_AVAILABLE = True
-except ImportError:
-    TENSORFLOW_AVAILABLE = False
+if __name__ == "__main__":
+    # Run as a script: make the ml package importable
+    sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.features import FEATURE_COLUMNS, extract_features, minmax_scale
+
+# Importing TensorFlow takes seconds; only check it is installed here and import it on first use
+TENSORFLOW_AVAILABLE = importlib.util.find_spec('tensorflow') is not None
+if not TENSORFLOW_AVAILABLE:
     print("⚠️  TensorFlow not available. Using simple baseline model.")
 
 
+def _keras():
+    """Import Keras on first use"""
+    from tensorflow import keras
+    return keras
+
+
 class KPIPredictor:
     def __init__(self, sequence_length=50, use_lstm=True):
         """
@@ -36,44 +46,71 @@ class KPIPredictor:
         self.scaler = MinMaxScaler()
         self.target_scaler = MinMaxScaler()
         self.feature_names = None
+        self.target_index = FEATURE_COLUMNS.index('throughput_mbps')  # Target column for the baseline
 
     def create_sequences(self, data, target):
-        """Create sequences for time-series prediction"""
-        X, y = [], []
+        """
+        Create sequences for time-series prediction
 
-        for i in range(len(data) - self.sequence_length):
-            X.append(data[i:i + self.sequence_length])
-            y.append(target[i + self.sequence_length])
+        Windows are strided views into data (no copy), so X costs no memory
+        beyond the feature matrix itself: X[i] is data[i:i + sequence_length]
+        and y[i] is target[i + sequence_length].
+        """
+        windows = sliding_window_view(data, self.sequence_length, axis=0)  # (n, features, seq)
+        X = windows.transpose(0, 2, 1)[:-1]
+        y = target[self.sequence_length:]
 
-        return np.array(X), np.array(y)
+        return X, y
 
     def prepare_data(self, df, target_col='throughput_mbps'):
         """Prepare data for training"""
-        # Select features
-        feature_cols = ['rsrp_dbm', 'rsrq_db', 'sinr_db', 'cqi',
-                       'throughput_mbps', 'latency_ms', 'packet_loss_pct']
+        # Select features (float32 keeps the matrix and every batch half-size)
+        features = extract_features(df, dtype=np.float32)
+        target = df[[target_col]].to_numpy(dtype=np.float32, copy=True)
+        self.target_index = FEATURE_COLUMNS.index(target_col)
 
-        features = df[feature_cols].values
-        target = df[[target_col]].values
-
-        # Scale data
-        features_scaled = self.scaler.fit_transform(features)
-        target_scaled = self.target_scaler.fit_transform(target)
+        # Scale data in place
+        self.scaler.fit(features)
+        self.target_scaler.fit(target)
+        minmax_scale(features, self.scaler, out=features)
+        minmax_scale(target, self.target_scaler, out=target)
 
         # Create sequences
-        X, y = self.create_sequences(features_scaled, target_scaled)
+        X, y = self.create_sequences(features, target)
 
         return X, y
 
+    @staticmethod
+    def batch_generator(X, y, batch_size=32, shuffle=False, seed=42):
+        """
+        Yield (X, y) batches forever, copying only one batch at a time
+
+        Feeds model.fit/predict lazily from the strided window views
+        created by create_sequences; pair it with steps_per_epoch/steps.
+        """
+        rng = np.random.default_rng(seed)
+        n = len(X)
+
+        while True:
+            order = rng.permutation(n) if shuffle else np.arange(n)
+            for start in range(0, n, batch_size):
+                idx = order[start:start + batch_size]
+                if shuffle:
+                    idx = np.sort(idx)  # Sorted gathers are friendlier to the strided source
+                yield np.ascontiguousarray(X[idx]), y[idx]
+
     def build_lstm_model(self, input_shape):
         """Build LSTM model"""
-        model = Sequential([
-            LSTM(64, activation='relu', input_shape=input_shape, return_sequences=True),
-            Dropout(0.2),
-            LSTM(32, activation='relu'),
-            Dropout(0.2),
-            Dense(16, activation='relu'),
-            Dense(1)
+        keras = _keras()
+        layers = keras.layers
+
+        model = keras.Sequential([
+            layers.LSTM(64, activation='relu', input_shape=input_shape, return_sequences=True),
+            layers.Dropout(0.2),
+            layers.LSTM(32, activation='relu'),
+            layers.Dropout(0.2),
+            layers.Dense(16, activation='relu'),
+            layers.Dense(1)
         ])
 
         model.compile(optimizer='adam', loss='mse', metrics=['mae'])
@@ -98,21 +135,29 @@ class KPIPredictor:
             # Build and train LSTM
             self.model = self.build_lstm_model((X_train.shape[1], X_train.shape[2]))
 
+            train_steps = int(np.ceil(len(X_train) / batch_size))
+            test_steps = int(np.ceil(len(X_test) / batch_size))
+
             history = self.model.fit(
-                X_train, y_train,
-                validation_data=(X_test, y_test),
+                self.batch_generator(X_train, y_train, batch_size, shuffle=True),
+                steps_per_epoch=train_steps,
+                validation_data=self.batch_generator(X_test, y_test, batch_size),
+                validation_steps=test_steps,
                 epochs=epochs,
-                batch_size=batch_size,
                 verbose=0
             )
 
             # Evaluate
-            y_pred = self.model.predict(X_test, verbose=0)
+            y_pred = self.model.predict(
+                (X for X, _ in self.batch_generator(X_test, y_test, batch_size)),
+                steps=test_steps,
+                verbose=0
+            )
         else:
             # Simple moving average baseline
             print("   Using moving average baseline...")
             # Average of last values
-            y_pred = np.mean(X_test[:, -5:, 4], axis=1).reshape(-1, 1)  # Last 5 throughput values
+            y_pred = np.mean(X_test[:, -5:, self.target_index], axis=1).reshape(-1, 1)  # Last 5 target values
 
         # Inverse transform predictions
         y_pred_original = self.target_scaler.inverse_transform(y_pred)
@@ -138,14 +183,30 @@ class KPIPredictor:
 
     def predict(self, sequence):
         """Predict next value given a sequence"""
+        return self.predict_many(np.asarray(sequence)[np.newaxis])[0]
+
+    def predict_many(self, sequences, batch_size=1024):
+        """
+        Predict the next value for many sequences in one vectorized call
+
+        Args:
+            sequences: Array of shape (n_sequences, sequence_length, n_features),
+                e.g. the latest window of every cell
+            batch_size: Batch size for the LSTM forward pass
+
+        Returns:
+            Array of n_sequences predictions in original units
+        """
+        sequences = np.asarray(sequences, dtype=np.float32)
+
         if self.use_lstm:
-            sequence_scaled = self.scaler.transform(sequence)
-            sequence_scaled = sequence_scaled.reshape(1, self.sequence_length, -1)
-            prediction = self.model.predict(sequence_scaled, verbose=0)
-            return self.target_scaler.inverse_transform(prediction)[0][0]
+            # Scale all windows at once (MinMax is per-feature, so broadcast over the last axis)
+            sequences_scaled = minmax_scale(sequences, self.scaler)
+            prediction = self.model.predict(sequences_scaled, batch_size=batch_size, verbose=0)
+            return self.target_scaler.inverse_transform(prediction)[:, 0]
         else:
             # Simple average
-            return np.mean(sequence[-5:, 4])  # Last 5 throughput values
+            return np.mean(sequences[:, -5:, self.target_index], axis=1)  # Last 5 target values
 
     def save(self, model_dir, target_col='throughput'):
         """Save model"""
@@ -159,11 +220,30 @@ class KPIPredictor:
         joblib.dump(self.target_scaler, model_dir / f"kpi_{target_col}_target_scaler.pkl")
         joblib.dump({
             'sequence_length': self.sequence_length,
-            'use_lstm': self.use_lstm
+            'use_lstm': self.use_lstm,
+            'target_index': self.target_index
         }, model_dir / f"kpi_{target_col}_config.pkl")
 
         print(f"💾 Model saved to {model_dir}")
 
+    @classmethod
+    def load(cls, model_dir, target_col='throughput'):
+        """Load trained model"""
+        model_dir = Path(model_dir)
+
+        config = joblib.load(model_dir / f"kpi_{target_col}_config.pkl")
+        predictor = cls(sequence_length=config['sequence_length'], use_lstm=config['use_lstm'])
+        predictor.scaler = joblib.load(model_dir / f"kpi_{target_col}_scaler.pkl")
+        predictor.target_scaler = joblib.load(model_dir / f"kpi_{target_col}_target_scaler.pkl")
+        predictor.target_index = config.get('target_index', predictor.target_index)
+
+        if config['use_lstm'] and not predictor.use_lstm:
+            print("⚠️  Saved model is an LSTM but TensorFlow is not available. Using baseline.")
+        elif predictor.use_lstm:
+            predictor.model = _keras().models.load_model(model_dir / f"kpi_{target_col}_lstm.keras")
+
+        return predictor
+
 
 if __name__ == "__main__":
     # Load data
@@ -0,0 +1,93 @@
+"""
+Lazy resources and background warm-up
+Defers expensive imports and model loads until first use, or runs them in a
+background thread so a server can accept requests while it warms up
+"""
+
+import threading
+import time
+
+
+class LazyResource:
+    """
+    Load a value once, on the first get() or from a warm-up thread
+
+    Concurrent callers wait for the same load. A failed load is not cached,
+    so the next get() retries (e.g. once the models have been trained).
+    """
+
+    def __init__(self, loader, name='resource'):
+        """
+        Args:
+            loader: Callable taking no arguments and returning the value
+            name: Label used in log messages and readiness reports
+        """
+        self.loader = loader
+        self.name = name
+
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        self.load_seconds = None
+        self.error = None
+
+    @property
+    def ready(self):
+        return self._loaded
+
+    def get(self):
+        """Return the value, loading it if this is the first use"""
+        if self._loaded:
+            return self._value
+
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                except Exception as e:
+                    self.error = e
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.error = None
+                self._loaded = True
+
+        return self._value
+
+    def replace(self, value):
+        """
+        Swap in a new value atomically
+
+        Callers that already hold the old value keep using it until they
+        finish; every later get() returns the new one.
+        """
+        with self._lock:
+            old, self._value = self._value, value
+            self._loaded = True
+            self.error = None
+        return old
+
+
+def warm_up(*steps, name='warmup'):
+    """
+    Run loader callables one after another in a daemon thread
+
+    Failures are logged and do not stop later steps; a LazyResource that
+    failed here is retried on its next get().
+
+    Returns:
+        The started thread
+    """
+    def run():
+        start = time.perf_counter()
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                print(f"⚠️  Warm-up step {getattr(step, '__qualname__', step)} failed: {e}")
+        print(f"🔥 Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,197 @@
+"""
+Lightweight in-process metrics
+Counters, gauges and fixed-bucket latency histograms with labels, rendered in
+the Prometheus text exposition format. Recording a value is a dict lookup, a
+bisect and a lock, so timers can stay on in production.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+
+# Latency buckets (seconds), 100 µs to 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Rows per batched model call
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _format_value(value):
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonically increasing count"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+    def samples(self):
+        yield "", (), self.value
+
+
+class Gauge:
+    """Value that can go up and down, or be read from a callable at render time"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Report function() when rendered (None skips the sample)"""
+        self._function = function
+
+    def samples(self):
+        value = self._function() if self._function is not None else self.value
+        if value is not None:
+            yield "", (), value
+
+
+class _Timer:
+    """Context manager observing elapsed seconds into a histogram"""
+
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Histogram:
+    """Counts of observations per fixed bucket, plus their sum"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Time a block: with histogram.time(): ..."""
+        return _Timer(self)
+
+    def samples(self):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+
+        cumulative = 0
+        for bound, n in zip((*self.bounds, math.inf), counts):
+            cumulative += n
+            yield "_bucket", (('le', _format_value(bound)),), cumulative
+        yield "_sum", (), total
+        yield "_count", (), count
+
+
+class MetricFamily:
+    """One named metric and its per-label-value children"""
+
+    def __init__(self, name, help, kind, labelnames, factory):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Child metric for one combination of label values (created on first use)"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def render(self):
+        with self._lock:
+            children = sorted(self._children.items())
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in children:
+            for suffix, extra, value in child.samples():
+                lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metric families rendered together for a /metrics endpoint"""
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _family(self, name, help, kind, labelnames, factory):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(name, help, kind, labelnames, factory)
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered as a {family.kind} with labels {family.labelnames}")
+        return family
+
+    def counter(self, name, help, labelnames=()):
+        return self._family(name, help, 'counter', labelnames, Counter)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._family(name, help, 'gauge', labelnames, Gauge)
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._family(name, help, 'histogram', labelnames, lambda: Histogram(buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            families = list(self._families.values())
+
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by the app
+REGISTRY = MetricsRegistry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
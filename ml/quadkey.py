@@ -0,0 +1,114 @@
+"""
+Vectorized Bing/Ookla quadkey helpers
+Converts between WGS84 coordinates, slippy-map tiles and quadkey strings
+"""
+
+import numpy as np
+
+# Ookla Open Data tiles are zoom-16 Web Mercator tiles (~610 m at the equator)
+OOKLA_ZOOM = 16
+MAX_LATITUDE = 85.05112878
+
+
+def latlon_to_tile(lat, lon, zoom=OOKLA_ZOOM):
+    """Convert latitude/longitude arrays to integer tile x/y at a zoom level"""
+    lat = np.clip(np.asarray(lat, dtype=float), -MAX_LATITUDE, MAX_LATITUDE)
+    lon = np.asarray(lon, dtype=float)
+    n = 1 << zoom
+
+    sin_lat = np.sin(np.radians(lat))
+    x = (lon + 180.0) / 360.0
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+
+    tile_x = np.clip(np.floor(x * n), 0, n - 1).astype(np.int64)
+    tile_y = np.clip(np.floor(y * n), 0, n - 1).astype(np.int64)
+    return tile_x, tile_y
+
+
+def tile_to_latlon(tile_x, tile_y, zoom=OOKLA_ZOOM):
+    """Return the latitude/longitude of the north-west corner of tiles"""
+    n = float(1 << zoom)
+    tile_x = np.asarray(tile_x, dtype=float)
+    tile_y = np.asarray(tile_y, dtype=float)
+
+    lon = tile_x / n * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * tile_y / n))))
+    return lat, lon
+
+
+def tile_centroid(tile_x, tile_y, zoom=OOKLA_ZOOM):
+    """Return the latitude/longitude of the centre of tiles"""
+    return tile_to_latlon(np.asarray(tile_x) + 0.5, np.asarray(tile_y) + 0.5, zoom)
+
+
+def tile_to_quadkey(tile_x, tile_y, zoom=OOKLA_ZOOM):
+    """Interleave tile x/y bits into quadkey strings (one digit per zoom level)"""
+    tile_x = np.atleast_1d(np.asarray(tile_x, dtype=np.int64))
+    tile_y = np.atleast_1d(np.asarray(tile_y, dtype=np.int64))
+
+    shifts = np.arange(zoom - 1, -1, -1, dtype=np.int64)
+    digits = ((tile_x[:, None] >> shifts) & 1) | (((tile_y[:, None] >> shifts) & 1) << 1)
+
+    chars = (digits + ord('0')).astype(np.uint8)
+    return np.ascontiguousarray(chars).view(f'S{zoom}').ravel().astype(str)
+
+
+def quadkey_to_tile(quadkeys):
+    """Decode quadkey strings (all of the same length) to tile x/y and zoom"""
+    quadkeys = np.atleast_1d(np.asarray(quadkeys, dtype=str))
+    zoom = len(quadkeys[0]) if len(quadkeys) else 0
+
+    digits = quadkeys.astype(f'S{zoom}').view(np.uint8).reshape(-1, zoom).astype(np.int64) - ord('0')
+    shifts = np.arange(zoom - 1, -1, -1, dtype=np.int64)
+
+    tile_x = ((digits & 1) << shifts).sum(axis=1)
+    tile_y = (((digits >> 1) & 1) << shifts).sum(axis=1)
+    return tile_x, tile_y, zoom
+
+
+def latlon_to_quadkey(lat, lon, zoom=OOKLA_ZOOM):
+    """Convert latitude/longitude arrays straight to quadkey strings"""
+    tile_x, tile_y = latlon_to_tile(lat, lon, zoom)
+    return tile_to_quadkey(tile_x, tile_y, zoom)
+
+
+def tile_to_code(tile_x, tile_y, zoom=OOKLA_ZOOM):
+    """
+    Quadkeys as integers (the quadkey read as a base-4 number, i.e. the Morton code)
+
+    Sorting by code sorts by quadkey, and every tile under a quadkey prefix
+    of length z falls in the contiguous range prefix_code << 2 * (zoom - z)
+    up to (prefix_code + 1) << 2 * (zoom - z).
+    """
+    tile_x = np.atleast_1d(np.asarray(tile_x, dtype=np.int64))
+    tile_y = np.atleast_1d(np.asarray(tile_y, dtype=np.int64))
+
+    code = np.zeros(len(tile_x), dtype=np.int64)
+    for bit in range(zoom):
+        code |= ((tile_x >> bit) & 1) << (2 * bit)
+        code |= ((tile_y >> bit) & 1) << (2 * bit + 1)
+    return code
+
+
+def code_to_tile(codes):
+    """Decode integer quadkeys (see tile_to_code) to tile x/y at their zoom"""
+    codes = np.atleast_1d(np.asarray(codes, dtype=np.int64))
+
+    tile_x = np.zeros(len(codes), dtype=np.int64)
+    tile_y = np.zeros(len(codes), dtype=np.int64)
+    for bit in range(31):
+        tile_x |= ((codes >> (2 * bit)) & 1) << bit
+        tile_y |= ((codes >> (2 * bit + 1)) & 1) << bit
+    return tile_x, tile_y
+
+
+def quadkey_to_code(quadkeys):
+    """Convert quadkey strings (all of the same length) to integer quadkeys and their zoom"""
+    tile_x, tile_y, zoom = quadkey_to_tile(quadkeys)
+    return tile_to_code(tile_x, tile_y, zoom), zoom
+
+
+def code_to_quadkey(codes, zoom):
+    """Convert integer quadkeys at a zoom level back to quadkey strings"""
+    tile_x, tile_y = code_to_tile(codes)
+    return tile_to_quadkey(tile_x, tile_y, zoom)
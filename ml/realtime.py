@@ -0,0 +1,507 @@
+"""
+Real-time KPI ingestion and scoring service
+Accepts KPI records over TCP (newline-delimited JSON) and UDP (compact binary
+or JSON), batches them per cell, scores each batch with the anomaly detector
+and coverage classifier, and streams scored events to subscribers over SSE
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import sys
+
+import numpy as np
+
+if __name__ == "__main__":
+    # Run as a script: make the ml package importable
+    sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.features import FEATURE_COLUMNS
+
+# Compact binary record (40 bytes, little-endian): epoch seconds, cell ID, 7 KPIs in FEATURE_COLUMNS order
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('cell_id', '<u4'),
+    ('kpis', '<f4', (len(FEATURE_COLUMNS),)),
+])
+
+TCP_PORT = 9000
+UDP_PORT = 9001
+HTTP_PORT = 8090
+
+
+def encode_binary(timestamps, cell_ids, features):
+    """Pack records into the compact binary format (e.g. one UDP datagram)"""
+    records = np.empty(len(cell_ids), dtype=RECORD_DTYPE)
+    records['timestamp'] = timestamps
+    records['cell_id'] = cell_ids
+    records['kpis'] = features
+    return records.tobytes()
+
+
+def decode_binary(data):
+    """Unpack compact binary records into (timestamps, cell IDs, features)"""
+    records = np.frombuffer(data, dtype=RECORD_DTYPE)
+    return records['timestamp'], records['cell_id'], records['kpis']
+
+
+def encode_ndjson(record):
+    """One KPI record (dict with cell_id, timestamp and the KPI columns) as an NDJSON line"""
+    return (json.dumps(record) + "\n").encode('utf-8')
+
+
+# Raised by decode_ndjson for malformed lines (bad JSON, not an object, missing or non-numeric fields)
+DECODE_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
+
+def decode_ndjson(line):
+    """
+    Parse one NDJSON line into (timestamp, cell ID, feature row)
+
+    KPIs are converted to float here, so a malformed record is rejected on
+    arrival (with one of DECODE_ERRORS) instead of failing its whole batch later.
+    """
+    record = json.loads(line)
+    cell_id = record['cell_id']
+    if not isinstance(cell_id, (int, str)):
+        raise TypeError(f"cell_id must be an integer or string, got {type(cell_id).__name__}")
+    return record.get('timestamp'), cell_id, [float(record[col]) for col in FEATURE_COLUMNS]
+
+
+class StageLatency:
+    """Latency of one pipeline stage: totals plus percentiles over recent samples"""
+
+    def __init__(self, window=10_000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+
+    def record(self, seconds, n=1):
+        """Add one measurement that applies to n records"""
+        self.count += n
+        self.total += seconds * n
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def summary(self):
+        recent = np.fromiter(self._recent, dtype=np.float64)
+        p50, p95, p99 = np.percentile(recent, [50, 95, 99]).tolist() if len(recent) else (0.0, 0.0, 0.0)
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': p50 * 1000,
+            'p95_ms': p95 * 1000,
+            'p99_ms': p99 * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class _CellBuffer:
+    """Records of one cell waiting to be scored"""
+
+    def __init__(self):
+        self.timestamps = []
+        self.rows = []
+        self.received = []
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class Subscription:
+    """
+    Bounded event queue for one subscriber; the oldest events are dropped if it falls behind
+
+    cell_id filters by the cell's string form, so integer and string cells
+    both match the value given in an /events query
+    """
+
+    def __init__(self, maxsize=1000, cell_id=None):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.cell_id = str(cell_id) if cell_id is not None else None
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, event):
+        if self.cell_id is not None and str(event['cell_id']) != self.cell_id:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def close(self):
+        """End the stream; next_events() returns [] once the queue is drained"""
+        self.closed = True
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)  # Wake a waiting consumer
+
+    async def next_events(self):
+        """Wait for at least one event and return every queued event ([] once closed)"""
+        if self.closed and self.queue.empty():
+            return []
+
+        events = [await self.queue.get()]
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return [event for event in events if event is not None]
+
+
+class KPIIngestService:
+    """
+    Ingest KPI records, score them per cell in batches and publish the results
+
+    Records are buffered per cell until max_batch_rows arrive or the oldest
+    has waited max_wait_ms. Full batches go to the queue of one scoring
+    worker, chosen by cell, so each cell's batches are scored one at a time
+    and in arrival order (per-cell online baselines depend on it); workers
+    run the models in a thread pool. When a worker's queue is full, TCP
+    readers stop reading, so senders are slowed by TCP flow control; UDP
+    records that cannot be queued are dropped and counted.
+    """
+
+    def __init__(self, anomaly_model, coverage_model, registry=None, max_batch_rows=256, max_wait_ms=20.0,
+                 max_pending_batches=64, n_workers=2, subscriber_queue_size=1000):
+        """
+        Args:
+            anomaly_model: Anomaly detector with predict(X) -> (anomalies, scores)
+                (NetworkAnomalyDetector or its compiled form)
+            coverage_model: Coverage classifier with predict(X) -> (labels, probabilities)
+            registry: Optional ModelRegistry (or OnlineAnomalyDetector); cells it
+                knows are scored against their own baseline instead of anomaly_model
+            max_batch_rows: Records per cell that trigger an immediate batch
+            max_wait_ms: Maximum time a record waits in its cell buffer
+            max_pending_batches: Bound on batches queued for scoring, split
+                across the workers (back-pressure)
+            n_workers: Concurrent scoring workers (and model threads); a cell
+                is always scored by the same worker
+            subscriber_queue_size: Events buffered per subscriber
+        """
+        self.anomaly_model = anomaly_model
+        self.coverage_model = coverage_model
+        self.registry = registry
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_pending_batches = max_pending_batches
+        self.n_workers = n_workers
+        self._worker_queue_size = max(1, -(-max_pending_batches // n_workers))
+        self.subscriber_queue_size = subscriber_queue_size
+
+        self._buffers = {}
+        self._pending = []  # One queue per worker
+        self._drained = []  # Notified when a worker takes a batch off its queue
+        self._subscribers = set()
+        self._executor = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='kpi-score')
+        self._tasks = []
+        self._http_tasks = set()
+        self._servers = []
+        self._transports = []
+
+        self.latency = {stage: StageLatency() for stage in ('decode', 'queue_wait', 'score', 'publish', 'end_to_end')}
+        self.counters = {'records_in': 0, 'records_dropped': 0, 'decode_errors': 0, 'batches': 0, 'events_published': 0,
+                         'score_errors': 0, 'records_failed': 0}
+        self.last_score_error = None
+
+    # Ingestion
+
+    async def ingest(self, timestamp, cell_id, row, received=None):
+        """Buffer one record; waits (back-pressure) if its cell's batch is full and the queue is too"""
+        buffer = self._add(timestamp, cell_id, row, received)
+        if len(buffer) >= self.max_batch_rows:
+            await self._enqueue(self._take(cell_id))
+
+    def ingest_nowait(self, timestamp, cell_id, row, received=None):
+        """Buffer one record without waiting; returns False if it had to be dropped"""
+        buffer = self._add(timestamp, cell_id, row, received)
+        if len(buffer) >= self.max_batch_rows:
+            batch = self._take(cell_id)
+            queue = self._pending[self._worker_for(cell_id)]
+            if queue.qsize() >= self._worker_queue_size:
+                self.counters['records_dropped'] += len(batch[1])
+                return False
+            queue.put_nowait(batch)
+        return True
+
+    def _worker_for(self, cell_id):
+        return hash(cell_id) % self.n_workers
+
+    async def _enqueue(self, batch):
+        """
+        Queue a batch for its cell's worker, then wait while that queue is over its bound
+
+        The batch is queued before waiting, so a batch can never overtake an
+        earlier one of the same cell that is still waiting for room.
+        """
+        worker = self._worker_for(batch[0])
+        queue, drained = self._pending[worker], self._drained[worker]
+        queue.put_nowait(batch)
+        if queue.qsize() > self._worker_queue_size:
+            async with drained:
+                await drained.wait_for(lambda: queue.qsize() <= self._worker_queue_size)
+
+    def _add(self, timestamp, cell_id, row, received):
+        buffer = self._buffers.get(cell_id)
+        if buffer is None:
+            buffer = self._buffers[cell_id] = _CellBuffer()
+
+        buffer.timestamps.append(timestamp)
+        buffer.rows.append(row)
+        buffer.received.append(received if received is not None else time.perf_counter())
+        self.counters['records_in'] += 1
+        return buffer
+
+    def _take(self, cell_id):
+        buffer = self._buffers.pop(cell_id)
+        return cell_id, np.asarray(buffer.rows, dtype=np.float64), buffer.timestamps, buffer.received
+
+    async def _flush_expired(self):
+        """Send partial batches whose oldest record has waited max_wait"""
+        while True:
+            await asyncio.sleep(self.max_wait / 2)
+            now = time.perf_counter()
+            for cell_id in [c for c, b in self._buffers.items() if now - b.received[0] >= self.max_wait]:
+                if cell_id in self._buffers:  # May have been sent as a full batch while we waited
+                    await self._enqueue(self._take(cell_id))
+
+    # Scoring
+
+    def _score(self, cell_id, X):
+        """Run both models on one cell's batch (in a worker thread)"""
+        if self.registry is not None and cell_id in self.registry:
+            anomalies, scores = self.registry.get(cell_id).predict(X)
+        else:
+            anomalies, scores = self.anomaly_model.predict(X)
+        coverage, _ = self.coverage_model.predict(X)
+        return anomalies, scores, coverage
+
+    async def _score_worker(self, worker):
+        loop = asyncio.get_running_loop()
+        queue, drained = self._pending[worker], self._drained[worker]
+        while True:
+            cell_id, X, timestamps, received = await queue.get()
+            async with drained:
+                drained.notify_all()
+
+            start = time.perf_counter()
+            for t in received:
+                self.latency['queue_wait'].record(start - t)
+
+            try:
+                anomalies, scores, coverage = await loop.run_in_executor(self._executor, self._score, cell_id, X)
+                scored = time.perf_counter()
+                self.latency['score'].record(scored - start, n=len(X))
+                self.counters['batches'] += 1
+
+                self._publish(cell_id, X, timestamps, anomalies, scores, coverage)
+            except Exception as e:
+                # Drop this batch only; the worker keeps draining the queue
+                self.counters['score_errors'] += 1
+                self.counters['records_failed'] += len(X)
+                self.last_score_error = f"cell {cell_id}: {e!r}"
+                continue
+            published = time.perf_counter()
+            self.latency['publish'].record(published - scored, n=len(X))
+            for t in received:
+                self.latency['end_to_end'].record(published - t)
+
+    def _publish(self, cell_id, X, timestamps, anomalies, scores, coverage):
+        if not self._subscribers:
+            return
+
+        cell_id = int(cell_id) if isinstance(cell_id, (int, np.integer)) else cell_id
+        for i in range(len(X)):
+            event = {
+                'cell_id': cell_id,
+                'timestamp': timestamps[i],
+                'is_anomaly': int(anomalies[i]),
+                'anomaly_score': float(scores[i]),
+                'coverage_quality': str(coverage[i]),
+            }
+            event.update(zip(FEATURE_COLUMNS, X[i].tolist()))
+            for subscription in self._subscribers:
+                subscription.offer(event)
+        self.counters['events_published'] += len(X)
+
+    def subscribe(self, cell_id=None):
+        """Return a Subscription receiving scored events (optionally for one cell)"""
+        subscription = Subscription(self.subscriber_queue_size, cell_id=cell_id)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscribers.discard(subscription)
+
+    def metrics(self):
+        """Counters, queue depths and per-stage latency summaries"""
+        return {
+            'counters': dict(self.counters),
+            'last_score_error': self.last_score_error,
+            'pending_batches': sum(queue.qsize() for queue in self._pending),
+            'buffered_records': sum(len(b) for b in self._buffers.values()),
+            'subscribers': len(self._subscribers),
+            'subscriber_drops': sum(s.dropped for s in self._subscribers),
+            'latency': {stage: tracker.summary() for stage, tracker in self.latency.items()},
+        }
+
+    # Network endpoints
+
+    async def _handle_tcp(self, reader, writer):
+        """NDJSON records, one per line; awaiting ingest() throttles the sender when busy"""
+        try:
+            while line := await reader.readline():
+                received = time.perf_counter()
+                try:
+                    timestamp, cell_id, row = decode_ndjson(line)
+                except DECODE_ERRORS:
+                    self.counters['decode_errors'] += 1
+                    continue
+                self.latency['decode'].record(time.perf_counter() - received)
+                await self.ingest(timestamp, cell_id, row, received)
+        finally:
+            writer.close()
+
+    def _handle_datagram(self, data):
+        """Binary records (any multiple of RECORD_DTYPE.itemsize) or NDJSON lines"""
+        received = time.perf_counter()
+        try:
+            if data[:1] == b'{':
+                records = [decode_ndjson(line) for line in data.splitlines() if line.strip()]
+            else:
+                timestamps, cell_ids, features = decode_binary(data)
+                records = list(zip(timestamps.tolist(), cell_ids.tolist(), features))
+        except DECODE_ERRORS:
+            self.counters['decode_errors'] += 1
+            return
+        self.latency['decode'].record(time.perf_counter() - received, n=max(len(records), 1))
+
+        for timestamp, cell_id, row in records:
+            self.ingest_nowait(timestamp, cell_id, row, received)
+
+    async def _handle_http(self, reader, writer):
+        """GET /events[?cell_id=ID] streams SSE; GET /metrics returns JSON"""
+        task = asyncio.current_task()
+        self._http_tasks.add(task)
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass  # Skip headers
+
+            parts = request_line.decode('latin-1').split()
+            url = urlsplit(parts[1] if len(parts) > 1 else '/')
+
+            if url.path == '/metrics':
+                body = json.dumps(self.metrics()).encode('utf-8')
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(body) + body)
+                await writer.drain()
+
+            elif url.path == '/events':
+                cell_id = parse_qs(url.query).get('cell_id', [None])[0]
+                subscription = self.subscribe(cell_id)
+                try:
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                                 b"Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n\r\n")
+                    while events := await subscription.next_events():
+                        writer.write(b"".join(b"data: " + json.dumps(e).encode('utf-8') + b"\n\n" for e in events))
+                        await writer.drain()
+                finally:
+                    self.unsubscribe(subscription)
+
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            self._http_tasks.discard(task)
+
+    async def start(self, host='0.0.0.0', tcp_port=TCP_PORT, udp_port=UDP_PORT, http_port=HTTP_PORT):
+        """Start the listeners, flusher and scoring workers (ports of None are skipped)"""
+        loop = asyncio.get_running_loop()
+        self._pending = [asyncio.Queue() for _ in range(self.n_workers)]
+        self._drained = [asyncio.Condition() for _ in range(self.n_workers)]
+
+        self._tasks.append(asyncio.create_task(self._flush_expired()))
+        self._tasks.extend(asyncio.create_task(self._score_worker(worker)) for worker in range(self.n_workers))
+
+        if tcp_port is not None:
+            self._servers.append(await asyncio.start_server(self._handle_tcp, host, tcp_port))
+        if http_port is not None:
+            self._servers.append(await asyncio.start_server(self._handle_http, host, http_port))
+        if udp_port is not None:
+            service = self
+
+            class _Datagrams(asyncio.DatagramProtocol):
+                def datagram_received(self, data, addr):
+                    service._handle_datagram(data)
+
+            transport, _ = await loop.create_datagram_endpoint(_Datagrams, local_addr=(host, udp_port))
+            self._transports.append(transport)
+
+        print(f"📡 KPI ingest listening on {host} (tcp={tcp_port}, udp={udp_port}, http={http_port})")
+
+    async def close(self):
+        """Stop listeners and workers, and end open event streams"""
+        for subscription in list(self._subscribers):
+            subscription.close()
+        await asyncio.gather(*self._http_tasks, return_exceptions=True)
+
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for transport in self._transports:
+            transport.close()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+
+async def serve(model_dir=None, host='0.0.0.0', tcp_port=TCP_PORT, udp_port=UDP_PORT, http_port=HTTP_PORT,
+                online=False):
+    """
+    Load the serving models and run the service until cancelled
+
+    With online=True, anomalies are scored by per-cell online baselines
+    (ml/online_detector.py) instead of the Isolation Forest; their state is
+    checkpointed next to the models every 10 seconds and on shutdown.
+    """
+    from ml.bundle import load_serving_models
+
+    model_dir = Path(model_dir or Path(__file__).parent / "models")
+    anomaly_model, coverage_model = load_serving_models(model_dir)
+
+    online_detector, checkpoint = None, model_dir / "online_detector.npz"
+    if online:
+        from ml.online_detector import OnlineAnomalyDetector
+
+        online_detector = OnlineAnomalyDetector.load(checkpoint) if checkpoint.exists() else OnlineAnomalyDetector()
+        print(f"🔁 Online anomaly detection ({len(online_detector.cells)} cells restored)")
+
+    service = KPIIngestService(anomaly_model, coverage_model, registry=online_detector)
+    await service.start(host, tcp_port, udp_port, http_port)
+
+    try:
+        while True:
+            await asyncio.sleep(10)
+            m = service.metrics()
+            e2e = m['latency']['end_to_end']
+            print(f"📈 {m['counters']['records_in']} records, {m['counters']['records_dropped']} dropped, "
+                  f"end-to-end p50 {e2e['p50_ms']:.1f} ms / p99 {e2e['p99_ms']:.1f} ms")
+            if online_detector is not None:
+                online_detector.save(checkpoint)
+    finally:
+        await service.close()
+        if online_detector is not None:
+            online_detector.save(checkpoint)
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(online='--online' in sys.argv))
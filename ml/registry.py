@@ -0,0 +1,255 @@
+"""
+Per-cell model registry
+Trains and stores one anomaly detector per cell (or site/region) and loads
+them on demand into a memory-bounded LRU cache
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+if __name__ == "__main__":
+    # Run as a script: make the ml package importable
+    sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.bundle import ModelBundle, write_bundle
+from ml.features import extract_features
+
+REGISTRY_DIR = Path(__file__).parent / "models" / "cells"
+INDEX_NAME = "index.json"
+
+# Cells with fewer rows than this keep using the global detector
+MIN_SAMPLES = 200
+
+
+def _group_rows(keys):
+    """Yield (key, row indices) for each distinct key, rows in original order"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[order], np.arange(len(unique) + 1))
+
+    for i, key in enumerate(unique):
+        yield key, order[bounds[i]:bounds[i + 1]]
+
+
+def _bundle_name(key):
+    """File name for a key: readable prefix plus a hash so distinct keys never collide"""
+    safe = re.sub(r'[^A-Za-z0-9_.-]', '_', key)[:64]
+    return f"{safe}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}.bundle"
+
+
+class ModelRegistry:
+    """
+    Anomaly detectors keyed by cell ID, stored as one bundle file per key
+
+    get() keeps recently used models in an LRU cache bounded by the size of
+    their arrays (max_bytes); the least recently used models are evicted
+    first. Bundles are memory-mapped, so loading a cell only touches the
+    pages its traversal reads.
+    """
+
+    def __init__(self, registry_dir=REGISTRY_DIR, max_bytes=256 * 1024 * 1024, fallback=None):
+        """
+        Args:
+            registry_dir: Directory holding the per-key bundles and index.json
+            max_bytes: Bound on the array bytes of resident models
+            fallback: Compiled model used by predict() for unregistered keys
+                (e.g. the global detector); None means unknown keys raise KeyError
+        """
+        self.registry_dir = Path(registry_dir)
+        self.max_bytes = max_bytes
+        self.fallback = fallback
+
+        self.index = self._read_index()
+        self._cache = OrderedDict()  # key -> (model, nbytes)
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _read_index(self):
+        path = self.registry_dir / INDEX_NAME
+        if not path.exists():
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_index(self):
+        path = self.registry_dir / INDEX_NAME
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def keys(self):
+        return list(self.index)
+
+    def __contains__(self, key):
+        return str(key) in self.index
+
+    def train(self, df, key_col='cell_id', min_samples=MIN_SAMPLES, contamination=0.05, n_jobs=None):
+        """
+        Train and store one detector per key
+
+        The feature matrix is extracted once and split by key, so each
+        detector is fitted on a view of its own rows.
+
+        Args:
+            df: DataFrame with the KPI columns and key_col
+            key_col: Column holding the cell / site / region ID
+            min_samples: Keys with fewer rows are skipped
+            contamination: Expected outlier share per cell
+            n_jobs: Parallel jobs for each forest
+
+        Returns:
+            Dict of key -> number of training rows, for the keys trained
+        """
+        from ml.anomaly_detector import NetworkAnomalyDetector
+
+        print(f"🔧 Training per-{key_col} anomaly detectors...")
+        self.registry_dir.mkdir(parents=True, exist_ok=True)
+
+        features = extract_features(df)
+        keys = df[key_col].to_numpy()
+        trained = {}
+
+        for key, rows in _group_rows(keys):
+            key = str(key)
+            if len(rows) < min_samples:
+                continue
+
+            detector = NetworkAnomalyDetector(contamination=contamination, n_jobs=n_jobs)
+            detector.fit(features[rows])
+            model = detector.compile()
+
+            path = self.registry_dir / _bundle_name(key)
+            write_bundle(path, {'anomaly_detector': model}, verbose=False)
+
+            arrays, _ = model.get_state()
+            self.index[key] = {
+                'file': path.name,
+                'n_samples': int(len(rows)),
+                'nbytes': int(sum(array.nbytes for array in arrays.values())),
+                'trained_at': datetime.now(timezone.utc).isoformat(),
+            }
+            self.invalidate(key)
+            trained[key] = int(len(rows))
+
+        self._write_index()
+        skipped = len(np.unique(keys)) - len(trained)
+        print(f"✅ Trained {len(trained)} detectors ({skipped} keys below {min_samples} rows skipped)")
+        return trained
+
+    def get(self, key):
+        """
+        Return the compiled detector for key, loading it if not resident
+
+        Raises:
+            KeyError: If no detector is registered for key
+        """
+        key = str(key)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key][0]
+
+            self.misses += 1
+            entry = self.index[key]
+            bundle = ModelBundle(self.registry_dir / entry['file'])
+            model = bundle.model('anomaly_detector')
+
+            self._cache[key] = (model, entry['nbytes'])
+            self.resident_bytes += entry['nbytes']
+
+            # Evict least recently used models (never the one just loaded)
+            while self.resident_bytes > self.max_bytes and len(self._cache) > 1:
+                _, (_, nbytes) = self._cache.popitem(last=False)
+                self.resident_bytes -= nbytes
+                self.evictions += 1
+
+            return model
+
+    def invalidate(self, key):
+        """Drop a key from the cache (e.g. after retraining it)"""
+        with self._lock:
+            cached = self._cache.pop(str(key), None)
+            if cached is not None:
+                self.resident_bytes -= cached[1]
+
+    def predict(self, key, data):
+        """
+        Score rows against one key's baseline
+
+        Returns:
+            (anomalies, scores) like NetworkAnomalyDetector.predict
+        """
+        if key in self:
+            return self.get(key).predict(data)
+        if self.fallback is None:
+            raise KeyError(key)
+        return self.fallback.predict(data)
+
+    def score(self, df, key_col='cell_id'):
+        """
+        Score a mixed batch, each row against its own key's detector
+
+        Returns:
+            (anomalies, scores) aligned with the rows of df
+        """
+        features = extract_features(df)
+        anomalies = np.zeros(len(df), dtype=int)
+        scores = np.empty(len(df), dtype=np.float64)
+
+        for key, rows in _group_rows(df[key_col].to_numpy()):
+            anomalies[rows], scores[rows] = self.predict(str(key), features[rows])
+
+        return anomalies, scores
+
+    def stats(self):
+        """Cache counters and residency"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'registered': len(self.index),
+                'resident': len(self._cache),
+                'resident_bytes': self.resident_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+if __name__ == "__main__":
+    # Load data
+    data_path = Path(__file__).parent.parent / "data" / "raw" / "synthetic_5g_timeseries.csv"
+    print(f"📁 Loading data from {data_path}")
+    df = pd.read_csv(data_path)
+
+    if 'cell_id' not in df.columns:
+        print("❌ Dataset has no cell_id column. Regenerate it with scripts/create_synthetic_data.py")
+        sys.exit(1)
+
+    registry = ModelRegistry(max_bytes=64 * 1024 * 1024)
+    registry.train(df, key_col='cell_id')
+
+    # Score the dataset cell by cell
+    anomalies, scores = registry.score(df, key_col='cell_id')
+    print(f"\n📊 Per-cell anomaly rate: {anomalies.mean() * 100:.1f}%")
+
+    print("\n📈 Registry cache:")
+    for name, value in registry.stats().items():
+        print(f"   {name}: {value}")
@@ -0,0 +1,253 @@
+"""
+Quadkey-prefix spatial index for Ookla tiles
+Tiles are sorted by integer quadkey, so every quadkey prefix (a coarser map
+tile) is a contiguous run: per-zoom aggregates reduce those runs, and
+bounding boxes are answered by covering them with prefix ranges
+"""
+
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+if __name__ == "__main__":
+    # Run as a script: make the ml package importable
+    sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.quadkey import code_to_quadkey, code_to_tile, latlon_to_tile, quadkey_to_code, tile_centroid
+
+META_NAME = "meta.json"
+
+# Zoom levels with pre-aggregated tiles (the source zoom is always included)
+INDEX_ZOOMS = tuple(range(1, 17))
+
+# Averaged per aggregated tile, weighted by test count (as Ookla aggregates its own tiles)
+MEAN_COLUMNS = ['avg_d_kbps', 'avg_u_kbps', 'avg_lat_ms']
+SUM_COLUMNS = ['tests', 'devices']
+
+# Covering a bounding box subdivides this many levels below the box's own size,
+# then filters the boundary tiles exactly
+COVER_EXTRA_LEVELS = 4
+
+
+def bbox_tile_range(bbox, zoom):
+    """Inclusive tile x/y rectangle (x0, y0, x1, y1) of a (west, south, east, north) bbox at a zoom level"""
+    west, south, east, north = bbox
+    if west > east or south > north:
+        raise ValueError("bbox must be west,south,east,north with west <= east and south <= north")
+    x0, y0 = latlon_to_tile(north, west, zoom)
+    x1, y1 = latlon_to_tile(south, east, zoom)
+    return int(x0[()]), int(y0[()]), int(x1[()]), int(y1[()])
+
+
+def cover_tile_range(x0, y0, x1, y1, zoom, extra_levels=COVER_EXTRA_LEVELS):
+    """
+    Cover a tile rectangle with quadtree cells, as integer quadkey ranges
+
+    Cells fully inside the rectangle are emitted whole; boundary cells stop
+    extra_levels below the rectangle's own size and are flagged, since some
+    of their tiles lie outside and must be filtered exactly.
+
+    Returns:
+        Sorted list of (lo, hi, partial): integer quadkeys at zoom in [lo, hi)
+    """
+    span = max(x1 - x0, y1 - y0) + 1
+    max_depth = min(zoom, max(0, zoom - math.ceil(math.log2(span))) + extra_levels)
+
+    ranges = []
+    stack = [(0, 0, 0, 0)]  # (depth, x, y, code) of quadtree cells
+    while stack:
+        depth, x, y, code = stack.pop()
+        shift = zoom - depth
+        cx0, cy0 = x << shift, y << shift
+        cx1, cy1 = ((x + 1) << shift) - 1, ((y + 1) << shift) - 1
+        if cx1 < x0 or cx0 > x1 or cy1 < y0 or cy0 > y1:
+            continue
+
+        inside = x0 <= cx0 and cx1 <= x1 and y0 <= cy0 and cy1 <= y1
+        if inside or depth == max_depth:
+            ranges.append((code << (2 * shift), (code + 1) << (2 * shift), not inside))
+            continue
+
+        for dy in (0, 1):
+            for dx in (0, 1):
+                stack.append((depth + 1, 2 * x + dx, 2 * y + dy, code * 4 + (dx | dy << 1)))
+
+    return sorted(ranges)
+
+
+def build_spatial_index(df, index_dir, zooms=INDEX_ZOOMS, verbose=True):
+    """
+    Build per-zoom tile aggregates from Ookla tile rows
+
+    Args:
+        df: Tiles with 'quadkey' strings plus MEAN_COLUMNS and SUM_COLUMNS
+            (several rows per quadkey, e.g. quarters, are merged)
+        index_dir: Output directory (replaced atomically)
+        zooms: Aggregation zoom levels (capped at the quadkey zoom)
+    """
+    index_dir = Path(index_dir)
+    codes, base_zoom = quadkey_to_code(df['quadkey'].astype(str).to_numpy())
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+
+    tests = df['tests'].to_numpy(dtype=np.float64)[order]
+    weighted = {col: df[col].to_numpy(dtype=np.float64)[order] * tests for col in MEAN_COLUMNS}
+    sums = {col: df[col].to_numpy(dtype=np.float64)[order] for col in SUM_COLUMNS}
+
+    columns = {name: [] for name in ['code', 'n_tiles', *SUM_COLUMNS, *MEAN_COLUMNS]}
+    levels, offset = [], 0
+
+    for zoom in sorted({z for z in zooms if z <= base_zoom} | {base_zoom}):
+        # Prefix runs are contiguous in code order: reduce each run
+        prefix = codes >> (2 * (base_zoom - zoom))
+        starts = np.flatnonzero(np.r_[True, prefix[1:] != prefix[:-1]]) if len(prefix) else np.empty(0, dtype=np.intp)
+        n_tiles = np.diff(np.r_[starts, len(prefix)])
+
+        columns['code'].append(prefix[starts])
+        columns['n_tiles'].append(n_tiles)
+        for col in SUM_COLUMNS:
+            columns[col].append(np.add.reduceat(sums[col], starts) if len(starts) else np.empty(0))
+        total_tests = np.add.reduceat(tests, starts) if len(starts) else np.empty(0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for col in MEAN_COLUMNS:
+                columns[col].append((np.add.reduceat(weighted[col], starts) if len(starts) else np.empty(0)) / total_tests)
+
+        levels.append({'zoom': zoom, 'offset': offset, 'count': len(starts)})
+        offset += len(starts)
+
+    tmp_dir = index_dir.with_name(index_dir.name + '.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    dtypes = {'code': np.int64, 'n_tiles': np.int64}
+    for name, parts in columns.items():
+        np.save(tmp_dir / f"{name}.npy", np.concatenate(parts).astype(dtypes.get(name, np.float64)))
+
+    meta = {'base_zoom': base_zoom, 'n_rows': len(df), 'levels': levels, 'columns': list(columns)}
+    with open(tmp_dir / META_NAME, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.replace(tmp_dir, index_dir)
+
+    if verbose:
+        print(f"✅ Built spatial index at {index_dir} ({len(df)} tiles, zooms {levels[0]['zoom']}-{base_zoom})")
+
+
+class SpatialIndex:
+    """
+    Read-only, memory-mapped view of an index written by build_spatial_index()
+
+    Each zoom level is a code-sorted run of aggregated tiles. A bounding box
+    is covered by quadtree cells (whole cells inside the box, plus small
+    boundary cells that are filtered exactly); each cell is one contiguous
+    code range found by binary search, so a query costs about
+    O(cells * log n + tiles returned).
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = Path(index_dir)
+        with open(self.index_dir / META_NAME) as f:
+            self.meta = json.load(f)
+
+        self.base_zoom = self.meta['base_zoom']
+        self.levels = {level['zoom']: level for level in self.meta['levels']}
+        self.columns = {
+            name: np.load(self.index_dir / f"{name}.npy", mmap_mode='r')
+            for name in self.meta['columns']
+        }
+
+    @property
+    def zooms(self):
+        return sorted(self.levels)
+
+    def _level(self, zoom):
+        if zoom not in self.levels:
+            raise ValueError(f"Zoom {zoom} not indexed (available: {self.zooms[0]}-{self.zooms[-1]})")
+        level = self.levels[zoom]
+        return slice(level['offset'], level['offset'] + level['count'])
+
+    def select(self, bbox=None, zoom=None):
+        """
+        Row positions of the aggregated tiles at a zoom level intersecting a bbox
+
+        Args:
+            bbox: (west, south, east, north) in degrees, or None for everything
+            zoom: Zoom level (default: the source zoom)
+        """
+        zoom = self.base_zoom if zoom is None else zoom
+        level = self._level(zoom)
+        if bbox is None:
+            return np.arange(level.start, level.stop)
+
+        x0, y0, x1, y1 = bbox_tile_range(bbox, zoom)
+        codes = self.columns['code'][level]
+        ranges = np.array(cover_tile_range(x0, y0, x1, y1, zoom), dtype=np.int64).reshape(-1, 3)
+
+        # One binary search per range end, then expand the runs into row positions
+        starts = np.searchsorted(codes, ranges[:, 0])
+        stops = np.searchsorted(codes, ranges[:, 1])
+        lengths = stops - starts
+        rows = np.repeat(starts - np.cumsum(np.r_[0, lengths[:-1]]), lengths) + np.arange(lengths.sum())
+
+        # Tiles from boundary cells may lie just outside the box: check them exactly
+        partial = np.repeat(ranges[:, 2].astype(bool), lengths)
+        if partial.any():
+            tile_x, tile_y = code_to_tile(codes[rows[partial]])
+            outside = (tile_x < x0) | (tile_x > x1) | (tile_y < y0) | (tile_y > y1)
+            rows = np.delete(rows, np.flatnonzero(partial)[outside])
+
+        return level.start + rows
+
+    def count(self, bbox=None, zoom=None):
+        """Number of aggregated tiles a query would return"""
+        return len(self.select(bbox, zoom))
+
+    def best_zoom(self, bbox=None, max_tiles=2000):
+        """Finest zoom at which the bbox holds at most max_tiles aggregated tiles"""
+        best = self.zooms[0]
+        for zoom in self.zooms:
+            if self.count(bbox, zoom) > max_tiles:
+                break
+            best = zoom
+        return best
+
+    def rows(self, positions, zoom):
+        """DataFrame of aggregated tiles (quadkey, centroid and stats) at the given row positions"""
+        codes = np.asarray(self.columns['code'][positions])
+        tile_x, tile_y = code_to_tile(codes)
+        lat, lon = tile_centroid(tile_x, tile_y, zoom)
+
+        data = {'quadkey': code_to_quadkey(codes, zoom) if len(codes) else np.empty(0, dtype=str), 'lat': lat, 'lon': lon}
+        for name in ['n_tiles', *SUM_COLUMNS, *MEAN_COLUMNS]:
+            data[name] = np.asarray(self.columns[name][positions])
+        return pd.DataFrame(data)
+
+    def query(self, bbox=None, zoom=None):
+        """Aggregated tiles at a zoom level intersecting a bbox, in quadkey order"""
+        zoom = self.base_zoom if zoom is None else zoom
+        return self.rows(self.select(bbox, zoom), zoom)
+
+
+if __name__ == "__main__":
+    import time
+
+    data_dir = Path(__file__).parent.parent / "data"
+    df = pd.read_csv(data_dir / "raw" / "synthetic_ookla_mobile_tiles.csv", dtype={'quadkey': str})
+    build_spatial_index(df, data_dir / "processed" / "ookla_spatial_index")
+    index = SpatialIndex(data_dir / "processed" / "ookla_spatial_index")
+
+    for level in index.meta['levels']:
+        print(f"   zoom {level['zoom']:2d}: {level['count']} tiles")
+
+    bbox = (-74.3, 40.5, -73.7, 40.9)  # New York City
+    start = time.perf_counter()
+    zoom = index.best_zoom(bbox, max_tiles=500)
+    tiles = index.query(bbox, zoom)
+    print(f"   NYC bbox: {len(tiles)} tiles at zoom {zoom} in {(time.perf_counter() - start) * 1000:.2f} ms")
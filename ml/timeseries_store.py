@@ -0,0 +1,427 @@
+"""
+Sorted columnar time-series store
+One memory-mapped .npy file per column, rows sorted by timestamp, so a
+[start, end) window is found by binary search and only its rows are read;
+per-bucket rollups answer coarse aggregates without touching raw rows
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+META_NAME = "meta.json"
+TIME_COLUMN = "timestamp"
+
+# Bumped when the on-disk layout changes, so older stores are rebuilt
+STORE_VERSION = 2
+
+# Timestamps are stored as int64 microseconds since the epoch
+TIME_UNIT = "us"
+
+AGGREGATIONS = ('mean', 'min', 'max')
+
+# CSV rows parsed per chunk while building
+BUILD_CHUNK_ROWS = 1_000_000
+
+# Rollup bucket widths (seconds). Each divides the next, so any bucket that
+# is a multiple of a width can be assembled from that level and finer ones
+# (power-of-two widths would not divide minutes, hours or days)
+ROLLUP_SECONDS = (60, 300, 900, 3600, 21600, 86400)
+ROLLUP_DIR = "rollups"
+ROLLUP_STATS = ('count', 'sum', 'min', 'max')
+
+
+def _to_time(value):
+    """Timestamp, ISO string or epoch seconds -> int64 microseconds"""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(round(float(value) * 1_000_000))
+    return int(pd.Timestamp(value).to_datetime64().astype(f'datetime64[{TIME_UNIT}]').astype(np.int64))
+
+
+def _source_key(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _promote_raw(raw_path, old_dtype, new_dtype):
+    """Rewrite a raw column file in a wider dtype (e.g. int64 -> float64 once NaNs appear)"""
+    values = np.fromfile(raw_path, dtype=old_dtype)
+    values.astype(new_dtype).tofile(raw_path)
+    return open(raw_path, 'ab')
+
+
+def _reduce_runs(keys, count, total, low, high):
+    """Merge consecutive rows with equal keys (sorted): counts and sums add, min/max combine"""
+    if not len(keys):
+        return keys, count, total, low, high
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return (keys[starts], np.add.reduceat(count, starts), np.add.reduceat(total, starts, axis=0),
+            np.minimum.reduceat(low, starts, axis=0), np.maximum.reduceat(high, starts, axis=0))
+
+
+def _build_rollups(store_dir, columns, verbose=True):
+    """
+    Write count/sum/min/max per epoch-aligned bucket for every ROLLUP_SECONDS width
+
+    The finest level is reduced from the sorted raw columns (one column in
+    memory at a time), each coarser level from the one below it.
+    """
+    t = np.load(store_dir / f"{TIME_COLUMN}.npy", mmap_mode='r')
+    width_us = ROLLUP_SECONDS[0] * 1_000_000
+    keys = np.asarray(t) // width_us
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.intp)
+    level = {
+        't': keys[starts] * width_us,
+        'count': np.diff(np.r_[starts, len(keys)]).astype(np.int64),
+        'sum': np.empty((len(starts), len(columns))),
+        'min': np.empty((len(starts), len(columns))),
+        'max': np.empty((len(starts), len(columns))),
+    }
+    del keys
+    for j, col in enumerate(columns):
+        values = np.asarray(np.load(store_dir / f"{col}.npy", mmap_mode='r'), dtype=np.float64)
+        if len(starts):
+            level['sum'][:, j] = np.add.reduceat(values, starts)
+            level['min'][:, j] = np.minimum.reduceat(values, starts)
+            level['max'][:, j] = np.maximum.reduceat(values, starts)
+        del values
+
+    for i, seconds in enumerate(ROLLUP_SECONDS):
+        if i:
+            width_us = seconds * 1_000_000
+            keys, count, total, low, high = _reduce_runs(level['t'] // width_us, level['count'], level['sum'],
+                                                         level['min'], level['max'])
+            level = {'t': keys * width_us, 'count': count, 'sum': total, 'min': low, 'max': high}
+
+        level_dir = store_dir / ROLLUP_DIR / str(seconds)
+        level_dir.mkdir(parents=True)
+        for name, array in level.items():
+            np.save(level_dir / f"{name}.npy", array)
+
+    if verbose:
+        print(f"   Rollups at {', '.join(f'{s}s' for s in ROLLUP_SECONDS)} for {len(columns)} columns")
+
+
+def build_store(csv_path, store_dir, chunk_rows=BUILD_CHUNK_ROWS, verbose=True):
+    """
+    Convert a KPI CSV into a sorted columnar store
+
+    Columns are streamed to disk chunk by chunk; if the rows are not already
+    in time order, they are sorted afterwards one column at a time, so memory
+    stays around one int64 per row plus one chunk.
+
+    Args:
+        csv_path: CSV with a 'timestamp' column
+        store_dir: Output directory (replaced atomically)
+        chunk_rows: Rows parsed per chunk
+    """
+    store_dir = Path(store_dir)
+    tmp_dir = store_dir.with_name(store_dir.name + '.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    files, dtypes, dictionaries = {}, {}, {}
+    n_rows, last_t, is_sorted = 0, None, True
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, parse_dates=[TIME_COLUMN]):
+        t = chunk[TIME_COLUMN].to_numpy().astype(f'datetime64[{TIME_UNIT}]').astype(np.int64)
+        if len(t):
+            is_sorted &= bool(np.all(t[1:] >= t[:-1])) and (last_t is None or t[0] >= last_t)
+            last_t = t[-1]
+
+        columns = {TIME_COLUMN: t}
+        for col in chunk.columns.drop(TIME_COLUMN):
+            values = chunk[col]
+            if pd.api.types.is_numeric_dtype(values):
+                columns[col] = values.to_numpy()
+            else:
+                # Dictionary-encode strings (e.g. scenario) with codes stable across chunks
+                dictionary = dictionaries.setdefault(col, {})
+                for value in values.unique():
+                    dictionary.setdefault(value, len(dictionary))
+                columns[col] = values.map(dictionary).to_numpy(dtype=np.int32)
+
+        for col, array in columns.items():
+            if col not in files:
+                dtypes[col] = array.dtype
+                files[col] = open(tmp_dir / f"{col}.raw", 'wb')
+            elif np.result_type(dtypes[col], array.dtype) != dtypes[col]:
+                # A later chunk needs a wider type (e.g. NaNs in a column that was int64 so far)
+                files[col].close()
+                promoted = np.result_type(dtypes[col], array.dtype)
+                files[col] = _promote_raw(tmp_dir / f"{col}.raw", dtypes[col], promoted)
+                dtypes[col] = promoted
+            array.astype(dtypes[col], copy=False).tofile(files[col])
+        n_rows += len(chunk)
+
+    for f in files.values():
+        f.close()
+
+    # Raw column files -> .npy, permuted into time order if needed
+    order = None
+    if not is_sorted:
+        t = np.fromfile(tmp_dir / f"{TIME_COLUMN}.raw", dtype=np.int64)
+        order = np.argsort(t, kind='stable')
+        del t
+
+    for col, dtype in dtypes.items():
+        raw_path = tmp_dir / f"{col}.raw"
+        values = np.fromfile(raw_path, dtype=dtype)
+        np.save(tmp_dir / f"{col}.npy", values if order is None else values[order])
+        del values
+        raw_path.unlink()
+
+    # Every numeric column (dictionary-encoded ones cannot be aggregated)
+    rollup_columns = [col for col in dtypes if col != TIME_COLUMN and col not in dictionaries]
+    _build_rollups(tmp_dir, rollup_columns, verbose=verbose)
+
+    meta = {
+        'version': STORE_VERSION,
+        'source': str(csv_path),
+        'source_key': _source_key(csv_path),
+        'n_rows': n_rows,
+        'time_column': TIME_COLUMN,
+        'time_unit': TIME_UNIT,
+        'columns': {col: str(dtype) for col, dtype in dtypes.items()},
+        'dictionaries': {col: list(d) for col, d in dictionaries.items()},
+        'rollups': {'seconds': list(ROLLUP_SECONDS), 'columns': rollup_columns},
+    }
+    with open(tmp_dir / META_NAME, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+
+    if verbose:
+        print(f"✅ Built time-series store at {store_dir} ({n_rows} rows, {len(dtypes)} columns)")
+
+
+class TimeSeriesStore:
+    """
+    Read-only view of a store written by build_store()
+
+    Columns are memory-mapped, so opening is cheap and queries read only the
+    pages of the rows in the requested window: cost is O(log n) for the
+    lookup plus O(rows in window), independent of the dataset size.
+    Aggregates over buckets that are multiples of a rollup width read
+    rollup rows instead, so their cost follows the number of buckets.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = Path(store_dir)
+        with open(self.store_dir / META_NAME) as f:
+            self.meta = json.load(f)
+
+        self.n_rows = self.meta['n_rows']
+        self.time_column = self.meta['time_column']
+        self.dictionaries = {col: np.asarray(values, dtype=object) for col, values in self.meta['dictionaries'].items()}
+        self.columns = {
+            col: np.load(self.store_dir / f"{col}.npy", mmap_mode='r')
+            for col in self.meta['columns']
+        }
+        self.t = self.columns[self.time_column]
+
+        rollups = self.meta.get('rollups', {'seconds': [], 'columns': []})
+        self.rollup_columns = rollups['columns']
+        self.rollup_widths = [seconds * 1_000_000 for seconds in rollups['seconds']]
+        self.rollups = [
+            {stat: np.load(self.store_dir / ROLLUP_DIR / str(seconds) / f"{stat}.npy", mmap_mode='r')
+             for stat in ('t', *ROLLUP_STATS)}
+            for seconds in rollups['seconds']
+        ]
+
+    @property
+    def value_columns(self):
+        return [col for col in self.columns if col != self.time_column]
+
+    def is_current(self, csv_path):
+        """True if the store was built from the CSV as it is now, by this version of the code"""
+        return self.meta.get('version') == STORE_VERSION and self.meta['source_key'] == _source_key(csv_path)
+
+    def extent(self):
+        """(first, last) timestamp, or None if the store is empty"""
+        if self.n_rows == 0:
+            return None
+        return pd.Timestamp(int(self.t[0]), unit=TIME_UNIT), pd.Timestamp(int(self.t[-1]), unit=TIME_UNIT)
+
+    def window(self, start=None, end=None):
+        """Row slice covering [start, end) found by binary search"""
+        lo = 0 if start is None else int(np.searchsorted(self.t, _to_time(start), side='left'))
+        hi = self.n_rows if end is None else int(np.searchsorted(self.t, _to_time(end), side='left'))
+        return slice(lo, max(lo, hi))
+
+    def _check_columns(self, columns):
+        columns = self.value_columns if columns is None else list(columns)
+        unknown = [col for col in columns if col not in self.columns or col == self.time_column]
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(unknown)}")
+        return columns
+
+    def _decode(self, col, values):
+        return self.dictionaries[col][values] if col in self.dictionaries else np.asarray(values)
+
+    def query(self, start=None, end=None, columns=None):
+        """
+        Raw rows in [start, end)
+
+        Args:
+            start, end: Timestamps, ISO strings or epoch seconds (None = open)
+            columns: Value columns to return (default: all)
+
+        Returns:
+            DataFrame with the timestamp column first
+        """
+        columns = self._check_columns(columns)
+        rows = self.window(start, end)
+
+        data = {self.time_column: pd.to_datetime(np.asarray(self.t[rows]), unit=TIME_UNIT)}
+        for col in columns:
+            data[col] = self._decode(col, self.columns[col][rows])
+        return pd.DataFrame(data)
+
+    def _raw_part(self, lo, hi, columns):
+        """Rows in [lo, hi) microseconds as single-row partial aggregates"""
+        rows = slice(int(np.searchsorted(self.t, lo, side='left')), int(np.searchsorted(self.t, hi, side='left')))
+        values = np.column_stack([np.asarray(self.columns[col][rows], dtype=np.float64) for col in columns]) \
+            if columns else np.empty((rows.stop - rows.start, 0))
+        return np.asarray(self.t[rows]), np.ones(len(values), dtype=np.int64), values, values, values
+
+    def _rollup_part(self, level, lo, hi, column_index):
+        """Rollup buckets of one level starting in [lo, hi) microseconds"""
+        rollup = self.rollups[level]
+        rows = slice(int(np.searchsorted(rollup['t'], lo, side='left')),
+                     int(np.searchsorted(rollup['t'], hi, side='left')))
+        return (np.asarray(rollup['t'][rows]), np.asarray(rollup['count'][rows]),
+                *(np.asarray(rollup[stat][rows])[:, column_index] for stat in ('sum', 'min', 'max')))
+
+    def _parts(self, lo, hi, level, columns, column_index):
+        """
+        Partial aggregates covering [lo, hi) in time order
+
+        The span aligned to this level's width is read from its rollup; the
+        unaligned head and tail (each shorter than one width) recurse into
+        finer levels, down to raw rows.
+        """
+        if lo >= hi:
+            return []
+        if level < 0:
+            return [self._raw_part(lo, hi, columns)]
+
+        width = self.rollup_widths[level]
+        aligned_lo, aligned_hi = -(-lo // width) * width, hi // width * width
+        if aligned_lo >= aligned_hi:
+            return self._parts(lo, hi, level - 1, columns, column_index)
+        return [*self._parts(lo, aligned_lo, level - 1, columns, column_index),
+                self._rollup_part(level, aligned_lo, aligned_hi, column_index),
+                *self._parts(aligned_hi, hi, level - 1, columns, column_index)]
+
+    def _bounds(self, start, end):
+        """[start, end) in microseconds, open ends clamped to the stored rows"""
+        lo = _to_time(start) if start is not None else (int(self.t[0]) if self.n_rows else 0)
+        hi = _to_time(end) if end is not None else (int(self.t[-1]) + 1 if self.n_rows else 0)
+        return lo, hi
+
+    @staticmethod
+    def _bucket_us(bucket_seconds):
+        bucket_us = int(bucket_seconds * 1_000_000)
+        if bucket_us <= 0:
+            raise ValueError("bucket_seconds must be at least one microsecond")
+        return bucket_us
+
+    def bucket_count(self, start=None, end=None, bucket_seconds=60):
+        """Upper bound on the buckets aggregate() returns for [start, end) (without reading any rows)"""
+        bucket_us = self._bucket_us(bucket_seconds)
+        lo, hi = self._bounds(start, end)
+        return max(0, (hi - 1) // bucket_us - lo // bucket_us + 1) if hi > lo else 0
+
+    def aggregate(self, start=None, end=None, bucket_seconds=60, columns=None, aggregations=AGGREGATIONS):
+        """
+        Per-bucket aggregates of the rows in [start, end)
+
+        Buckets are aligned to the epoch and only non-empty buckets are
+        returned. Dictionary-encoded columns cannot be aggregated (the
+        default is every numeric column).
+
+        When bucket_seconds is a multiple of a rollup width, whole rollup
+        buckets are combined and only rows at unaligned window edges are
+        read, so the cost follows the number of buckets rather than rows
+        (means may differ from a raw reduction by float rounding).
+
+        Returns:
+            DataFrame with one row per bucket: bucket start, row count and
+            <column>_<aggregation> for each column and aggregation
+        """
+        if columns is None:
+            columns = [col for col in self.value_columns if col not in self.dictionaries]
+        columns = self._check_columns(columns)
+        encoded = [col for col in columns if col in self.dictionaries]
+        if encoded:
+            raise ValueError(f"Cannot aggregate categorical columns: {', '.join(encoded)}")
+        unknown = [agg for agg in aggregations if agg not in AGGREGATIONS]
+        if unknown:
+            raise ValueError(f"Unknown aggregations: {', '.join(unknown)}")
+        bucket_us = self._bucket_us(bucket_seconds)
+        lo, hi = self._bounds(start, end)
+
+        # Coarsest rollup level whose width divides the bucket (finer levels divide it too)
+        level = -1
+        if all(col in self.rollup_columns for col in columns):
+            level = max((i for i, width in enumerate(self.rollup_widths) if bucket_us % width == 0), default=-1)
+        column_index = [self.rollup_columns.index(col) for col in columns] if level >= 0 else None
+
+        # Parts are in time order, so each output bucket is a contiguous run of partial rows
+        parts = self._parts(lo, hi, level, columns, column_index) or [self._raw_part(lo, lo, columns)]
+        times, count, total, low, high = (np.concatenate(arrays) for arrays in zip(*parts))
+        bucket, count, total, low, high = _reduce_runs(times // bucket_us, count, total, low, high)
+
+        result = {
+            self.time_column: pd.to_datetime(bucket * bucket_us, unit=TIME_UNIT),
+            'count': count,
+        }
+        for j, col in enumerate(columns):
+            for agg in aggregations:
+                if agg == 'mean':
+                    result[f'{col}_{agg}'] = total[:, j] / count
+                elif agg == 'min':
+                    result[f'{col}_{agg}'] = low[:, j]
+                else:
+                    result[f'{col}_{agg}'] = high[:, j]
+        return pd.DataFrame(result)
+
+
+def open_store(csv_path, store_dir, rebuild=False):
+    """Open the store for a CSV, (re)building it first if missing or out of date"""
+    store_dir = Path(store_dir)
+    if not rebuild and (store_dir / META_NAME).exists():
+        store = TimeSeriesStore(store_dir)
+        if store.is_current(csv_path):
+            return store
+    build_store(csv_path, store_dir)
+    return TimeSeriesStore(store_dir)
+
+
+if __name__ == "__main__":
+    import time
+
+    data_dir = Path(__file__).parent.parent / "data"
+    csv_path = data_dir / "raw" / "synthetic_5g_timeseries.csv"
+
+    start = time.perf_counter()
+    store = open_store(csv_path, data_dir / "processed" / "5g_timeseries_store", rebuild='--rebuild' in sys.argv)
+    print(f"   Opened in {time.perf_counter() - start:.2f}s")
+
+    first, last = store.extent()
+    window_start = first + (last - first) / 2
+    start = time.perf_counter()
+    rows = store.query(window_start, window_start + pd.Timedelta(hours=1), columns=['throughput_mbps'])
+    print(f"   1 hour of raw rows: {len(rows)} in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    start = time.perf_counter()
+    buckets = store.aggregate(first, last, bucket_seconds=3600, columns=['throughput_mbps', 'latency_ms'])
+    print(f"   Hourly buckets over everything: {len(buckets)} in {(time.perf_counter() - start) * 1000:.2f} ms")
@@ -0,0 +1,335 @@
+"""
+Model benchmark suite
+Trains each model on synthetic 5G data of several sizes and reports training
+time, peak memory, single-row predict latency (p50/p99) and batch
+throughput as JSON; --baseline compares against a stored run and flags
+regressions
+"""
+
+import argparse
+import contextlib
+import ctypes
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path (so this file also runs as a script)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.anomaly_detector import NetworkAnomalyDetector
+from ml.coverage_classifier import CoverageClassifier
+from ml.features import extract_features
+from ml.kpi_predictor import KPIPredictor, TENSORFLOW_AVAILABLE
+from scripts.create_synthetic_data import iter_synthetic_5g_chunks
+
+MODELS = ['anomaly_detector', 'coverage_classifier', 'kpi_predictor']
+DEFAULT_SIZES = ['10k', '1M', '10M']
+DEFAULT_OUTPUT = Path(__file__).parent.parent / "data" / "benchmarks" / "model_benchmark.json"
+
+# Fixed start so every run generates exactly the same rows
+DATA_START = pd.Timestamp('2024-01-01')
+DATA_SEED = 42
+
+# Metric -> True if larger is better (used by the baseline comparison)
+METRICS = {
+    'train_s': False,
+    'train_peak_mb': False,
+    'predict_p50_ms': False,
+    'predict_p99_ms': False,
+    'batch_rows_per_s': True,
+}
+
+
+def parse_size(text):
+    """'10k' / '1M' / '2500' -> number of rows"""
+    text = str(text).strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000, 'b': 1_000_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('kmb')) * scale)
+
+
+def make_dataset(n_rows, seed=DATA_SEED):
+    """Deterministic synthetic 5G dataset (time-ordered, as the KPI predictor needs)"""
+    chunks = iter_synthetic_5g_chunks(n_samples=n_rows, seed=seed, start_date=DATA_START)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _current_rss_bytes():
+    """Resident set size of this process (peak RSS where the current value is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def _release_free_memory():
+    """Return freed heap pages to the OS (glibc only) so RSS starts from live data"""
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class PeakMemory:
+    """
+    Track the peak RSS of this process while the block runs
+
+    A background thread samples RSS, which (unlike tracemalloc) sees
+    native allocations in sklearn/TensorFlow and does not slow down the
+    code being measured.
+    """
+
+    def __init__(self, interval_s=0.005):
+        self.interval_s = interval_s
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval_s):
+            self.peak = max(self.peak, _current_rss_bytes())
+
+    def __enter__(self):
+        _release_free_memory()
+        self.baseline = self.peak = _current_rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss_bytes())
+
+    @property
+    def increase_mb(self):
+        return (self.peak - self.baseline) / 2**20
+
+
+def _latency_ms(predict, inputs, warmup=20):
+    """p50/p99 of single-call latency over a list of inputs, in milliseconds"""
+    for x in inputs[:warmup]:
+        predict(x)
+
+    samples = []
+    for x in inputs:
+        start = time.perf_counter()
+        predict(x)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 99))
+
+
+def _throughput(predict, batch, n_rows, repeats=3):
+    """Median rows per second of predict(batch) over a few repeats"""
+    predict(batch)
+    rates = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(batch)
+        rates.append(n_rows / (time.perf_counter() - start))
+    return statistics.median(rates)
+
+
+def _train(model_name, df, n_jobs, kpi_epochs):
+    """Build and train one model the way ml/train_all.py does"""
+    if model_name == 'anomaly_detector':
+        model = NetworkAnomalyDetector(contamination=0.05, n_jobs=n_jobs)
+        model.train(df)
+
+    elif model_name == 'coverage_classifier':
+        model = CoverageClassifier(n_estimators=100, n_jobs=n_jobs)
+        model.train(df)
+
+    else:
+        model = KPIPredictor(sequence_length=50, use_lstm=TENSORFLOW_AVAILABLE)
+        model.train(df, target_col='throughput_mbps', epochs=kpi_epochs)
+
+    return model
+
+
+def benchmark_model(model_name, n_rows, n_jobs=None, kpi_epochs=1, latency_calls=1000, batch_rows=100_000,
+                    seed=DATA_SEED):
+    """
+    Train one model on n_rows synthetic rows and time its predict path
+
+    Meant to run in a fresh process (see run_benchmarks) so peak memory is
+    not inflated by earlier runs.
+
+    Returns:
+        Dict of metric -> value (see METRICS), plus notes
+    """
+    df = make_dataset(n_rows, seed=seed)
+    result = {'model': model_name, 'rows': n_rows}
+
+    # Training (its console report is not part of the benchmark output)
+    with PeakMemory() as memory, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        model = _train(model_name, df, n_jobs, kpi_epochs)
+        result['train_s'] = time.perf_counter() - start
+    result['train_peak_mb'] = memory.increase_mb
+    result['process_peak_mb'] = memory.peak / 2**20
+
+    rng = np.random.default_rng(seed)
+    batch_rows = min(batch_rows, n_rows)
+
+    if model_name == 'kpi_predictor':
+        # One window per prediction: the last sequence_length feature rows
+        features = extract_features(df)
+        seq = model.sequence_length
+        windows = np.lib.stride_tricks.sliding_window_view(features, seq, axis=0).transpose(0, 2, 1)
+        picks = rng.integers(0, len(windows), size=latency_calls)
+        result['predict_p50_ms'], result['predict_p99_ms'] = _latency_ms(model.predict, [windows[i] for i in picks])
+
+        batch = np.ascontiguousarray(windows[:batch_rows])
+        result['batch_rows_per_s'] = _throughput(model.predict_many, batch, len(batch))
+        if not model.use_lstm:
+            result['note'] = "TensorFlow not available: moving-average baseline"
+    else:
+        picks = rng.integers(0, n_rows, size=latency_calls)
+        rows = [df.iloc[[i]] for i in picks]
+        result['predict_p50_ms'], result['predict_p99_ms'] = _latency_ms(model.predict, rows)
+
+        batch = df.iloc[:batch_rows]
+        result['batch_rows_per_s'] = _throughput(model.predict, batch, len(batch))
+
+    return result
+
+
+def environment():
+    """Interpreter, library versions and host info recorded with every run"""
+    import sklearn
+
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+        'tensorflow': None,
+    }
+    if TENSORFLOW_AVAILABLE:
+        import tensorflow as tf
+        info['tensorflow'] = tf.__version__
+    return info
+
+
+def run_benchmarks(sizes, models=MODELS, **options):
+    """
+    Benchmark every model at every size, each in its own process
+
+    Args:
+        sizes: Row counts to benchmark
+        models: Model names (see MODELS)
+        **options: Passed to benchmark_model
+
+    Returns:
+        Dict with 'environment', 'options' and a list of 'results'
+    """
+    # spawn: TensorFlow and sklearn thread pools are not fork-safe
+    context = multiprocessing.get_context('spawn')
+    results = []
+
+    for n_rows in sizes:
+        for model_name in models:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(benchmark_model, model_name, n_rows, **options).result()
+            print(f"  {model_name:<20} {n_rows:>10,} rows: train {result['train_s']:8.2f}s "
+                  f"(+{result['train_peak_mb']:.0f} MB), p50 {result['predict_p50_ms']:.3f} ms, "
+                  f"p99 {result['predict_p99_ms']:.3f} ms, {result['batch_rows_per_s']:,.0f} rows/s")
+            results.append(result)
+
+    return {'environment': environment(), 'options': options, 'results': results}
+
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    Flag metrics that got worse than the baseline by more than tolerance
+
+    Results are matched on (model, rows); runs only in one of the files are
+    skipped.
+
+    Returns:
+        List of regression dicts (model, rows, metric, baseline, current, change)
+    """
+    previous = {(r['model'], r['rows']): r for r in baseline['results']}
+    regressions = []
+
+    for result in current['results']:
+        reference = previous.get((result['model'], result['rows']))
+        if reference is None:
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            old, new = reference.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({
+                    'model': result['model'],
+                    'rows': result['rows'],
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change': change,
+                })
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model training and prediction")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="Dataset sizes, e.g. 10k 1M 10M")
+    parser.add_argument('--models', nargs='+', default=MODELS, choices=MODELS)
+    parser.add_argument('--n-jobs', type=int, default=None, help="n_jobs for the sklearn models")
+    parser.add_argument('--kpi-epochs', type=int, default=1, help="LSTM epochs (training time scales linearly)")
+    parser.add_argument('--latency-calls', type=int, default=1000, help="Single-row predictions per model")
+    parser.add_argument('--batch-rows', type=int, default=100_000, help="Rows per batch-throughput call")
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', type=Path, help="Earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes]
+
+    print("=" * 60)
+    print(f"Model Benchmark ({', '.join(f'{n:,}' for n in sizes)} rows)")
+    print("=" * 60)
+
+    report = run_benchmarks(sizes, args.models, n_jobs=args.n_jobs, kpi_epochs=args.kpi_epochs,
+                            latency_calls=args.latency_calls, batch_rows=args.batch_rows)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), tolerance=args.tolerance)
+
+        if regressions:
+            print(f"\n🚨 {len(regressions)} regression(s) vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for r in regressions:
+                print(f"  {r['model']:<20} {r['rows']:>10,} rows  {r['metric']:<17} "
+                      f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.0%})")
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
@@ -0,0 +1,102 @@
+"""
+Startup benchmark for the Gradio backend
+Starts the app in a fresh process and reports time-to-first-request:
+until the server answers HTTP, until models are loaded (/ready) and until
+the first anomaly prediction returns
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+APP_PATH = Path(__file__).parent.parent / "gradio-app" / "app.py"
+
+# Feature row for the first prediction (rsrp, rsrq, sinr, cqi, throughput, latency, packet_loss)
+SAMPLE_ROW = [-85, -10, 15, 10, 200, 15, 0.5]
+
+
+def _request(url, payload=None, timeout=5.0):
+    """Return the HTTP status of a GET (or JSON POST when payload is given); 0 if unreachable"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return 0
+
+
+def _wait_for(url, start, deadline, payload=None, poll_s=0.01):
+    """Poll url until it returns 200; return seconds since start"""
+    while time.perf_counter() < deadline:
+        if _request(url, payload) == 200:
+            return time.perf_counter() - start
+        time.sleep(poll_s)
+    raise TimeoutError(f"{url} did not become available")
+
+
+def measure_startup(port=7861, warmup=True, timeout_s=120.0):
+    """
+    Start the app once and time its first responses
+
+    Returns:
+        Dict of milestone -> seconds since the process was started
+    """
+    env = dict(os.environ, PORT=str(port), WARMUP='1' if warmup else '0', PYTHONUNBUFFERED='1')
+    base_url = f"http://127.0.0.1:{port}"
+
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, str(APP_PATH)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = start + timeout_s
+
+    try:
+        timings = {'first_http': _wait_for(f"{base_url}/health", start, deadline)}
+        if warmup:
+            timings['ready'] = _wait_for(f"{base_url}/ready", start, deadline)
+        timings['first_prediction'] = _wait_for(f"{base_url}/api/detect_anomalies", start, deadline,
+                                                payload={'data': SAMPLE_ROW})
+    finally:
+        process.terminate()
+        process.wait()
+
+    return timings
+
+
+def benchmark_startup(runs=5, port=7861, warmup=True):
+    """Repeat measure_startup and return the median of each milestone"""
+    results = []
+    for run in range(runs):
+        timings = measure_startup(port=port, warmup=warmup)
+        print(f"  run {run + 1}: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+        results.append(timings)
+
+    return {key: statistics.median(r[key] for r in results) for key in results[0]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure backend time-to-first-request")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--port', type=int, default=7861)
+    parser.add_argument('--no-warmup', action='store_true', help="Load models on the first request instead")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Backend Startup Benchmark ({args.runs} runs, warm-up {'off' if args.no_warmup else 'on'})")
+    print("=" * 60)
+
+    medians = benchmark_startup(runs=args.runs, port=args.port, warmup=not args.no_warmup)
+
+    print("\nMedian time since process start:")
+    for milestone, seconds in medians.items():
+        print(f"  {milestone:<18} {seconds:8.2f}s")
@@ -7,6 +7,12 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.quadkey import latlon_to_tile, tile_centroid, tile_to_quadkey
 
 # Data directories
 RAW_DATA_DIR = Path(__file__).parent.parent / "data" / "raw"
@@ -14,7 +20,113 @@ PROCESSED_DATA_DIR = Path(__file__).parent.parent / "data" / "processed"
 RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
 PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-def create_synthetic_ookla_data(n_samples=10000):
+# Major cities with different network performance characteristics
+CITIES = {
+    'NYC': {'lat_base': 40.7128, 'lon_base': -74.0060, 'quality': 'high'},
+    'LA': {'lat_base': 34.0522, 'lon_base': -118.2437, 'quality': 'high'},
+    'Chicago': {'lat_base': 41.8781, 'lon_base': -87.6298, 'quality': 'medium'},
+    'Houston': {'lat_base': 29.7604, 'lon_base': -95.3698, 'quality': 'medium'},
+    'Rural_TX': {'lat_base': 31.9686, 'lon_base': -99.9018, 'quality': 'low'},
+    'Rural_MT': {'lat_base': 46.8797, 'lon_base': -110.3626, 'quality': 'low'},
+}
+
+# Network quality tiers; normal params are (mean, std)
+QUALITY_PARAMS = {
+    'high':   {'avg_d_kbps': (150000, 30000), 'avg_u_kbps': (50000, 10000), 'avg_lat_ms': (15, 5)},   # ~150 Mbps
+    'medium': {'avg_d_kbps': (80000, 20000), 'avg_u_kbps': (30000, 8000), 'avg_lat_ms': (25, 8)},     # ~80 Mbps
+    'low':    {'avg_d_kbps': (25000, 10000), 'avg_u_kbps': (10000, 5000), 'avg_lat_ms': (45, 15)},    # ~25 Mbps
+}
+
+
+def make_synthetic_regions(n_regions, seed=42):
+    """
+    Create n_regions synthetic regions scattered over the continental US
+
+    Useful for national-scale benchmarks where the six CITIES are too few.
+    """
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(25.0, 49.0, n_regions)
+    lons = rng.uniform(-124.0, -67.0, n_regions)
+    qualities = rng.choice(list(QUALITY_PARAMS), size=n_regions, p=[0.3, 0.4, 0.3])
+
+    return {
+        f"Region_{i:04d}": {'lat_base': float(lat), 'lon_base': float(lon), 'quality': str(quality)}
+        for i, (lat, lon, quality) in enumerate(zip(lats, lons, qualities))
+    }
+
+
+def _generate_ookla_region(rng, city, props, n_tiles, year, quarter, radius_deg=0.5):
+    """
+    Generate one region/quarter of zoom-16 tiles with array operations
+
+    Tiles are drawn without replacement from the region's bounding box, so
+    every quadkey is unique within a quarter, and lat/lon are tile centroids.
+    """
+    # Candidate zoom-16 tiles covering the region's bounding box
+    x0, y0 = latlon_to_tile(props['lat_base'] + radius_deg, props['lon_base'] - radius_deg)
+    x1, y1 = latlon_to_tile(props['lat_base'] - radius_deg, props['lon_base'] + radius_deg)
+    width, height = int(x1 - x0 + 1), int(y1 - y0 + 1)
+
+    n_tiles = min(n_tiles, width * height)
+    cells = rng.choice(width * height, size=n_tiles, replace=False)
+    tile_x = x0 + cells % width
+    tile_y = y0 + cells // width
+    lat, lon = tile_centroid(tile_x, tile_y)
+
+    # Network quality based on city type
+    params = QUALITY_PARAMS[props['quality']]
+    download = rng.normal(*params['avg_d_kbps'], size=n_tiles)
+    upload = rng.normal(*params['avg_u_kbps'], size=n_tiles)
+    latency = rng.normal(*params['avg_lat_ms'], size=n_tiles)
+
+    # Add some outliers/anomalies (5% of data)
+    outliers = rng.random(n_tiles) < 0.05
+    download = np.where(outliers, download * rng.uniform(0.1, 0.5, n_tiles), download)  # Degraded performance
+    latency = np.where(outliers, latency * rng.uniform(2, 5, n_tiles), latency)          # High latency
+
+    return pd.DataFrame({
+        'tile': city + '_' + np.arange(n_tiles).astype(str).astype(object),
+        'quadkey': tile_to_quadkey(tile_x, tile_y),
+        'avg_d_kbps': np.maximum(1000, download),
+        'avg_u_kbps': np.maximum(500, upload),
+        'avg_lat_ms': np.maximum(1, latency),
+        'tests': rng.integers(10, 500, n_tiles),
+        'devices': rng.integers(5, 200, n_tiles),
+        'lat': lat,
+        'lon': lon,
+        'city': city,
+        'quality': props['quality'],
+        'year': year,
+        'quarter': quarter,
+    })
+
+
+def write_ookla_partition(df, parquet_dir, data_type='mobile'):
+    """
+    Write one region/quarter of tiles to a hive-partitioned Parquet dataset
+
+    Layout mirrors Ookla Open Data with an extra region level:
+    type=mobile/year=2024/quarter=1/city=NYC/part-0.parquet
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    year, quarter, city = df['year'].iat[0], df['quarter'].iat[0], df['city'].iat[0]
+    partition_dir = Path(parquet_dir) / f"type={data_type}" / f"year={year}" / f"quarter={quarter}" / f"city={city}"
+    partition_dir.mkdir(parents=True, exist_ok=True)
+
+    # Sorted by quadkey like the published files, so row-group stats prune spatially
+    table = pa.Table.from_pandas(
+        df.drop(columns=['year', 'quarter', 'city']).sort_values('quadkey'),
+        preserve_index=False
+    )
+    output_file = partition_dir / "part-0.parquet"
+    pq.write_table(table, output_file)
+    return output_file
+
+
+def create_synthetic_ookla_data(n_samples=10000, regions=None, quarters=((2024, 1),), seed=42,
+                                output_file=None, parquet_dir=None, return_df=True):
     """
     Create synthetic network performance data similar to Ookla format
 
@@ -24,76 +136,160 @@ def create_synthetic_ookla_data(n_samples=10000):
     - avg_lat_ms: Average latency (ms)
     - tests: Number of tests
     - devices: Number of devices
-    - quadkey: Geographic quadkey
+    - quadkey: Zoom-16 quadkey of the tile containing lat/lon
+
+    Each region/quarter is generated with array operations and written out
+    before the next one, so millions of tiles across many regions fit in
+    bounded memory. Pass return_df=False for large runs.
+
+    Args:
+        n_samples: Tiles per quarter, split evenly across regions
+        regions: Mapping of region name to lat_base/lon_base/quality (defaults to CITIES)
+        quarters: Iterable of (year, quarter) tuples to generate
+        seed: Random seed
+        output_file: CSV path (defaults to data/raw); pass False to skip the CSV
+        parquet_dir: Optional root of a Parquet dataset partitioned by quarter and region
+        return_df: Return the full DataFrame (only sensible for small runs)
     """
     print("🔧 Creating synthetic Ookla-style data...")
 
-    np.random.seed(42)
+    rng = np.random.default_rng(seed)
+    regions = regions or CITIES
+    samples_per_city = n_samples // len(regions)
 
-    # Major cities with different network performance characteristics
-    cities = {
-        'NYC': {'lat_base': 40.7128, 'lon_base': -74.0060, 'quality': 'high'},
-        'LA': {'lat_base': 34.0522, 'lon_base': -118.2437, 'quality': 'high'},
-        'Chicago': {'lat_base': 41.8781, 'lon_base': -87.6298, 'quality': 'medium'},
-        'Houston': {'lat_base': 29.7604, 'lon_base': -95.3698, 'quality': 'medium'},
-        'Rural_TX': {'lat_base': 31.9686, 'lon_base': -99.9018, 'quality': 'low'},
-        'Rural_MT': {'lat_base': 46.8797, 'lon_base': -110.3626, 'quality': 'low'},
-    }
+    if output_file is None:
+        output_file = RAW_DATA_DIR / "synthetic_ookla_mobile_tiles.csv"
 
-    data = []
-    samples_per_city = n_samples // len(cities)
-
-    for city, props in cities.items():
-        for _ in range(samples_per_city):
-            # Network quality based on city type
-            if props['quality'] == 'high':
-                download = np.random.normal(150000, 30000)  # ~150 Mbps
-                upload = np.random.normal(50000, 10000)     # ~50 Mbps
-                latency = np.random.normal(15, 5)           # ~15 ms
-            elif props['quality'] == 'medium':
-                download = np.random.normal(80000, 20000)   # ~80 Mbps
-                upload = np.random.normal(30000, 8000)      # ~30 Mbps
-                latency = np.random.normal(25, 8)           # ~25 ms
-            else:  # low
-                download = np.random.normal(25000, 10000)   # ~25 Mbps
-                upload = np.random.normal(10000, 5000)      # ~10 Mbps
-                latency = np.random.normal(45, 15)          # ~45 ms
-
-            # Add some outliers/anomalies (5% of data)
-            if np.random.random() < 0.05:
-                download *= np.random.uniform(0.1, 0.5)  # Degraded performance
-                latency *= np.random.uniform(2, 5)        # High latency
-
-            data.append({
-                'tile': f"{city}_{_}",
-                'quadkey': str(np.random.randint(1000000, 9999999)),
-                'avg_d_kbps': max(1000, download),
-                'avg_u_kbps': max(500, upload),
-                'avg_lat_ms': max(1, latency),
-                'tests': np.random.randint(10, 500),
-                'devices': np.random.randint(5, 200),
-                'lat': props['lat_base'] + np.random.uniform(-0.5, 0.5),
-                'lon': props['lon_base'] + np.random.uniform(-0.5, 0.5),
-                'city': city,
-                'quality': props['quality']
-            })
-
-    df = pd.DataFrame(data)
-
-    # Save to CSV (easier for demo without parquet dependencies)
-    output_file = RAW_DATA_DIR / "synthetic_ookla_mobile_tiles.csv"
-    df.to_csv(output_file, index=False)
-
-    print(f"✅ Created {len(df)} synthetic Ookla samples")
-    print(f"📁 Saved to: {output_file}")
+    frames = []
+    totals = {'rows': 0, 'avg_d_kbps': 0.0, 'avg_u_kbps': 0.0, 'avg_lat_ms': 0.0}
+    first_chunk = True
+
+    for year, quarter in quarters:
+        for city, props in regions.items():
+            df = _generate_ookla_region(rng, city, props, samples_per_city, year, quarter)
+
+            # CSV is easier for demo without parquet dependencies
+            if output_file:
+                df.to_csv(output_file, mode='w' if first_chunk else 'a', header=first_chunk, index=False)
+                first_chunk = False
+            if parquet_dir:
+                write_ookla_partition(df, parquet_dir)
+
+            totals['rows'] += len(df)
+            for col in ('avg_d_kbps', 'avg_u_kbps', 'avg_lat_ms'):
+                totals[col] += df[col].sum()
+
+            if return_df:
+                frames.append(df)
+
+    n_rows = max(totals['rows'], 1)
+    print(f"✅ Created {totals['rows']} synthetic Ookla samples")
+    if output_file:
+        print(f"📁 Saved to: {output_file}")
+    if parquet_dir:
+        print(f"📁 Partitioned Parquet written to: {parquet_dir}")
     print(f"\nSummary Statistics:")
-    print(f"  Avg Download: {df['avg_d_kbps'].mean()/1000:.1f} Mbps")
-    print(f"  Avg Upload: {df['avg_u_kbps'].mean()/1000:.1f} Mbps")
-    print(f"  Avg Latency: {df['avg_lat_ms'].mean():.1f} ms")
+    print(f"  Avg Download: {totals['avg_d_kbps'] / n_rows / 1000:.1f} Mbps")
+    print(f"  Avg Upload: {totals['avg_u_kbps'] / n_rows / 1000:.1f} Mbps")
+    print(f"  Avg Latency: {totals['avg_lat_ms'] / n_rows:.1f} ms")
+
+    if return_df:
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return output_file or parquet_dir
 
-    return df
+# Per-scenario KPI distributions for the 5G time-series generator.
+# Order matches SCENARIO_PROBS; normal params are (mean, std), CQI is [low, high).
+SCENARIOS = np.array(['excellent', 'good', 'fair', 'poor', 'anomaly'])
+SCENARIO_PROBS = np.array([0.3, 0.4, 0.2, 0.08, 0.02])
+SCENARIO_PARAMS = {
+    'rsrp_dbm':        np.array([(-70, 5), (-85, 5), (-100, 5), (-115, 5), (-125, 10)], dtype=float),
+    'rsrq_db':         np.array([(-8, 2), (-11, 2), (-14, 2), (-17, 2), (-20, 3)], dtype=float),
+    'sinr_db':         np.array([(20, 3), (15, 3), (8, 3), (3, 2), (-5, 5)], dtype=float),
+    'throughput_mbps': np.array([(800, 100), (400, 80), (150, 50), (50, 20), (5, 5)], dtype=float),
+    'latency_ms':      np.array([(10, 2), (15, 3), (25, 5), (40, 10), (200, 50)], dtype=float),
+    'packet_loss_pct': np.array([(0.5, 0.3), (0.5, 0.3), (0.5, 0.3), (0.5, 0.3), (5, 2)], dtype=float),
+}
+SCENARIO_CQI = np.array([(12, 16), (9, 13), (6, 10), (2, 7), (0, 4)])
+ANOMALY_SCENARIO = 4
 
-def create_synthetic_5g_timeseries(n_samples=50000, days=30):
+
+def _generate_5g_chunk(rng, start_ts, offset, size, n_cells=None):
+    """
+    Generate one chunk of synthetic 5G samples with array operations
+
+    Args:
+        rng: numpy Generator shared across chunks (keeps output seeded)
+        start_ts: pandas Timestamp of the first sample
+        offset: Index of the first sample in this chunk (seconds from start)
+        size: Number of samples in the chunk
+        n_cells: Optional number of cells; adds a 'cell_id' column when set
+    """
+    timestamps = start_ts + pd.to_timedelta(np.arange(offset, offset + size), unit='s')
+    hour = timestamps.hour.to_numpy()
+
+    # Time-based patterns (worse performance during peak hours)
+    is_peak = ((hour >= 8) & (hour <= 10)) | ((hour >= 17) & (hour <= 20))
+
+    # Simulate different network scenarios
+    scenario = rng.choice(len(SCENARIOS), size=size, p=SCENARIO_PROBS)
+
+    kpis = {}
+    for col, params in SCENARIO_PARAMS.items():
+        kpis[col] = rng.normal(params[scenario, 0], params[scenario, 1])
+    cqi = rng.integers(SCENARIO_CQI[scenario, 0], SCENARIO_CQI[scenario, 1])
+
+    # Peak hour degradation
+    kpis['throughput_mbps'] = np.where(is_peak, kpis['throughput_mbps'] * 0.7, kpis['throughput_mbps'])
+    kpis['latency_ms'] = np.where(is_peak, kpis['latency_ms'] * 1.3, kpis['latency_ms'])
+
+    chunk = pd.DataFrame({
+        'timestamp': timestamps,
+        'rsrp_dbm': kpis['rsrp_dbm'],
+        'rsrq_db': kpis['rsrq_db'],
+        'sinr_db': kpis['sinr_db'],
+        'cqi': np.clip(cqi, 0, 15),
+        'throughput_mbps': np.maximum(0, kpis['throughput_mbps']),
+        'latency_ms': np.maximum(1, kpis['latency_ms']),
+        'packet_loss_pct': np.maximum(0, kpis['packet_loss_pct']),
+        'scenario': SCENARIOS[scenario],
+        'hour': hour,
+        'is_anomaly': (scenario == ANOMALY_SCENARIO).astype(int)
+    })
+
+    if n_cells:
+        chunk['cell_id'] = rng.integers(0, n_cells, size=size)
+
+    return chunk
+
+
+def iter_synthetic_5g_chunks(n_samples=50000, days=30, chunk_size=1_000_000, seed=42,
+                             n_cells=None, start_date=None):
+    """
+    Yield synthetic 5G time-series data as DataFrame chunks
+
+    Memory use is bounded by chunk_size regardless of n_samples, and the
+    output is fully determined by seed, n_samples and chunk_size.
+
+    Args:
+        n_samples: Total number of per-second samples
+        days: Days of history (the series starts this far in the past)
+        chunk_size: Rows generated per chunk
+        seed: Random seed
+        n_cells: Optional number of cells; adds a 'cell_id' column when set
+        start_date: Optional start datetime (defaults to now - days)
+    """
+    rng = np.random.default_rng(seed)
+    if start_date is None:
+        start_date = datetime.now() - timedelta(days=days)
+    start_ts = pd.Timestamp(start_date)
+
+    for offset in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - offset)
+        yield _generate_5g_chunk(rng, start_ts, offset, size, n_cells=n_cells)
+
+
+def create_synthetic_5g_timeseries(n_samples=50000, days=30, chunk_size=1_000_000, seed=42,
+                                   n_cells=None, output_file=None, return_df=True):
     """
     Create synthetic 5G network time-series data similar to Irish 5G dataset
 
@@ -104,96 +300,66 @@ def create_synthetic_5g_timeseries(n_samples=50000, days=30):
     - CQI: Channel Quality Indicator (0-15)
     - Throughput: Download throughput (Mbps)
     - Latency: Round-trip time (ms)
+
+    Data is generated and written chunk by chunk, so load-test datasets of
+    hundreds of millions of rows can be produced with bounded memory. Pass
+    return_df=False for large runs; the output path is returned instead.
+
+    Args:
+        n_samples: Total number of per-second samples
+        days: Days of history (the series starts this far in the past)
+        chunk_size: Rows generated and written per chunk
+        seed: Random seed
+        n_cells: Optional number of cells; adds a 'cell_id' column when set
+        output_file: Output path (.csv or .parquet); defaults to data/raw
+        return_df: Return the full DataFrame (only sensible for small runs)
     """
     print("\n🔧 Creating synthetic 5G time-series data...")
 
-    np.random.seed(42)
-
-    # Generate timestamps over 30 days
-    start_date = datetime.now() - timedelta(days=days)
-    timestamps = [start_date + timedelta(seconds=x) for x in range(n_samples)]
-
-    data = []
-
-    for i, ts in enumerate(timestamps):
-        # Time-based patterns (worse performance during peak hours)
-        hour = ts.hour
-        is_peak = 8 <= hour <= 10 or 17 <= hour <= 20
-
-        # Simulate different network scenarios
-        scenario = np.random.choice(['excellent', 'good', 'fair', 'poor', 'anomaly'],
-                                   p=[0.3, 0.4, 0.2, 0.08, 0.02])
-
-        if scenario == 'excellent':
-            rsrp = np.random.normal(-70, 5)
-            rsrq = np.random.normal(-8, 2)
-            sinr = np.random.normal(20, 3)
-            cqi = np.random.randint(12, 16)
-            throughput = np.random.normal(800, 100)
-            latency = np.random.normal(10, 2)
-        elif scenario == 'good':
-            rsrp = np.random.normal(-85, 5)
-            rsrq = np.random.normal(-11, 2)
-            sinr = np.random.normal(15, 3)
-            cqi = np.random.randint(9, 13)
-            throughput = np.random.normal(400, 80)
-            latency = np.random.normal(15, 3)
-        elif scenario == 'fair':
-            rsrp = np.random.normal(-100, 5)
-            rsrq = np.random.normal(-14, 2)
-            sinr = np.random.normal(8, 3)
-            cqi = np.random.randint(6, 10)
-            throughput = np.random.normal(150, 50)
-            latency = np.random.normal(25, 5)
-        elif scenario == 'poor':
-            rsrp = np.random.normal(-115, 5)
-            rsrq = np.random.normal(-17, 2)
-            sinr = np.random.normal(3, 2)
-            cqi = np.random.randint(2, 7)
-            throughput = np.random.normal(50, 20)
-            latency = np.random.normal(40, 10)
-        else:  # anomaly
-            rsrp = np.random.normal(-125, 10)
-            rsrq = np.random.normal(-20, 3)
-            sinr = np.random.normal(-5, 5)
-            cqi = np.random.randint(0, 4)
-            throughput = np.random.normal(5, 5)
-            latency = np.random.normal(200, 50)
-
-        # Peak hour degradation
-        if is_peak:
-            throughput *= 0.7
-            latency *= 1.3
-
-        data.append({
-            'timestamp': ts,
-            'rsrp_dbm': rsrp,
-            'rsrq_db': rsrq,
-            'sinr_db': sinr,
-            'cqi': int(np.clip(cqi, 0, 15)),
-            'throughput_mbps': max(0, throughput),
-            'latency_ms': max(1, latency),
-            'packet_loss_pct': max(0, np.random.normal(0.5, 0.3) if scenario != 'anomaly' else np.random.normal(5, 2)),
-            'scenario': scenario,
-            'hour': hour,
-            'is_anomaly': 1 if scenario == 'anomaly' else 0
-        })
-
-    df = pd.DataFrame(data)
-
-    # Save to CSV (5G dataset format)
-    output_file = RAW_DATA_DIR / "synthetic_5g_timeseries.csv"
-    df.to_csv(output_file, index=False)
-
-    print(f"✅ Created {len(df)} synthetic 5G samples over {days} days")
+    output_file = Path(output_file) if output_file else RAW_DATA_DIR / "synthetic_5g_timeseries.csv"
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    use_parquet = output_file.suffix == '.parquet'
+
+    chunks = []
+    parquet_writer = None
+    totals = {'rows': 0, 'rsrp_dbm': 0.0, 'throughput_mbps': 0.0, 'latency_ms': 0.0, 'is_anomaly': 0}
+
+    try:
+        for i, chunk in enumerate(iter_synthetic_5g_chunks(n_samples, days, chunk_size, seed, n_cells)):
+            # Save chunk (5G dataset format)
+            if use_parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(output_file, table.schema)
+                parquet_writer.write_table(table)
+            else:
+                chunk.to_csv(output_file, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+            totals['rows'] += len(chunk)
+            for col in ('rsrp_dbm', 'throughput_mbps', 'latency_ms', 'is_anomaly'):
+                totals[col] += chunk[col].sum()
+
+            if return_df:
+                chunks.append(chunk)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+    n_rows = max(totals['rows'], 1)
+    print(f"✅ Created {totals['rows']} synthetic 5G samples over {days} days")
     print(f"📁 Saved to: {output_file}")
     print(f"\nSummary Statistics:")
-    print(f"  Avg RSRP: {df['rsrp_dbm'].mean():.1f} dBm")
-    print(f"  Avg Throughput: {df['throughput_mbps'].mean():.1f} Mbps")
-    print(f"  Avg Latency: {df['latency_ms'].mean():.1f} ms")
-    print(f"  Anomalies: {df['is_anomaly'].sum()} ({df['is_anomaly'].mean()*100:.1f}%)")
+    print(f"  Avg RSRP: {totals['rsrp_dbm'] / n_rows:.1f} dBm")
+    print(f"  Avg Throughput: {totals['throughput_mbps'] / n_rows:.1f} Mbps")
+    print(f"  Avg Latency: {totals['latency_ms'] / n_rows:.1f} ms")
+    print(f"  Anomalies: {totals['is_anomaly']} ({totals['is_anomaly'] / n_rows * 100:.1f}%)")
 
-    return df
+    if return_df:
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    return output_file
 
 if __name__ == "__main__":
     print("=" * 60)
@@ -202,7 +368,7 @@ if __name__ == "__main__":
 
     # Create both datasets
     ookla_df = create_synthetic_ookla_data(n_samples=10000)
-    fiveg_df = create_synthetic_5g_timeseries(n_samples=50000, days=30)
+    fiveg_df = create_synthetic_5g_timeseries(n_samples=50000, days=30, n_cells=20)
 
     print("\n" + "=" * 60)
     print("✅ All synthetic data created successfully!")
@@ -1,83 +1,386 @@
 """
-Download Ookla Open Data from GitHub
-Ookla provides global network performance data in Parquet format
+Download Ookla Open Data and extract our regions' tiles
+Ookla publishes global network performance tiles as one Parquet file per
+quarter; files are fetched with concurrent ranged requests (resumable and
+checksummed), then read with column projection and row-group pruning so only
+tiles inside the region bounding boxes are decoded
 """
 
+import argparse
+import hashlib
+import json
 import os
-import requests
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import requests
 from tqdm import tqdm
 
-# Ookla GitHub repository base URL
-OOKLA_BASE_URL = "https://github.com/teamookla/ookla-open-data/raw/master/shapefiles/performance"
+# Add parent directory to path (so this file also runs as a script)
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from create_synthetic_data import CITIES
+from ml.quadkey import quadkey_to_code, quadkey_to_tile, tile_centroid
+from ml.spatial_index import bbox_tile_range, cover_tile_range
+
+# Ookla Open Data on AWS (public, supports HTTP range requests)
+OOKLA_BASE_URL = "https://ookla-open-data.s3.amazonaws.com/parquet/performance"
 
 # Data directories
 RAW_DATA_DIR = Path(__file__).parent.parent / "data" / "raw"
-RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-def download_file(url, destination):
-    """Download file with progress bar"""
-    response = requests.get(url, stream=True)
-    total_size = int(response.headers.get('content-length', 0))
-
-    with open(destination, 'wb') as file, tqdm(
-        desc=destination.name,
-        total=total_size,
-        unit='iB',
-        unit_scale=True,
-        unit_divisor=1024,
-    ) as pbar:
-        for data in response.iter_content(chunk_size=1024):
-            size = file.write(data)
-            pbar.update(size)
-
-def download_ookla_data(data_type="mobile", year="2024", quarter="Q1"):
+OOKLA_DOWNLOAD_DIR = RAW_DATA_DIR / "ookla"
+
+# Ranged download settings: a quarter (~1 GB) is fetched as PART_SIZE pieces over CONNECTIONS connections
+PART_SIZE = 16 * 1024 * 1024
+CONNECTIONS = 8
+CHUNK_SIZE = 1024 * 1024
+MAX_RETRIES = 4
+TIMEOUT = 60
+
+# Columns decoded from the Parquet files (skips the large WKT 'tile' polygons)
+TILE_COLUMNS = ['quadkey', 'avg_d_kbps', 'avg_u_kbps', 'avg_lat_ms', 'tests', 'devices']
+
+# Half-width (degrees) of the box around each region centre, as in create_synthetic_data
+REGION_RADIUS_DEG = 0.5
+
+# Download speed tiers (kbps) for the 'quality' label used by the dashboard
+QUALITY_THRESHOLDS_KBPS = {'high': 100_000, 'medium': 50_000}
+
+QUARTER_START = {1: '01-01', 2: '04-01', 3: '07-01', 4: '10-01'}
+
+
+class DownloadError(Exception):
+    """A download failed or its content did not match the expected checksum"""
+
+
+def ookla_url(data_type="mobile", year=2024, quarter=1, base_url=OOKLA_BASE_URL):
+    """URL of one quarter's tile file (type=mobile/year=2024/quarter=1/2024-01-01_performance_mobile_tiles.parquet)"""
+    filename = f"{year}-{QUARTER_START[int(quarter)]}_performance_{data_type}_tiles.parquet"
+    return f"{base_url}/type={data_type}/year={year}/quarter={int(quarter)}/{filename}"
+
+
+def region_bboxes(regions=None, radius_deg=REGION_RADIUS_DEG):
+    """(west, south, east, north) box around each region centre"""
+    regions = regions or CITIES
+    return {
+        name: (p['lon_base'] - radius_deg, p['lat_base'] - radius_deg, p['lon_base'] + radius_deg, p['lat_base'] + radius_deg)
+        for name, p in regions.items()
+    }
+
+
+def _file_digests(path):
+    """(sha256, md5) hex digests of a file"""
+    sha256, md5 = hashlib.sha256(), hashlib.md5()
+    with open(path, 'rb') as f:
+        while block := f.read(CHUNK_SIZE):
+            sha256.update(block)
+            md5.update(block)
+    return sha256.hexdigest(), md5.hexdigest()
+
+
+def _save_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _with_retries(fn, what):
+    for attempt in range(MAX_RETRIES):
+        try:
+            return fn()
+        except (requests.RequestException, DownloadError) as e:
+            if attempt == MAX_RETRIES - 1:
+                raise DownloadError(f"{what} failed after {MAX_RETRIES} attempts: {e}") from e
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def download_file(url, destination, expected_sha256=None, connections=CONNECTIONS, part_size=PART_SIZE,
+                  session=None, progress=True):
+    """
+    Download a file with concurrent HTTP range requests
+
+    The file is split into part_size pieces fetched over `connections`
+    connections into destination.part; finished parts are recorded in
+    destination.part.json, so an interrupted download resumes where it
+    stopped (unless the remote ETag or size changed). Servers without range
+    support are read in one stream.
+
+    The result is verified against expected_sha256 when given, and against
+    the ETag when it is a plain MD5 (single-part uploads); its SHA-256 is
+    stored in destination.sha256 so later runs skip verified files.
+
+    Returns:
+        Path of the downloaded file
+    """
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    part_path = destination.with_name(destination.name + '.part')
+    state_path = destination.with_name(destination.name + '.part.json')
+    checksum_path = destination.with_name(destination.name + '.sha256')
+    local = threading.local()
+
+    def get_session():
+        if session is not None:
+            return session
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    head = _with_retries(lambda: get_session().head(url, allow_redirects=True, timeout=TIMEOUT), f"HEAD {url}")
+    if head.status_code != 200:
+        raise DownloadError(f"HEAD {url} returned {head.status_code}")
+    size = int(head.headers.get('Content-Length', -1))
+    etag = head.headers.get('ETag', '').strip('"')
+    ranged = head.headers.get('Accept-Ranges') == 'bytes' and size > 0
+
+    # Already downloaded and verified
+    if destination.exists() and checksum_path.exists() and destination.stat().st_size == size:
+        if expected_sha256 is None or checksum_path.read_text().strip() == expected_sha256:
+            print(f"✅ {destination.name} already downloaded")
+            return destination
+
+    bar = tqdm(desc=destination.name, total=max(size, 0), unit='iB', unit_scale=True, unit_divisor=1024,
+               disable=not progress)
+
+    if ranged:
+        n_parts = -(-size // part_size)
+        state = _load_json(state_path)
+        if (state is None or not part_path.exists() or
+                [state['url'], state['size'], state['etag'], state['part_size']] != [url, size, etag, part_size]):
+            state = {'url': url, 'size': size, 'etag': etag, 'part_size': part_size, 'done': []}
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+        done = set(state['done'])
+        bar.update(sum(min(part_size, size - i * part_size) for i in done))
+        lock = threading.Lock()
+        fd = os.open(part_path, os.O_RDWR)
+
+        def fetch_part(index):
+            start = index * part_size
+            end = min(start + part_size, size) - 1
+
+            def attempt():
+                written = 0
+                try:
+                    with get_session().get(url, headers={'Range': f"bytes={start}-{end}"}, stream=True,
+                                           timeout=TIMEOUT) as r:
+                        if r.status_code != 206 or not r.headers.get('Content-Range', '').startswith(f"bytes {start}-{end}/"):
+                            raise DownloadError(f"Range {start}-{end} not honoured (status {r.status_code})")
+                        for block in r.iter_content(chunk_size=CHUNK_SIZE):
+                            os.pwrite(fd, block, start + written)
+                            written += len(block)
+                            bar.update(len(block))
+                    if written != end - start + 1:
+                        raise DownloadError(f"Range {start}-{end}: got {written} bytes")
+                except Exception:
+                    bar.update(-written)  # The part is fetched again from its start
+                    raise
+
+            _with_retries(attempt, f"Part {index} of {url}")
+            with lock:
+                done.add(index)
+                state['done'] = sorted(done)
+                _save_json(state_path, state)
+
+        try:
+            with ThreadPoolExecutor(max_workers=connections) as pool:
+                futures = [pool.submit(fetch_part, i) for i in range(n_parts) if i not in done]
+            # Every part is attempted before giving up, so a resumed run refetches only the failed ones
+            for future in futures:
+                future.result()
+        finally:
+            os.close(fd)
+            bar.close()
+    else:
+        def attempt():
+            bar.reset()
+            with get_session().get(url, stream=True, timeout=TIMEOUT) as r:
+                r.raise_for_status()
+                with open(part_path, 'wb') as f:
+                    for block in r.iter_content(chunk_size=CHUNK_SIZE):
+                        bar.update(f.write(block))
+
+        try:
+            _with_retries(attempt, f"GET {url}")
+        finally:
+            bar.close()
+
+    # Verify before the file takes its final name
+    sha256, md5 = _file_digests(part_path)
+    if size >= 0 and part_path.stat().st_size != size:
+        raise DownloadError(f"{destination.name}: expected {size} bytes, got {part_path.stat().st_size}")
+    if expected_sha256 and sha256 != expected_sha256:
+        part_path.unlink()
+        state_path.unlink(missing_ok=True)
+        raise DownloadError(f"{destination.name}: SHA-256 mismatch ({sha256} != {expected_sha256})")
+    if re.fullmatch(r'[0-9a-f]{32}', etag) and md5 != etag:
+        part_path.unlink()
+        state_path.unlink(missing_ok=True)
+        raise DownloadError(f"{destination.name}: MD5 does not match ETag ({md5} != {etag})")
+
+    os.replace(part_path, destination)
+    checksum_path.write_text(sha256 + "\n")
+    state_path.unlink(missing_ok=True)
+    return destination
+
+
+def _row_group_code_bounds(parquet_file):
+    """(min, max) integer quadkey of every row group from its statistics; (-1, inf) where missing"""
+    column = parquet_file.schema_arrow.get_field_index('quadkey')
+    mins, maxs = [], []
+    for i in range(parquet_file.metadata.num_row_groups):
+        stats = parquet_file.metadata.row_group(i).column(column).statistics
+        has_stats = stats is not None and stats.has_min_max
+        mins.append(str(stats.min) if has_stats else None)
+        maxs.append(str(stats.max) if has_stats else None)
+
+    known = np.array([m is not None for m in mins])
+    zoom = len(next((m for m in mins if m is not None), '0' * 16))
+    low = np.full(len(mins), -1, dtype=np.int64)
+    high = np.full(len(mins), np.iinfo(np.int64).max, dtype=np.int64)
+    if known.any():
+        low[known] = quadkey_to_code(np.array(mins, dtype=object)[known].astype(str))[0]
+        high[known] = quadkey_to_code(np.array(maxs, dtype=object)[known].astype(str))[0]
+    return low, high, zoom
+
+
+def read_region_tiles(parquet_path, bboxes, columns=TILE_COLUMNS):
+    """
+    Read the tiles inside region bounding boxes from an Ookla Parquet file
+
+    Each box is covered by quadkey ranges (see ml/spatial_index.py); only
+    the projected columns of row groups whose quadkey statistics overlap a
+    range are decoded (published files are sorted by quadkey), and rows are
+    then filtered exactly by tile position.
+
+    Args:
+        parquet_path: Ookla tile file
+        bboxes: Mapping of region name -> (west, south, east, north)
+        columns: Columns to read ('quadkey' is always included)
+
+    Returns:
+        (DataFrame with a 'city' column per region, stats dict)
+    """
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(parquet_path)
+    group_low, group_high, zoom = _row_group_code_bounds(parquet_file)
+    columns = list(dict.fromkeys(['quadkey', *columns]))
+
+    # Row groups overlapping any range [lo, hi) of any region
+    tile_ranges = {name: bbox_tile_range(bbox, zoom) for name, bbox in bboxes.items()}
+    selected = np.zeros(len(group_low), dtype=bool)
+    for x0, y0, x1, y1 in tile_ranges.values():
+        ranges = np.array(cover_tile_range(x0, y0, x1, y1, zoom), dtype=np.int64).reshape(-1, 3)
+        selected |= ((ranges[:, 0][None, :] <= group_high[:, None]) & (ranges[:, 1][None, :] > group_low[:, None])).any(axis=1)
+    groups = np.flatnonzero(selected).tolist()
+
+    stats = {
+        'row_groups': parquet_file.metadata.num_row_groups,
+        'row_groups_read': len(groups),
+        'rows': parquet_file.metadata.num_rows,
+    }
+    if not groups:
+        return pd.DataFrame(columns=[*columns, 'city']), stats
+
+    df = parquet_file.read_row_groups(groups, columns=columns).to_pandas()
+    tile_x, tile_y, _ = quadkey_to_tile(df['quadkey'].to_numpy(dtype=str))
+
+    frames = []
+    for name, (x0, y0, x1, y1) in tile_ranges.items():
+        inside = (tile_x >= x0) & (tile_x <= x1) & (tile_y >= y0) & (tile_y <= y1)
+        frames.append(df[inside].assign(city=name))
+    return pd.concat(frames, ignore_index=True), stats
+
+
+def to_dashboard_schema(tiles, year, quarter):
+    """Add the centroid, quarter and quality columns of the synthetic tile CSV"""
+    tile_x, tile_y, zoom = quadkey_to_tile(tiles['quadkey'].to_numpy(dtype=str))
+    lat, lon = tile_centroid(tile_x, tile_y, zoom)
+    quality = np.select(
+        [tiles['avg_d_kbps'] >= QUALITY_THRESHOLDS_KBPS['high'], tiles['avg_d_kbps'] >= QUALITY_THRESHOLDS_KBPS['medium']],
+        ['high', 'medium'], default='low',
+    )
+    return tiles.assign(lat=lat, lon=lon, quality=quality, year=year, quarter=quarter)
+
+
+def download_ookla_data(data_type="mobile", quarters=((2024, 1),), regions=None, base_url=OOKLA_BASE_URL,
+                        output_file=None, connections=CONNECTIONS, checksums=None, keep_parquet=True):
     """
-    Download Ookla performance data
+    Download Ookla quarters and extract the tiles of our regions to CSV
 
     Args:
         data_type: 'mobile' or 'fixed'
-        year: Year (e.g., '2024')
-        quarter: Quarter (e.g., 'Q1', 'Q2', 'Q3', 'Q4')
+        quarters: Iterable of (year, quarter) tuples
+        regions: Mapping of region name to lat_base/lon_base (defaults to CITIES)
+        base_url: Root of the Ookla Parquet tree (e.g. a mirror or local test server)
+        output_file: CSV path (default: data/raw/ookla_<type>_tiles.csv)
+        connections: Concurrent range requests per file
+        checksums: Optional mapping of file name -> expected SHA-256
+        keep_parquet: Keep the downloaded files (later runs then skip the download)
     """
-    # Construct filename
-    # Format: type=mobile/year=2024/quarter=1/2024-01-01_performance_mobile_tiles.parquet
-    quarter_num = quarter[1]  # Extract number from 'Q1'
-
-    # Ookla uses the first day of the quarter
-    quarter_dates = {'1': '01-01', '2': '04-01', '3': '07-01', '4': '10-01'}
-    date_str = f"{year}-{quarter_dates[quarter_num]}"
-
-    filename = f"{date_str}_performance_{data_type}_tiles.parquet"
-
-    # For recent data, try the main repository structure
-    # You may need to browse https://github.com/teamookla/ookla-open-data to find exact paths
-    print(f"\n📡 Downloading Ookla {data_type.upper()} data for {year} {quarter}...")
-    print(f"Filename: {filename}")
-    print("\nNote: You may need to manually download from:")
-    print("https://github.com/teamookla/ookla-open-data")
-    print("or https://registry.opendata.aws/speedtest-global-performance/")
-
-    # Save instructions
-    instructions_file = RAW_DATA_DIR / "DOWNLOAD_INSTRUCTIONS.txt"
-    with open(instructions_file, 'w') as f:
-        f.write("Ookla Open Data Download Instructions\n")
-        f.write("=" * 50 + "\n\n")
-        f.write("Option 1: GitHub\n")
-        f.write("1. Visit: https://github.com/teamookla/ookla-open-data\n")
-        f.write("2. Navigate to: shapefiles/performance/type=mobile/\n")
-        f.write("3. Download recent quarter parquet files\n\n")
-        f.write("Option 2: AWS Registry\n")
-        f.write("1. Visit: https://registry.opendata.aws/speedtest-global-performance/\n")
-        f.write("2. Use AWS CLI:\n")
-        f.write("   aws s3 ls s3://ookla-open-data/parquet/performance/\n")
-        f.write("   aws s3 cp s3://ookla-open-data/parquet/performance/type=mobile/year=2024/ ./data/raw/ --recursive\n\n")
-        f.write("Option 3: Sample Data (Recommended for Demo)\n")
-        f.write("We'll create synthetic data based on Ookla's schema for demonstration\n")
-
-    print(f"\n✅ Instructions saved to: {instructions_file}")
-    return instructions_file
+    output_file = Path(output_file or RAW_DATA_DIR / f"ookla_{data_type}_tiles.csv")
+    bboxes = region_bboxes(regions)
+    checksums = checksums or {}
+    first_chunk = True
+    total = 0
+
+    for year, quarter in quarters:
+        url = ookla_url(data_type, year, quarter, base_url)
+        destination = OOKLA_DOWNLOAD_DIR / f"type={data_type}" / url.rsplit('/', 1)[1]
+        print(f"\n📡 Downloading Ookla {data_type.upper()} data for {year} Q{quarter}...")
+        path = download_file(url, destination, expected_sha256=checksums.get(destination.name), connections=connections)
+
+        start = time.perf_counter()
+        tiles, stats = read_region_tiles(path, bboxes)
+        tiles = to_dashboard_schema(tiles, year, quarter)
+        print(f"   Read {len(tiles)} of {stats['rows']} tiles from {stats['row_groups_read']}/{stats['row_groups']} "
+              f"row groups in {time.perf_counter() - start:.1f}s")
+
+        tiles.to_csv(output_file, mode='w' if first_chunk else 'a', header=first_chunk, index=False)
+        first_chunk = False
+        total += len(tiles)
+
+        if not keep_parquet:
+            path.unlink()
+            path.with_name(path.name + '.sha256').unlink(missing_ok=True)
+
+    print(f"\n✅ Saved {total} tiles to: {output_file}")
+    return output_file
+
+
+def _parse_quarter(value):
+    match = re.fullmatch(r'(\d{4})[-_ ]?Q([1-4])', value, flags=re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError(f"Expected a quarter like 2024Q1, got {value!r}")
+    return int(match.group(1)), int(match.group(2))
+
 
 if __name__ == "__main__":
-    download_ookla_data(data_type="mobile", year="2024", quarter="Q1")
-    print("\n💡 For quick demo, we'll create synthetic data in the next step")
+    parser = argparse.ArgumentParser(description="Download Ookla Open Data tiles for the dashboard regions")
+    parser.add_argument('--type', dest='data_type', choices=['mobile', 'fixed'], default='mobile')
+    parser.add_argument('--quarters', nargs='+', type=_parse_quarter, default=[(2024, 1)], help="e.g. 2024Q1 2024Q2")
+    parser.add_argument('--base-url', default=OOKLA_BASE_URL)
+    parser.add_argument('--connections', type=int, default=CONNECTIONS)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--delete-parquet', action='store_true', help="Remove each quarter's file after extraction")
+    args = parser.parse_args()
+
+    download_ookla_data(args.data_type, args.quarters, base_url=args.base_url, output_file=args.output,
+                        connections=args.connections, keep_parquet=not args.delete_parquet)
+    print("\n💡 Without network access, scripts/create_synthetic_data.py generates data with the same schema")
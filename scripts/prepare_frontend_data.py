@@ -1,22 +1,56 @@
 """
 Prepare data for frontend React app
-Converts CSV data to JSON format optimized for visualization
+Converts CSV data to a compact binary columnar format (see ml/columnar.py)
+optimized for visualization
 """
 
 import pandas as pd
-import json
+import numpy as np
 from pathlib import Path
+import sys
+
+# Add parent directory to path (so this file also runs as a script)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.columnar import write_columnar
+from ml.downsample import TimeSeriesPyramid
+from ml.incremental_stats import GroupedMoments, iter_appended_rows, load_state, save_state, watermark_valid
+from ml.spatial_index import SpatialIndex, build_spatial_index
 
 # Paths
 RAW_DATA_DIR = Path(__file__).parent.parent / "data" / "raw"
+PROCESSED_DATA_DIR = Path(__file__).parent.parent / "data" / "processed"
 FRONTEND_PUBLIC = Path(__file__).parent.parent / "frontend" / "public"
 FRONTEND_PUBLIC.mkdir(parents=True, exist_ok=True)
 
+# Incremental 5G statistics (aggregates + CSV byte watermark) kept between runs
+STATS_STATE_PATH = PROCESSED_DATA_DIR / "5g_timeseries_stats_state.json"
+
+# Chart points: min/max-per-bucket pyramid (keeps spikes and anomalies), tiled for zoomable charts
+PYRAMID_DIR = FRONTEND_PUBLIC / "5g_timeseries"
+PYRAMID_VALUE_COLUMNS = ['throughput_mbps', 'latency_ms']
+OVERVIEW_MAX_POINTS = 1000  # Points embedded in 5g_timeseries.tnmc for the initial view
+TIMESERIES_COLUMNS = ['timestamp', 'throughput_mbps', 'latency_ms', 'rsrp_dbm', 'rsrq_db', 'sinr_db', 'cqi',
+                      'packet_loss_pct', 'scenario']
+
+# Hourly mean (and std where listed) per KPI; overall means for the summary stats
+HOURLY_COLUMNS = ['throughput_mbps', 'latency_ms', 'packet_loss_pct']
+HOURLY_STD_COLUMNS = ['throughput_mbps', 'latency_ms']
+SUMMARY_COLUMNS = ['throughput_mbps', 'latency_ms', 'rsrp_dbm']
+
+# Quadkey-prefix index of the Ookla tiles (served by the Gradio app's /tiles endpoint)
+SPATIAL_INDEX_DIR = PROCESSED_DATA_DIR / "ookla_spatial_index"
+OVERVIEW_MAX_TILES = 500  # Aggregated tiles embedded in ookla_data.tnmc
+
 def prepare_ookla_data():
     """Prepare Ookla data for geographic visualization"""
     print("📊 Preparing Ookla data...")
 
-    df = pd.read_csv(RAW_DATA_DIR / "synthetic_ookla_mobile_tiles.csv")
+    # Real tiles from scripts/download_ookla_data.py when present, synthetic ones otherwise
+    tiles_path = RAW_DATA_DIR / "ookla_mobile_tiles.csv"
+    if not tiles_path.exists():
+        tiles_path = RAW_DATA_DIR / "synthetic_ookla_mobile_tiles.csv"
+    df = pd.read_csv(tiles_path, dtype={'quadkey': str})
 
     # Aggregate by city for summary view
     city_summary = df.groupby('city').agg({
@@ -29,15 +63,15 @@ def prepare_ookla_data():
         'quality': lambda x: x.mode()[0] if len(x) > 0 else 'unknown'
     }).reset_index()
 
-    # Convert to JSON
-    city_data = city_summary.to_dict('records')
-
-    # Sample individual tiles (for detailed view)
-    sample_tiles = df.sample(n=min(500, len(df))).to_dict('records')
+    # Spatial index; the overview is the finest zoom whose aggregated tiles fit OVERVIEW_MAX_TILES
+    build_spatial_index(df, SPATIAL_INDEX_DIR)
+    index = SpatialIndex(SPATIAL_INDEX_DIR)
+    tiles_zoom = index.best_zoom(max_tiles=OVERVIEW_MAX_TILES)
 
     output = {
-        'summary': city_data,
-        'tiles': sample_tiles,
+        'summary': city_summary,
+        'tiles': index.query(zoom=tiles_zoom),
+        'tiles_zoom': tiles_zoom,
         'stats': {
             'total_tests': int(df['tests'].sum()),
             'avg_download_mbps': float(df['avg_d_kbps'].mean() / 1000),
@@ -47,64 +81,150 @@ def prepare_ookla_data():
     }
 
     # Save
-    output_path = FRONTEND_PUBLIC / "ookla_data.json"
-    with open(output_path, 'w') as f:
-        json.dump(output, f, indent=2)
+    output_path = FRONTEND_PUBLIC / "ookla_data.tnmc"
+    size = _write_dashboard_file(output_path, output)
 
-    print(f"✅ Saved Ookla data to {output_path}")
+    print(f"✅ Saved Ookla data to {output_path} ({size / 1024:.1f} KB)")
     return output
 
 
-def prepare_5g_timeseries():
-    """Prepare 5G time-series data for charts"""
-    print("\n📊 Preparing 5G time-series data...")
-
-    df = pd.read_csv(RAW_DATA_DIR / "synthetic_5g_timeseries.csv")
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-
-    # Sample every 100th point for performance (500 points total)
-    df_sampled = df.iloc[::100].copy()
-
-    # Convert to JSON-friendly format
-    df_sampled['timestamp'] = df_sampled['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-    time_series_data = df_sampled[['timestamp', 'throughput_mbps', 'latency_ms',
-                                   'rsrp_dbm', 'rsrq_db', 'sinr_db', 'cqi',
-                                   'packet_loss_pct', 'scenario']].to_dict('records')
+def _write_dashboard_file(path, output):
+    """Write DataFrame entries as columnar tables and everything else as header metadata"""
+    tables = {key: value for key, value in output.items() if isinstance(value, pd.DataFrame)}
+    meta = {key: value for key, value in output.items() if key not in tables}
+    return write_columnar(path, tables, meta=meta)
+
+
+def _empty_5g_state():
+    """Aggregation state before any rows have been seen"""
+    return {
+        'watermark': None,
+        'pyramid_dirty': False,
+        'n_rows': 0,
+        'n_anomalies': 0,
+        'has_anomaly_labels': False,
+        'scenarios': {},
+        'hourly': GroupedMoments(HOURLY_COLUMNS).get_state(),
+        'cell_hourly': GroupedMoments(HOURLY_COLUMNS).get_state(),
+        'overall': GroupedMoments(SUMMARY_COLUMNS).get_state(),
+    }
 
-    # Hourly aggregation for summary
-    df['hour'] = df['timestamp'].dt.hour
-    hourly_stats = df.groupby('hour').agg({
-        'throughput_mbps': ['mean', 'std'],
-        'latency_ms': ['mean', 'std'],
-        'packet_loss_pct': 'mean'
-    }).reset_index()
 
-    hourly_stats.columns = ['_'.join(col).strip('_') for col in hourly_stats.columns.values]
-    hourly_data = hourly_stats.to_dict('records')
+def _timeseries_pyramid():
+    return TimeSeriesPyramid(PYRAMID_DIR, PYRAMID_VALUE_COLUMNS, TIMESERIES_COLUMNS)
+
+
+def update_5g_stats(csv_path, state_path, full=False):
+    """
+    Fold rows appended to the 5G CSV since the last run into the saved state
+
+    Hourly (and per-cell hourly) count/mean/M2 are merged with Welford/Chan
+    updates and the chart pyramid rewrites only the tiles new rows fall into,
+    so each run reads only the new rows. If the CSV was rewritten rather than
+    appended to, or full is set, state and pyramid are rebuilt from scratch.
+
+    State and watermark are saved after every block. The pyramid tiles
+    cannot be replaced in the same atomic write, so the state is marked
+    dirty while they are rewritten: after a crash partway through a block,
+    the next run rebuilds instead of merging the block's rows twice.
+    """
+    state = None if full else load_state(state_path)
+    pyramid = _timeseries_pyramid()
+    if (state is None or state.get('pyramid_dirty') or not watermark_valid(csv_path, state['watermark'])
+            or not pyramid.manifest['levels'][0]['tiles']):
+        state = _empty_5g_state()
+        pyramid.clear()
+
+    hourly = GroupedMoments.from_state(state['hourly'])
+    cell_hourly = GroupedMoments.from_state(state['cell_hourly'])
+    overall = GroupedMoments.from_state(state['overall'])
+    new_rows = 0
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+
+    for df, watermark in iter_appended_rows(csv_path, state['watermark'], parse_dates=['timestamp']):
+        state['pyramid_dirty'] = True
+        save_state(state_path, state)
+        pyramid.update(df)
+
+        hour = df['timestamp'].dt.hour.to_numpy()
+        hourly.update(hour, df[HOURLY_COLUMNS].to_numpy())
+        if 'cell_id' in df.columns:
+            cell_hourly.update(df['cell_id'].to_numpy() * 24 + hour, df[HOURLY_COLUMNS].to_numpy())
+        overall.update(np.zeros(len(df)), df[SUMMARY_COLUMNS].to_numpy())
+
+        for scenario, count in df['scenario'].value_counts().items():
+            state['scenarios'][scenario] = state['scenarios'].get(scenario, 0) + int(count)
+        if 'is_anomaly' in df.columns:
+            state['has_anomaly_labels'] = True
+            state['n_anomalies'] += int(df['is_anomaly'].sum())
+
+        state['n_rows'] += len(df)
+        state['watermark'] = watermark
+        new_rows += len(df)
+
+        # Stats and watermark now match the pyramid again
+        state['hourly'] = hourly.get_state()
+        state['cell_hourly'] = cell_hourly.get_state()
+        state['overall'] = overall.get_state()
+        state['pyramid_dirty'] = False
+        save_state(state_path, state)
+
+    save_state(state_path, state)  # Also records a reset when no rows were read
+
+    print(f"   Merged {new_rows} new rows ({state['n_rows']} total)")
+    return state
+
+
+def _hourly_table(moments, key_names):
+    """Flatten grouped moments into the table the dashboard reads"""
+    means, stds = moments.mean, moments.std()
+    if len(key_names) == 2:
+        table = pd.DataFrame(dict(zip(key_names, np.divmod(moments.keys, 24))))
+    else:
+        table = pd.DataFrame({key_names[0]: moments.keys})
+    for j, col in enumerate(moments.columns):
+        table[f'{col}_mean'] = means[:, j]
+        if col in HOURLY_STD_COLUMNS:
+            table[f'{col}_std'] = stds[:, j]
+    return table
+
+
+def prepare_5g_timeseries(full=False):
+    """
+    Prepare 5G time-series data for charts
+
+    Statistics are maintained incrementally (see update_5g_stats), so a
+    refresh costs time proportional to the rows added since the last run.
+    """
+    print("\n📊 Preparing 5G time-series data...")
 
-    # Scenario distribution
-    scenario_counts = df['scenario'].value_counts().to_dict()
+    state = update_5g_stats(RAW_DATA_DIR / "synthetic_5g_timeseries.csv", STATS_STATE_PATH, full=full)
+    overall = GroupedMoments.from_state(state['overall'])
+    averages = dict(zip(overall.columns, overall.mean[0].tolist())) if len(overall.keys) else {}
 
     output = {
-        'timeseries': time_series_data,
-        'hourly': hourly_data,
-        'scenarios': scenario_counts,
+        'timeseries': _timeseries_pyramid().level_points(OVERVIEW_MAX_POINTS),
+        'timeseries_pyramid': f"{PYRAMID_DIR.name}/manifest.json",
+        'hourly': _hourly_table(GroupedMoments.from_state(state['hourly']), ['hour']),
+        'scenarios': dict(sorted(state['scenarios'].items(), key=lambda item: -item[1])),
         'stats': {
-            'total_samples': len(df),
-            'avg_throughput_mbps': float(df['throughput_mbps'].mean()),
-            'avg_latency_ms': float(df['latency_ms'].mean()),
-            'avg_rsrp_dbm': float(df['rsrp_dbm'].mean()),
-            'anomaly_rate': float(df['is_anomaly'].mean() * 100) if 'is_anomaly' in df.columns else 0
+            'total_samples': state['n_rows'],
+            'avg_throughput_mbps': averages.get('throughput_mbps', float('nan')),
+            'avg_latency_ms': averages.get('latency_ms', float('nan')),
+            'avg_rsrp_dbm': averages.get('rsrp_dbm', float('nan')),
+            'anomaly_rate': state['n_anomalies'] / state['n_rows'] * 100 if state['has_anomaly_labels'] else 0
         }
     }
 
+    cell_hourly = GroupedMoments.from_state(state['cell_hourly'])
+    if len(cell_hourly.keys):
+        output['hourly_by_cell'] = _hourly_table(cell_hourly, ['cell_id', 'hour'])
+
     # Save
-    output_path = FRONTEND_PUBLIC / "5g_timeseries.json"
-    with open(output_path, 'w') as f:
-        json.dump(output, f, indent=2)
+    output_path = FRONTEND_PUBLIC / "5g_timeseries.tnmc"
+    size = _write_dashboard_file(output_path, output)
 
-    print(f"✅ Saved 5G data to {output_path}")
+    print(f"✅ Saved 5G data to {output_path} ({size / 1024:.1f} KB)")
     return output
 
 
@@ -114,11 +234,11 @@ if __name__ == "__main__":
     print("=" * 60)
 
     ookla_data = prepare_ookla_data()
-    fiveg_data = prepare_5g_timeseries()
+    fiveg_data = prepare_5g_timeseries(full='--full' in sys.argv)
 
     print("\n" + "=" * 60)
     print("✅ All frontend data prepared!")
     print("=" * 60)
     print("\nData files created:")
-    print(f"  - ookla_data.json ({len(ookla_data['tiles'])} tiles)")
-    print(f"  - 5g_timeseries.json ({len(fiveg_data['timeseries'])} time points)")
+    print(f"  - ookla_data.tnmc ({len(ookla_data['tiles'])} tiles at zoom {ookla_data['tiles_zoom']})")
+    print(f"  - 5g_timeseries.tnmc ({len(fiveg_data['timeseries'])} time points)")
@@ -0,0 +1,94 @@
+"""
+Synthetic RAN feed for the real-time KPI service
+Streams synthetic 5G KPI records (from create_synthetic_data) to ml/realtime.py
+over TCP as NDJSON or over UDP as compact binary datagrams
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import time
+from pathlib import Path
+import sys
+
+# Add parent directory to path (so this file also runs as a script)
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from create_synthetic_data import iter_synthetic_5g_chunks
+from ml.features import FEATURE_COLUMNS, extract_features
+from ml.realtime import RECORD_DTYPE, TCP_PORT, UDP_PORT, encode_binary
+
+# Keep each datagram under a typical 1500-byte MTU
+UDP_RECORDS_PER_DATAGRAM = 1400 // RECORD_DTYPE.itemsize
+
+
+def _chunks(n_samples, n_cells, seed):
+    """Yield (timestamps as epoch seconds, cell IDs, feature matrix) per generated chunk"""
+    for chunk in iter_synthetic_5g_chunks(n_samples=n_samples, chunk_size=10_000, seed=seed, n_cells=n_cells):
+        timestamps = chunk['timestamp'].to_numpy().astype('datetime64[ms]').astype('int64') / 1000.0
+        yield timestamps, chunk['cell_id'].to_numpy(), extract_features(chunk)
+
+
+async def _pace(sent, rate, start):
+    """Sleep so that sent records take sent / rate seconds (rate None = as fast as possible)"""
+    if rate:
+        delay = start + sent / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def send_tcp(host='127.0.0.1', port=TCP_PORT, n_samples=100_000, n_cells=20, rate=None, seed=42):
+    """Send NDJSON records over one TCP connection; returns records sent"""
+    _, writer = await asyncio.open_connection(host, port)
+    sent, start = 0, time.perf_counter()
+
+    for timestamps, cell_ids, X in _chunks(n_samples, n_cells, seed):
+        for i in range(0, len(X), 100):
+            lines = [
+                json.dumps({'timestamp': t, 'cell_id': int(c), **dict(zip(FEATURE_COLUMNS, row))})
+                for t, c, row in zip(timestamps[i:i + 100].tolist(), cell_ids[i:i + 100], X[i:i + 100].tolist())
+            ]
+            writer.write(("\n".join(lines) + "\n").encode('utf-8'))
+            await writer.drain()  # Blocks when the service applies back-pressure
+            sent += len(lines)
+            await _pace(sent, rate, start)
+
+    writer.close()
+    await writer.wait_closed()
+    return sent
+
+
+async def send_udp(host='127.0.0.1', port=UDP_PORT, n_samples=100_000, n_cells=20, rate=None, seed=42):
+    """Send compact binary records as UDP datagrams; returns records sent"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sent, start = 0, time.perf_counter()
+
+    for timestamps, cell_ids, X in _chunks(n_samples, n_cells, seed):
+        for i in range(0, len(X), UDP_RECORDS_PER_DATAGRAM):
+            stop = i + UDP_RECORDS_PER_DATAGRAM
+            sock.sendto(encode_binary(timestamps[i:stop], cell_ids[i:stop], X[i:stop]), (host, port))
+            sent += len(X[i:stop])
+            await _pace(sent, rate, start)
+
+    sock.close()
+    return sent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream synthetic KPI records to the real-time service")
+    parser.add_argument('--protocol', choices=['tcp', 'udp'], default='tcp')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--samples', type=int, default=100_000)
+    parser.add_argument('--cells', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=None, help="Records per second (default: unthrottled)")
+    args = parser.parse_args()
+
+    send = send_tcp if args.protocol == 'tcp' else send_udp
+    port = TCP_PORT if args.protocol == 'tcp' else UDP_PORT
+
+    start = time.perf_counter()
+    sent = asyncio.run(send(args.host, port, args.samples, args.cells, args.rate))
+    elapsed = time.perf_counter() - start
+    print(f"✅ Sent {sent} records over {args.protocol.upper()} in {elapsed:.1f}s ({sent / elapsed:,.0f}/s)")
@@ -0,0 +1,173 @@
+"""
+Tests for the compiled serving models in ml/compact_forest.py and ml/bundle.py
+Checks that the compact forests reproduce the sklearn models bit for bit and
+that models survive a round-trip through a bundle file
+
+Run with: python -m pytest test_compact_forest.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.anomaly_detector import NetworkAnomalyDetector
+from ml.bundle import BundleError, ModelBundle, build_bundle, load_serving_models, write_bundle
+from ml.compact_forest import CHUNK_ROWS, SMALL_BATCH_ROWS, fold_scaler_thresholds
+from ml.coverage_classifier import CoverageClassifier
+from ml.features import FEATURE_COLUMNS
+
+
+def kpi_frame(n, seed):
+    """Synthetic KPI rows spanning every coverage class"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'rsrp_dbm': rng.uniform(-120, -60, n),
+        'rsrq_db': rng.uniform(-20, -3, n),
+        'sinr_db': rng.uniform(-5, 30, n),
+        'cqi': rng.integers(1, 16, n).astype(np.float64),
+        'throughput_mbps': rng.gamma(2.0, 150.0, n),
+        'latency_ms': rng.gamma(3.0, 8.0, n),
+        'packet_loss_pct': rng.exponential(0.5, n),
+    })
+
+
+@pytest.fixture(scope='module')
+def trained(tmp_path_factory):
+    """Small fitted detector and classifier, saved to a model directory"""
+    df = kpi_frame(4000, seed=1)
+
+    detector = NetworkAnomalyDetector(contamination=0.05)
+    detector.model.set_params(n_estimators=30)
+    detector.fit(df)
+
+    classifier = CoverageClassifier(n_estimators=30)
+    classifier.train(df)
+
+    model_dir = tmp_path_factory.mktemp('models')
+    detector.save(model_dir)
+    classifier.save(model_dir)
+    return detector, classifier, model_dir
+
+
+def boundary_rows(compiled, n, seed):
+    """Rows whose values sit exactly on, and one ulp above, folded split thresholds"""
+    rng = np.random.default_rng(seed)
+    X = kpi_frame(n, seed).to_numpy(copy=True)
+    internal = np.flatnonzero(np.isfinite(compiled.threshold))
+    nodes = rng.choice(internal, n)
+    thresholds = compiled.threshold[nodes]
+    X[np.arange(n), compiled.feature[nodes]] = np.where(np.arange(n) % 2, np.nextafter(thresholds, np.inf), thresholds)
+    return X
+
+
+def assert_same_anomalies(detector, compiled, X):
+    expected_anomalies, expected_scores = detector.predict(X)
+    anomalies, scores = compiled.predict(X)
+    np.testing.assert_array_equal(anomalies, expected_anomalies)
+    assert scores.tobytes() == expected_scores.tobytes()
+
+
+def assert_same_coverage(classifier, compiled, X):
+    expected_predictions, expected_probabilities = classifier.predict(X)
+    predictions, probabilities = compiled.predict(X)
+    np.testing.assert_array_equal(predictions, expected_predictions)
+    assert probabilities.tobytes() == expected_probabilities.tobytes()
+
+
+@pytest.mark.parametrize('n_rows', [1, SMALL_BATCH_ROWS, SMALL_BATCH_ROWS + 1, CHUNK_ROWS + 100])
+def test_compiled_models_match_sklearn(trained, n_rows):
+    detector, classifier, _ = trained
+    compiled_detector, compiled_classifier = detector.compile(), classifier.compile()
+
+    batch = kpi_frame(n_rows, seed=n_rows)
+    for X in (batch, batch.to_numpy()):
+        assert_same_anomalies(detector, compiled_detector, X)
+        assert_same_coverage(classifier, compiled_classifier, X)
+
+    assert_same_anomalies(detector, compiled_detector, boundary_rows(compiled_detector, n_rows, seed=n_rows))
+    assert_same_coverage(classifier, compiled_classifier, boundary_rows(compiled_classifier, n_rows, seed=n_rows))
+
+
+def test_single_rows_match_sklearn(trained):
+    detector, classifier, _ = trained
+    compiled_detector, compiled_classifier = detector.compile(), classifier.compile()
+
+    for row in kpi_frame(50, seed=3).to_numpy():
+        assert_same_anomalies(detector, compiled_detector, row[np.newaxis])
+        assert_same_coverage(classifier, compiled_classifier, row[np.newaxis])
+
+
+def test_folded_thresholds_split_like_scaled_values():
+    rng = np.random.default_rng(5)
+    n = 2000
+    threshold = rng.normal(0, 2, n).astype(np.float32).astype(np.float64)
+    feature = rng.integers(0, 3, n)
+    mean = rng.normal(0, 50, 3)
+    scale = rng.uniform(0.01, 100, 3)
+
+    folded = fold_scaler_thresholds(threshold, feature, mean, scale)
+
+    def goes_left(v):
+        return ((v - mean[feature]) / scale[feature]).astype(np.float32).astype(np.float64) <= threshold
+
+    # The folded threshold is the largest raw value that still goes left
+    assert goes_left(folded).all()
+    assert not goes_left(np.nextafter(folded, np.inf)).any()
+
+    for v in (rng.normal(0, 200, n), mean[feature] + threshold * scale[feature]):
+        np.testing.assert_array_equal(v <= folded, goes_left(v))
+
+
+def test_bundle_round_trip(trained, tmp_path):
+    detector, classifier, _ = trained
+    models = {'anomaly_detector': detector.compile(), 'coverage_classifier': classifier.compile()}
+    path = write_bundle(tmp_path / 'models.bundle', models, version='test', verbose=False)
+
+    bundle = ModelBundle(path, verify=True)
+    bundle.check_schema()
+    assert bundle.version == 'test'
+    assert bundle.feature_names == FEATURE_COLUMNS
+
+    X = kpi_frame(500, seed=11)
+    assert_same_anomalies(detector, bundle.model('anomaly_detector'), X)
+    assert_same_coverage(classifier, bundle.model('coverage_classifier'), X)
+
+    with pytest.raises(BundleError, match='feature schema'):
+        bundle.check_schema(FEATURE_COLUMNS[::-1])
+
+
+def test_corrupted_bundle_is_rejected(trained, tmp_path):
+    detector, _, _ = trained
+    path = write_bundle(tmp_path / 'models.bundle', {'anomaly_detector': detector.compile()}, verbose=False)
+    data = bytearray(path.read_bytes())
+
+    data[-1] ^= 0xFF
+    path.write_bytes(data)
+    with pytest.raises(BundleError, match='checksum mismatch for anomaly_detector/'):
+        ModelBundle(path, verify=True)
+
+    path.write_bytes(b'not a bundle' * 10)
+    with pytest.raises(BundleError, match='not a model bundle'):
+        ModelBundle(path)
+
+
+def test_stale_bundle_falls_back_to_pickles(trained):
+    detector, classifier, model_dir = trained
+    build_bundle(model_dir)
+    assert ModelBundle(model_dir / 'models.bundle').stale_sources(model_dir) == []
+
+    X = kpi_frame(200, seed=13)
+    anomaly_model, coverage_model = load_serving_models(model_dir)
+    assert_same_anomalies(detector, anomaly_model, X)
+    assert_same_coverage(classifier, coverage_model, X)
+
+    # Retrain one model in place: the bundle no longer reflects the pickles
+    retrained = NetworkAnomalyDetector(contamination=0.1)
+    retrained.model.set_params(n_estimators=10)
+    retrained.fit(kpi_frame(1000, seed=17))
+    retrained.save(model_dir)
+
+    assert ModelBundle(model_dir / 'models.bundle').stale_sources(model_dir) == [
+        'anomaly_detector.pkl', 'anomaly_scaler.pkl'
+    ]
+    anomaly_model, _ = load_serving_models(model_dir)
+    assert_same_anomalies(retrained, anomaly_model, X)
@@ -0,0 +1,198 @@
+"""
+Tests for scripts/download_ookla_data.py against a local HTTP server
+Serves a small quadkey-sorted Parquet fixture with Range support and checks
+ranged download, resume, ETag/checksum verification and row-group pruning
+
+Run with: python -m pytest test_ookla_download.py
+"""
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from ml.quadkey import latlon_to_tile, quadkey_to_tile, tile_to_quadkey
+from scripts import download_ookla_data as ookla
+
+PART_SIZE = 4096
+ZOOM = 16
+
+
+@pytest.fixture(scope='module')
+def fixture_parquet(tmp_path_factory):
+    """Ookla-like tile file sorted by quadkey: tiles around every region plus random tiles elsewhere"""
+    rng = np.random.default_rng(7)
+    lat, lon = [], []
+    for region in ookla.CITIES.values():
+        lat.append(region['lat_base'] + rng.uniform(-0.7, 0.7, 300))
+        lon.append(region['lon_base'] + rng.uniform(-0.7, 0.7, 300))
+    lat.append(rng.uniform(-60, 60, 3000))
+    lon.append(rng.uniform(-180, 180, 3000))
+
+    tile_x, tile_y = latlon_to_tile(np.concatenate(lat), np.concatenate(lon), ZOOM)
+    quadkeys = np.unique(tile_to_quadkey(tile_x, tile_y, ZOOM))
+    n = len(quadkeys)
+    table = pa.table({
+        'quadkey': quadkeys,
+        'tile': ['POLYGON(...)'] * n,
+        'avg_d_kbps': rng.integers(1_000, 300_000, n),
+        'avg_u_kbps': rng.integers(500, 50_000, n),
+        'avg_lat_ms': rng.integers(5, 200, n),
+        'tests': rng.integers(1, 100, n),
+        'devices': rng.integers(1, 50, n),
+    })
+
+    path = tmp_path_factory.mktemp('ookla') / 'tiles.parquet'
+    pq.write_table(table, path, row_group_size=200)
+    return path
+
+
+class FixtureServer:
+    """Serves one file with HEAD, Range GETs and an MD5 ETag; ranges listed in fail_ranges are cut short"""
+
+    def __init__(self, data):
+        self.data = data
+        self.etag = hashlib.md5(data).hexdigest()
+        self.fail_ranges = set()
+        self.ranges = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _headers(self, status, length, extra=()):
+                self.send_response(status)
+                self.send_header('Content-Length', str(length))
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('ETag', f'"{server.etag}"')
+                for name, value in extra:
+                    self.send_header(name, value)
+                self.end_headers()
+
+            def do_HEAD(self):
+                self._headers(200, len(server.data))
+
+            def do_GET(self):
+                header = self.headers.get('Range')
+                if header is None:
+                    self._headers(200, len(server.data))
+                    self.wfile.write(server.data)
+                    return
+
+                start, end = (int(v) for v in header.removeprefix('bytes=').split('-'))
+                server.ranges.append(start)
+                body = server.data[start:end + 1]
+                self._headers(206, len(body), [('Content-Range', f"bytes {start}-{end}/{len(server.data)}")])
+                if start in server.fail_ranges:
+                    self.wfile.write(body[:len(body) // 2])  # Connection drops mid-part
+                    self.close_connection = True
+                else:
+                    self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/tiles.parquet"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(ookla.time, 'sleep', lambda seconds: None)
+
+
+def download(server, destination, **kwargs):
+    return ookla.download_file(server.url, destination, part_size=PART_SIZE, connections=4, progress=False, **kwargs)
+
+
+def test_interrupted_download_resumes(fixture_parquet, tmp_path):
+    data = fixture_parquet.read_bytes()
+    expected = hashlib.sha256(data).hexdigest()
+    destination = tmp_path / 'tiles.parquet'
+    n_parts = -(-len(data) // PART_SIZE)
+    failing = 2 * PART_SIZE
+
+    with FixtureServer(data) as server:
+        # One part keeps failing: the download gives up with the other parts saved
+        server.fail_ranges.add(failing)
+        with pytest.raises(ookla.DownloadError):
+            download(server, destination, expected_sha256=expected)
+        assert not destination.exists()
+        assert destination.with_name('tiles.parquet.part.json').exists()
+
+        # The next run fetches only the missing part
+        server.fail_ranges.clear()
+        server.ranges.clear()
+        assert download(server, destination, expected_sha256=expected) == destination
+        assert server.ranges == [failing]
+
+        # Already verified: nothing is fetched again
+        server.ranges.clear()
+        download(server, destination, expected_sha256=expected)
+        assert server.ranges == []
+
+    assert hashlib.sha256(destination.read_bytes()).hexdigest() == expected
+    assert destination.with_name('tiles.parquet.sha256').read_text().strip() == expected
+    assert not destination.with_name('tiles.parquet.part').exists()
+    assert n_parts > 3
+
+
+def test_changed_etag_restarts_download(fixture_parquet, tmp_path):
+    data = fixture_parquet.read_bytes()
+    destination = tmp_path / 'tiles.parquet'
+
+    with FixtureServer(data) as server:
+        server.fail_ranges.add(0)
+        with pytest.raises(ookla.DownloadError):
+            download(server, destination)
+
+        # The remote file changed: saved parts are discarded and every part is fetched
+        server.data = data[::-1]
+        server.etag = hashlib.md5(server.data).hexdigest()
+        server.fail_ranges.clear()
+        server.ranges.clear()
+        download(server, destination)
+        assert len(server.ranges) == -(-len(data) // PART_SIZE)
+
+    assert destination.read_bytes() == data[::-1]
+
+
+def test_checksum_mismatch_is_rejected(fixture_parquet, tmp_path):
+    data = fixture_parquet.read_bytes()
+
+    with FixtureServer(data) as server:
+        with pytest.raises(ookla.DownloadError, match='SHA-256'):
+            download(server, tmp_path / 'a.parquet', expected_sha256='0' * 64)
+
+        server.etag = hashlib.md5(b'something else').hexdigest()
+        with pytest.raises(ookla.DownloadError, match='ETag'):
+            download(server, tmp_path / 'b.parquet')
+
+    assert not (tmp_path / 'a.parquet').exists() and not (tmp_path / 'a.parquet.part').exists()
+    assert not (tmp_path / 'b.parquet').exists()
+
+
+def test_region_tiles_match_full_scan(fixture_parquet):
+    bboxes = ookla.region_bboxes()
+    tiles, stats = ookla.read_region_tiles(fixture_parquet, bboxes)
+    assert 0 < stats['row_groups_read'] < stats['row_groups']
+
+    full = pd.read_parquet(fixture_parquet, columns=ookla.TILE_COLUMNS)
+    tile_x, tile_y, _ = quadkey_to_tile(full['quadkey'].to_numpy(dtype=str))
+    for name, bbox in bboxes.items():
+        x0, y0, x1, y1 = ookla.bbox_tile_range(bbox, ZOOM)
+        inside = (tile_x >= x0) & (tile_x <= x1) & (tile_y >= y0) & (tile_y <= y1)
+        expected = sorted(full.loc[inside, 'quadkey'])
+        assert sorted(tiles.loc[tiles['city'] == name, 'quadkey']) == expected
+        assert expected